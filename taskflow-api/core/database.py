@@ -0,0 +1,103 @@
+import os
+
+# ============================================================================ #
+# CONFIGURATION BASE DE DONNÉES (variables d'environnement)
+# ============================================================================ #
+# TASKFLOW_DB_ENGINE=postgresql : PostgreSQL, connexions persistantes
+#   (CONN_MAX_AGE + health checks) ou pool psycopg (TASKFLOW_DB_POOL=1).
+# Sinon SQLite (défaut local), profil "tuned" : WAL, busy_timeout,
+#   synchronous=NORMAL, mmap, transactions IMMEDIATE. Les PRAGMA sont appliqués
+#   à chaque nouvelle connexion (OPTIONS["init_command"]).
+#   TASKFLOW_SQLITE_PROFILE=default : réglages SQLite d'origine.
+# TASKFLOW_DB_REPLICAS=a,b : réplicas en lecture (fichiers SQLite ou hôtes
+#   PostgreSQL), alias replica_1, replica_2… routés par core.db_router.
+
+SQLITE_PRAGMAS = {
+    # lecteurs et écrivain ne se bloquent plus mutuellement
+    "journal_mode": "WAL",
+    # en WAL, NORMAL reste cohérent après crash (seul le dernier commit peut être perdu)
+    "synchronous": "NORMAL",
+    "busy_timeout": 5000,           # ms d'attente du verrou avant "database is locked"
+    "mmap_size": 268435456,         # 256 Mo lus via mmap
+    "temp_store": "MEMORY",
+    "cache_size": -64000,           # 64 Mo de cache de pages
+}
+
+
+def _int(environ, name, default):
+    return int(environ.get(name, default))
+
+
+def _flag(environ, name, default=False):
+    return environ.get(name, "1" if default else "0").lower() in ("1", "true", "yes", "on")
+
+
+def sqlite_init_command(pragmas=SQLITE_PRAGMAS):
+    return "; ".join(f"PRAGMA {name}={value}" for name, value in pragmas.items())
+
+
+def sqlite_config(environ, base_dir):
+    config = {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": environ.get("TASKFLOW_DB_NAME", str(base_dir / "db.sqlite3")),
+    }
+    if environ.get("TASKFLOW_SQLITE_PROFILE", "tuned") == "default":
+        return config
+    pragmas = {
+        **SQLITE_PRAGMAS,
+        "busy_timeout": _int(environ, "TASKFLOW_SQLITE_BUSY_TIMEOUT", SQLITE_PRAGMAS["busy_timeout"]),
+        "mmap_size": _int(environ, "TASKFLOW_SQLITE_MMAP_SIZE", SQLITE_PRAGMAS["mmap_size"]),
+    }
+    config["OPTIONS"] = {
+        "init_command": sqlite_init_command(pragmas),
+        # timeout du module sqlite3 aligné sur busy_timeout
+        "timeout": pragmas["busy_timeout"] / 1000,
+        # verrou d'écriture pris dès BEGIN : pas d'échec lors de la promotion lecture -> écriture
+        "transaction_mode": "IMMEDIATE",
+    }
+    return config
+
+
+def postgresql_config(environ):
+    config = {
+        "ENGINE": "django.db.backends.postgresql",
+        "NAME": environ.get("TASKFLOW_DB_NAME", "taskflow"),
+        "USER": environ.get("TASKFLOW_DB_USER", "taskflow"),
+        "PASSWORD": environ.get("TASKFLOW_DB_PASSWORD", ""),
+        "HOST": environ.get("TASKFLOW_DB_HOST", "localhost"),
+        "PORT": environ.get("TASKFLOW_DB_PORT", "5432"),
+        "CONN_MAX_AGE": _int(environ, "TASKFLOW_DB_CONN_MAX_AGE", 60),
+        "CONN_HEALTH_CHECKS": True,
+        "OPTIONS": {},
+    }
+    if _flag(environ, "TASKFLOW_DB_POOL"):
+        # pool psycopg (psycopg[pool]) : incompatible avec les connexions persistantes
+        config["CONN_MAX_AGE"] = 0
+        config["OPTIONS"]["pool"] = {
+            "min_size": _int(environ, "TASKFLOW_DB_POOL_MIN", 2),
+            "max_size": _int(environ, "TASKFLOW_DB_POOL_MAX", 10),
+            "timeout": _int(environ, "TASKFLOW_DB_POOL_TIMEOUT", 10),
+        }
+    return config
+
+
+def database_config(base_dir, environ=None):
+    """ Entrée DATABASES["default"] selon l'environnement """
+    environ = os.environ if environ is None else environ
+    if environ.get("TASKFLOW_DB_ENGINE", "sqlite") in ("postgresql", "postgres"):
+        return postgresql_config(environ)
+    return sqlite_config(environ, base_dir)
+
+
+def replica_configs(primary, environ=None):
+    """
+    {alias: config} des réplicas : même configuration que le primaire,
+    fichier (SQLite) ou hôte (PostgreSQL) remplacé. En test, miroir du primaire.
+    """
+    environ = os.environ if environ is None else environ
+    targets = [t.strip() for t in environ.get("TASKFLOW_DB_REPLICAS", "").split(",") if t.strip()]
+    key = "NAME" if primary["ENGINE"].endswith("sqlite3") else "HOST"
+    return {
+        f"replica_{i}": {**primary, key: target, "TEST": {"MIRROR": "default"}}
+        for i, target in enumerate(targets, start=1)
+    }
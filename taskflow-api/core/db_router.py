@@ -0,0 +1,67 @@
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import connections
+
+# ============================================================================ #
+# ROUTAGE LECTURE / ÉCRITURE (réplicas)
+# ============================================================================ #
+# Écritures -> "default". Lectures -> "default" par défaut : commandes, imports,
+# threads de fond lisent ce qu'ils viennent d'écrire. Seules les requêtes HTTP
+# de lecture passent sur un réplica au hasard (ReplicaPinningMiddleware), sauf :
+#   - client qui vient d'écrire (épinglé pendant REPLICA_PIN_SECONDS : il relit
+#     ses écritures)
+#   - transaction ouverte sur le primaire (lecture cohérente avec ses écritures)
+# Sans réplica configuré, tout va sur "default".
+
+PRIMARY = "default"
+_use_primary = ContextVar("taskflow_use_primary", default=True)
+
+
+def replica_aliases():
+    return [alias for alias in settings.DATABASES if alias.startswith("replica_")]
+
+
+@contextmanager
+def primary(enabled=True):
+    """ Force (ou non) les lectures sur le primaire dans ce bloc """
+    token = _use_primary.set(enabled)
+    try:
+        yield
+    finally:
+        _use_primary.reset(token)
+
+
+def reading_from_primary():
+    return _use_primary.get() or connections[PRIMARY].in_atomic_block
+
+
+def reading_from_replica():
+    """
+    Les lectures de ce contexte vont-elles sur un réplica (peut-être en retard) ?
+    Les caches partagés (réponses, graphes, validateurs) ne sont alors pas alimentés :
+    un client épinglé au primaire y relirait une donnée antérieure à sa propre écriture.
+    """
+    return bool(replica_aliases()) and not reading_from_primary()
+
+
+class ReplicaRouter:
+    def __init__(self):
+        self.replicas = replica_aliases()
+
+    def db_for_read(self, model, **hints):
+        if not self.replicas or reading_from_primary():
+            return PRIMARY
+        return random.choice(self.replicas)
+
+    def db_for_write(self, model, **hints):
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # primaire et réplicas contiennent les mêmes données
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == PRIMARY
@@ -0,0 +1,221 @@
+import glob
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+
+# ============================================================================ #
+# MÉTRIQUES HTTP (format d'exposition Prometheus)
+# ============================================================================ #
+# Par route (nom d'URL résolu) et méthode :
+#   - histogramme de latence à seaux fixes
+#   - compteurs par code de statut
+#   - nombre et durée cumulés des requêtes SQL
+# Chaque thread écrit dans son propre fragment (pas de verrou par requête) ;
+# la lecture additionne les fragments.
+# Mode multi-processus (METRICS_DIR) : chaque worker dépose périodiquement son
+# instantané dans le répertoire partagé, /metrics additionne tous les fichiers.
+# Un worker vivant réécrit le sien à chaque intervalle : un fichier plus vieux
+# que METRICS_SHARD_TTL vient d'un worker arrêté (ou recyclé) et est supprimé.
+# La date de modification sert plutôt que le pid, qui peut être réattribué ou
+# venir d'un autre hôte quand le répertoire est partagé.
+
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _new_shard():
+    return {
+        # (route, méthode) -> [compte par seau..., somme, total]
+        "latency": defaultdict(lambda: [0] * (len(BUCKETS) + 2)),
+        # (route, méthode, statut) -> nombre de réponses
+        "status": defaultdict(int),
+        # (route, méthode) -> [requêtes SQL, secondes SQL]
+        "db": defaultdict(lambda: [0, 0.0]),
+    }
+
+
+class Registry:
+    def __init__(self):
+        self._local = threading.local()
+        self._shards = []
+        self._lock = threading.Lock()       # seulement à la création d'un fragment
+
+    def _shard(self):
+        shard = getattr(self._local, "shard", None)
+        if shard is None:
+            shard = self._local.shard = _new_shard()
+            with self._lock:
+                self._shards.append(shard)
+        return shard
+
+    def observe(self, route, method, status, seconds, queries=0, query_seconds=0.0):
+        shard = self._shard()
+        hist = shard["latency"][(route, method)]
+        for i, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                hist[i] += 1
+                break
+        hist[-2] += seconds
+        hist[-1] += 1
+        shard["status"][(route, method, str(status))] += 1
+        db = shard["db"][(route, method)]
+        db[0] += queries
+        db[1] += query_seconds
+
+    def snapshot(self):
+        """ Fragments additionnés, clés sérialisables : {famille: [[clé..., valeurs]]} """
+        with self._lock:
+            shards = list(self._shards)
+        merged = _new_shard()
+        for shard in shards:
+            for family, series in shard.items():
+                for key, value in list(series.items()):
+                    _add(merged[family], key, value)
+        return {family: [[*key, value] for key, value in series.items()] for family, series in merged.items()}
+
+
+def _add(series, key, value):
+    if isinstance(value, list):
+        target = series[key]
+        for i, v in enumerate(value):
+            target[i] += v
+    else:
+        series[key] += value
+
+
+def merge(snapshots):
+    merged = _new_shard()
+    for snap in snapshots:
+        for family, rows in snap.items():
+            for row in rows:
+                _add(merged[family], tuple(row[:-1]), row[-1])
+    return merged
+
+
+registry = Registry()
+
+
+class QueryCounter:
+    """ execute_wrapper : nombre et durée des requêtes SQL d'une requête HTTP """
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.seconds += time.perf_counter() - start
+
+
+def route_of(request):
+    """ Nom d'URL résolu ("task-list", "task-kanban"…), "unmatched" pour un 404 de routage """
+    match = getattr(request, "resolver_match", None)
+    return match.view_name if match and match.view_name else "unmatched"
+
+
+# ----------------- Mode multi-processus -----------------
+_flusher = None
+_flusher_lock = threading.Lock()
+
+
+def metrics_dir():
+    return getattr(settings, "METRICS_DIR", None)
+
+
+def dump(directory=None):
+    """ Instantané du processus dans <dir>/metrics-<pid>.json (écriture atomique) """
+    directory = directory or metrics_dir()
+    if not directory:
+        return
+    path = os.path.join(directory, f"metrics-{os.getpid()}.json")
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(registry.snapshot(), f)
+    os.replace(tmp, path)
+
+
+def _flush_forever(interval):
+    while True:
+        time.sleep(interval)
+        dump()
+
+
+def ensure_flusher():
+    """ Thread de dépôt périodique, un par processus (démarré à la première requête) """
+    global _flusher
+    if not metrics_dir():
+        return
+    if _flusher is None or _flusher[0] != os.getpid():
+        with _flusher_lock:
+            if _flusher is None or _flusher[0] != os.getpid():
+                os.makedirs(metrics_dir(), exist_ok=True)
+                interval = getattr(settings, "METRICS_FLUSH_INTERVAL", 5)
+                threading.Thread(target=_flush_forever, args=(interval,), name="metrics-flush", daemon=True).start()
+                _flusher = (os.getpid(), interval)
+
+
+def collect():
+    """ Métriques de tous les workers (mode répertoire) ou du seul processus """
+    directory = metrics_dir()
+    if not directory:
+        return merge([registry.snapshot()])
+    os.makedirs(directory, exist_ok=True)
+    dump(directory)
+    expired = time.time() - getattr(settings, "METRICS_SHARD_TTL", 60)
+    snapshots = []
+    for path in glob.glob(os.path.join(directory, "metrics-*.json")):
+        try:
+            if os.path.getmtime(path) < expired:
+                os.remove(path)
+                continue
+            with open(path, encoding="utf-8") as f:
+                snapshots.append(json.load(f))
+        except (OSError, ValueError):
+            continue
+    return merge(snapshots)
+
+
+# ----------------- Exposition -----------------
+def _labels(**labels):
+    return "{" + ",".join(f'{k}="{str(v)}"' for k, v in labels.items()) + "}"
+
+
+def render(merged, extra=()):
+    """ Texte au format d'exposition Prometheus ; `extra` : [(nom, type, aide, valeur)] """
+    lines = [
+        "# HELP taskflow_http_request_duration_seconds Latence des requêtes HTTP.",
+        "# TYPE taskflow_http_request_duration_seconds histogram",
+    ]
+    for (route, method), hist in sorted(merged["latency"].items()):
+        cumulative = 0
+        for bound, count in zip(BUCKETS, hist):
+            cumulative += count
+            lines.append(f"taskflow_http_request_duration_seconds_bucket{_labels(route=route, method=method, le=bound)} {cumulative}")
+        lines.append(f"taskflow_http_request_duration_seconds_bucket{_labels(route=route, method=method, le='+Inf')} {hist[-1]}")
+        lines.append(f"taskflow_http_request_duration_seconds_sum{_labels(route=route, method=method)} {hist[-2]:.6f}")
+        lines.append(f"taskflow_http_request_duration_seconds_count{_labels(route=route, method=method)} {hist[-1]}")
+
+    lines += ["# HELP taskflow_http_responses_total Réponses HTTP par code de statut.",
+              "# TYPE taskflow_http_responses_total counter"]
+    for (route, method, status), count in sorted(merged["status"].items()):
+        lines.append(f"taskflow_http_responses_total{_labels(route=route, method=method, status=status)} {count}")
+
+    lines += ["# HELP taskflow_db_queries_total Requêtes SQL émises.",
+              "# TYPE taskflow_db_queries_total counter"]
+    for (route, method), (queries, _) in sorted(merged["db"].items()):
+        lines.append(f"taskflow_db_queries_total{_labels(route=route, method=method)} {queries}")
+    lines += ["# HELP taskflow_db_query_duration_seconds_total Temps passé en SQL.",
+              "# TYPE taskflow_db_query_duration_seconds_total counter"]
+    for (route, method), (_, seconds) in sorted(merged["db"].items()):
+        lines.append(f"taskflow_db_query_duration_seconds_total{_labels(route=route, method=method)} {seconds:.6f}")
+
+    for name, kind, help_text, value in extra:
+        lines += [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}", f"{name} {value}"]
+    return "\n".join(lines) + "\n"
@@ -1,22 +1,63 @@
-import logging
 import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
 
-logger = logging.getLogger('taskflow')
 from core.monitoring import log_kpi
+from core import db_router
+from core import metrics
 
 class PerformanceLoggingMiddleware:
     def __init__(self, get_response):  
         self.get_response = get_response 
 
     def __call__(self, request):  
-        request.start_time = time.time() 
-        response = self.get_response(request)
-        duration = time.time() - request.start_time
+        metrics.ensure_flusher()
+        queries = metrics.QueryCounter()
+        request.start_time = time.perf_counter()
+        with ExitStack() as stack:
+            for alias in connections:
+                stack.enter_context(connections[alias].execute_wrapper(queries))
+            response = self.get_response(request)
+        duration = time.perf_counter() - request.start_time
         response['X-Process-Time'] = f"{duration:.3f}s"
-        logger.info(f"X-Process-Time: {duration:.3f}s")  
+        metrics.registry.observe(
+            metrics.route_of(request), request.method, response.status_code, duration, queries.count, queries.seconds,
+        )
+        # dépôt dans la file KPI uniquement : l'écriture disque se fait hors requête
+        log_kpi(request, response, duration)
+        return response
+
+
+# ---------------------------
+# Réplicas : lecture de ses propres écritures
+# ---------------------------
+PIN_COOKIE = 'taskflow_primary_until'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+class ReplicaPinningMiddleware:
+    """
+    Requêtes de lecture : lectures sur les réplicas (hors requête HTTP, tout reste
+    sur le primaire). Requêtes d'écriture : lectures sur le primaire, puis cookie
+    qui y épingle le client pendant REPLICA_PIN_SECONDS (le temps que les réplicas rattrapent).
+    """
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def _pinned(self, request):
+        if request.method not in SAFE_METHODS:
+            return True
+        try:
+            return float(request.COOKIES.get(PIN_COOKIE, 0)) > time.time()
+        except ValueError:
+            return False
+
+    def __call__(self, request):
+        with db_router.primary(self._pinned(request)):
+            response = self.get_response(request)
+        if request.method not in SAFE_METHODS and response.status_code < 400:
+            seconds = getattr(settings, 'REPLICA_PIN_SECONDS', 10)
+            response.set_cookie(PIN_COOKIE, str(time.time() + seconds), max_age=seconds, httponly=True, samesite='Lax')
         return response
-    def process_response(self, request, response):
-        duration = time.time() - getattr(request, 'start_time', time.time())
-        response['X-Process-Time'] = f"{duration:.3f}s"
-        log_kpi(request, response)
-        return response
\ No newline at end of file
@@ -1,7 +1,197 @@
-def log_kpi(request, response):
-    method = request.method
-    endpoint = request.path
-    status_code = response.status_code
-    duration = response.get('X-Process-Time', '0s')
-    with open('kpi_logs.log', 'a') as f:
-        f.write(f"{method} {endpoint} {status_code} {duration}\n")
\ No newline at end of file
+import atexit
+import json
+import logging
+import os
+import queue
+import threading
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler
+
+from django.conf import settings
+
+# ============================================================================ #
+# PIPELINE KPI ASYNCHRONE
+# ============================================================================ #
+# La requête ne fait que déposer un enregistrement dans une file bornée
+# (BoundedQueueHandler, pas d'E/S disque) ; un thread (BatchListener) la vide
+# par lots et écrit des lignes JSON en une seule écriture par lot.
+# File pleine, selon KPI_LOG["policy"] :
+#   "drop"        : l'enregistrement est abandonné (compté dans `dropped`)
+#   "drop_oldest" : le plus ancien est abandonné pour faire place
+#   "block"       : la requête attend au plus `block_timeout` s (contre-pression)
+
+DEFAULTS = {
+    "path": "kpi.jsonl",
+    "queue_size": 10000,
+    "batch_size": 500,
+    "flush_interval": 1.0,      # secondes max avant écriture d'un lot incomplet
+    "policy": "drop",
+    "block_timeout": 0.05,
+}
+
+logger = logging.getLogger("taskflow.kpi")
+
+
+class JsonFormatter(logging.Formatter):
+    """ Une ligne JSON : horodatage, niveau, message + champs de `record.kpi` """
+
+    def format(self, record):
+        data = {
+            "ts": datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "msg": record.getMessage(),
+            **getattr(record, "kpi", {}),
+        }
+        return json.dumps(data, ensure_ascii=False, default=str)
+
+
+class BoundedQueueHandler(QueueHandler):
+    """ QueueHandler sur file bornée, avec politique de débordement """
+
+    def __init__(self, log_queue, policy="drop", block_timeout=0.05):
+        super().__init__(log_queue)
+        self.policy = policy
+        self.block_timeout = block_timeout
+        self.dropped = 0
+
+    def prepare(self, record):
+        # le thread d'écriture formate ; ici on fige seulement le message
+        record.msg = record.getMessage()
+        record.args = None
+        record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            if self.policy == "block":
+                self.queue.put(record, timeout=self.block_timeout)
+                return
+            if self.policy == "drop_oldest":
+                while True:
+                    try:
+                        self.queue.put_nowait(record)
+                        return
+                    except queue.Full:
+                        try:
+                            self.queue.get_nowait()
+                            self.dropped += 1
+                        except queue.Empty:
+                            pass
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class BatchListener:
+    """ Équivalent de QueueListener qui écrit par lots dans un fichier """
+
+    _sentinel = None
+
+    def __init__(self, log_queue, path, formatter, batch_size=500, flush_interval=1.0):
+        self.queue = log_queue
+        self.path = path
+        self.formatter = formatter
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.written = 0
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._monitor, name="kpi-writer", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """ Vide la file puis arrête le thread """
+        if self._thread is not None:
+            self.queue.put(self._sentinel)
+            self._thread.join()
+            self._thread = None
+
+    def _next_batch(self):
+        """ (lot, arrêt demandé) : attend le premier enregistrement, puis prend ce qui est déjà là """
+        try:
+            first = self.queue.get(timeout=self.flush_interval)
+        except queue.Empty:
+            return [], False
+        if first is self._sentinel:
+            return [], True
+        batch = [first]
+        while len(batch) < self.batch_size:
+            try:
+                record = self.queue.get_nowait()
+            except queue.Empty:
+                break
+            if record is self._sentinel:
+                return batch, True
+            batch.append(record)
+        return batch, False
+
+    def _monitor(self):
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as f:
+            stopping = False
+            while not stopping:
+                batch, stopping = self._next_batch()
+                if batch:
+                    f.write("".join(self.formatter.format(r) + "\n" for r in batch))
+                    f.flush()
+                    self.written += len(batch)
+
+
+class KpiPipeline:
+    """ File + handler + thread d'écriture, démarrés dans chaque processus (workers gunicorn) """
+
+    def __init__(self, **options):
+        options = {**DEFAULTS, **options}
+        self.queue = queue.Queue(maxsize=options["queue_size"])
+        self.handler = BoundedQueueHandler(self.queue, options["policy"], options["block_timeout"])
+        self.listener = BatchListener(
+            self.queue, str(options["path"]), JsonFormatter(), options["batch_size"], options["flush_interval"],
+        )
+        self.pid = os.getpid()
+
+    def start(self):
+        self.listener.start()
+        return self
+
+    def stop(self):
+        self.listener.stop()
+
+    def stats(self):
+        return {"queued": self.queue.qsize(), "dropped": self.handler.dropped, "written": self.listener.written}
+
+
+_pipeline = None
+_lock = threading.Lock()
+
+
+def get_pipeline():
+    """ Pipeline du processus courant (recréé après un fork : les threads n'y survivent pas) """
+    global _pipeline
+    if _pipeline is None or _pipeline.pid != os.getpid():
+        with _lock:
+            if _pipeline is None or _pipeline.pid != os.getpid():
+                pipeline = KpiPipeline(**getattr(settings, "KPI_LOG", {})).start()
+                logger.handlers = [pipeline.handler]
+                logger.propagate = False
+                logger.setLevel(logging.INFO)
+                atexit.register(pipeline.stop)
+                _pipeline = pipeline
+    return _pipeline
+
+
+def log_record(message, **fields):
+    """ Ligne JSON `message` + `fields` dans le journal KPI (non bloquant) """
+    get_pipeline()
+    logger.info(message, extra={"kpi": {**fields, "pid": os.getpid()}})
+
+
+def log_kpi(request, response, duration):
+    """ Enregistrement KPI d'une requête """
+    log_record(
+        "request",
+        method=request.method,
+        path=request.path,
+        status=response.status_code,
+        duration_ms=round(duration * 1000, 2),
+    )
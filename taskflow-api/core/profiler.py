@@ -0,0 +1,122 @@
+import random
+import time
+from collections import defaultdict
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+from core.monitoring import log_record
+from tasks.query_plan import fingerprint
+
+# ============================================================================ #
+# PROFILAGE SQL PAR REQUÊTE (détection N+1)
+# ============================================================================ #
+# Toutes les requêtes SQL d'une requête HTTP sont capturées (execute_wrapper,
+# sans DEBUG), regroupées par forme (littéraux retirés). Une même forme de
+# SELECT répétée au moins `n_plus_one_threshold` fois = suspicion de N+1.
+# Échantillonné (`sample_rate`) : utilisable sur une fraction du trafic réel.
+
+DEFAULTS = {
+    "enabled": False,
+    "sample_rate": 1.0,
+    "n_plus_one_threshold": 5,
+}
+HEADER = "X-Query-Profile"
+
+
+class QueryRecorder:
+    """ execute_wrapper : (sql, secondes) de chaque requête exécutée """
+
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append((sql, time.perf_counter() - start))
+
+
+class QueryProfile:
+    def __init__(self, queries, threshold=DEFAULTS["n_plus_one_threshold"]):
+        self.queries = queries
+        self.threshold = threshold
+
+    @property
+    def count(self):
+        return len(self.queries)
+
+    @property
+    def seconds(self):
+        return sum(seconds for _, seconds in self.queries)
+
+    def shapes(self):
+        """ {forme: [nombre, secondes, exemple]} """
+        shapes = defaultdict(lambda: [0, 0.0, None])
+        for sql, seconds in self.queries:
+            shape = shapes[fingerprint(sql)]
+            shape[0] += 1
+            shape[1] += seconds
+            shape[2] = shape[2] or sql
+        return shapes
+
+    def n_plus_one(self):
+        """ Formes de SELECT répétées au-delà du seuil, les plus fréquentes d'abord """
+        return sorted(
+            (
+                {"shape": shape, "count": count, "ms": round(seconds * 1000, 2), "example": example}
+                for shape, (count, seconds, example) in self.shapes().items()
+                if count >= self.threshold and shape.lstrip().upper().startswith("SELECT")
+            ),
+            key=lambda s: -s["count"],
+        )
+
+    def summary(self):
+        return f"queries={self.count}; time_ms={self.seconds * 1000:.1f}; n_plus_one={len(self.n_plus_one())}"
+
+
+@contextmanager
+def capture_queries(threshold=DEFAULTS["n_plus_one_threshold"]):
+    """ with capture_queries() as profile : requêtes de toutes les connexions dans le bloc """
+    recorder = QueryRecorder()
+    profile = QueryProfile(recorder.queries, threshold)
+    with ExitStack() as stack:
+        for alias in connections:
+            stack.enter_context(connections[alias].execute_wrapper(recorder))
+        yield profile
+
+
+def options():
+    return {**DEFAULTS, **getattr(settings, "QUERY_PROFILER", {})}
+
+
+class QueryProfilingMiddleware:
+    """
+    Opt-in (QUERY_PROFILER["enabled"]) : en-tête X-Query-Profile sur les requêtes
+    échantillonnées, et ligne JSON "sql_profile" dans le journal KPI avec les N+1.
+    """
+    def __init__(self, get_response):
+        self.options = options()
+        if not self.options["enabled"]:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if random.random() >= self.options["sample_rate"]:
+            return self.get_response(request)
+        with capture_queries(self.options["n_plus_one_threshold"]) as profile:
+            response = self.get_response(request)
+        response[HEADER] = profile.summary()
+        suspects = profile.n_plus_one()
+        log_record(
+            "sql_profile",
+            method=request.method,
+            path=request.path,
+            queries=profile.count,
+            sql_ms=round(profile.seconds * 1000, 2),
+            n_plus_one=[{k: s[k] for k in ("shape", "count", "ms")} for s in suspects],
+        )
+        return response
@@ -12,6 +12,8 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 import os
 from pathlib import Path
 
+from core.database import database_config, replica_configs
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -104,8 +106,33 @@ LOGGING = {
 }
 
 
+# Journal KPI par requête (core.monitoring) : file bornée vidée par un thread, lignes JSON
+KPI_LOG = {
+    'path': os.environ.get('TASKFLOW_KPI_LOG', str(BASE_DIR / 'logs' / 'kpi.jsonl')),
+    'queue_size': 10000,
+    'batch_size': 500,
+    'flush_interval': 1.0,
+    'policy': os.environ.get('TASKFLOW_KPI_POLICY', 'drop'),   # drop | drop_oldest | block
+}
+
+
+# Métriques /metrics (core.metrics) : TASKFLOW_METRICS_DIR = répertoire partagé entre workers gunicorn
+METRICS_DIR = os.environ.get('TASKFLOW_METRICS_DIR') or None
+METRICS_FLUSH_INTERVAL = 5      # secondes entre deux dépôts d'instantané par worker
+METRICS_SHARD_TTL = 60          # instantané non réécrit depuis : worker arrêté, fichier supprimé
+
+
+# Profilage SQL par requête (core.profiler) : opt-in, échantillonné
+QUERY_PROFILER = {
+    'enabled': os.environ.get('TASKFLOW_QUERY_PROFILER', '0') == '1',
+    'sample_rate': float(os.environ.get('TASKFLOW_QUERY_PROFILER_SAMPLE', '1.0')),
+    'n_plus_one_threshold': 5,
+}
+
+
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'core.middleware.ReplicaPinningMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -113,6 +140,7 @@ MIDDLEWARE = [
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'core.middleware.PerformanceLoggingMiddleware', 
+    'core.profiler.QueryProfilingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -153,13 +181,15 @@ WSGI_APPLICATION = 'core.wsgi.application'
 
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
+# Choix du moteur et réglages par variables d'environnement : voir core/database.py
 
 DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
-    }
+    'default': database_config(BASE_DIR),
 }
+DATABASES.update(replica_configs(DATABASES['default']))
+# lectures vers les réplicas, écritures (et lectures juste après une écriture) vers le primaire
+DATABASE_ROUTERS = ['core.db_router.ReplicaRouter']
+REPLICA_PIN_SECONDS = 10
 
 
 # Password validation
@@ -205,4 +235,32 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': ['rest_framework.permissions.AllowAny']
-}
\ No newline at end of file
+}
+
+# Graphe de dépendances (tasks.graph) : instantanés mis en cache par projet,
+# seulement si GRAPH_CACHE_ALIAS est partagé entre workers (TASKFLOW_CACHE_DIR)
+GRAPH_CACHE_ALIAS = 'responses'
+GRAPH_CACHE_TIMEOUT = 3600          # secondes
+GRAPH_CLOSURE_MAX_NODES = 5000      # au-delà : pas de fermeture transitive précalculée
+
+# Synchro incrémentale (tasks.sync) : le jeton final reste ce délai en arrière,
+# pour ne pas sauter une transaction validée après l'appel avec un updated_at antérieur
+SYNC_SAFETY_LAG = 5                 # secondes
+
+# Import en masse (tasks.importer) : bail d'un exécutant, renouvelé à chaque lot ;
+# passé ce délai sans nouvelle, l'import peut être repris par un autre
+IMPORT_LEASE_SECONDS = 300
+
+# Cache des réponses kanban / gantt (tasks.response_cache)
+# TASKFLOW_CACHE_DIR défini : cache fichier partagé entre workers ; sinon mémoire
+# locale, et le cache des réponses n'est pas utilisé (chaque worker aurait sa copie)
+CACHES = {
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+    'responses': (
+        {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': os.environ['TASKFLOW_CACHE_DIR']}
+        if os.environ.get('TASKFLOW_CACHE_DIR')
+        else {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'taskflow-responses'}
+    ),
+}
+RESPONSE_CACHE_ALIAS = 'responses'
+RESPONSE_CACHE_TIMEOUT = 60         # secondes
@@ -0,0 +1,26 @@
+from core.profiler import capture_queries
+
+# ============================================================================ #
+# AIDE DE TEST : budget de requêtes SQL par endpoint
+# ============================================================================ #
+
+
+def assert_endpoint_queries(client, url, max_queries, method="get", allow_n_plus_one=False, threshold=5, **kwargs):
+    """
+    Appelle `url` avec le client de test et échoue si la requête dépasse
+    `max_queries` requêtes SQL ou contient un N+1 (même forme >= `threshold` fois).
+    Renvoie la réponse. Le message d'échec liste les formes de requête.
+    """
+    with capture_queries(threshold) as profile:
+        response = getattr(client, method)(url, **kwargs)
+
+    problems = []
+    if profile.count > max_queries:
+        problems.append(f"{method.upper()} {url} : {profile.count} requêtes SQL (max {max_queries})")
+    suspects = profile.n_plus_one()
+    if suspects and not allow_n_plus_one:
+        problems += [f"N+1 : {s['count']} x {s['shape'][:200]}" for s in suspects]
+    if problems:
+        shapes = "\n".join(f"  {count:>4} x {shape[:160]}" for shape, (count, _, _) in profile.shapes().items())
+        raise AssertionError("\n".join(problems) + "\nRequêtes :\n" + shapes)
+    return response
@@ -1,10 +1,11 @@
 from django.contrib import admin
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from tasks.views import TaskViewSet, NeedViewSet
+from tasks.views import TaskViewSet, NeedViewSet, ProjectViewSet
 from rest_framework import permissions
 from drf_yasg.views import get_schema_view
 from drf_yasg import openapi
+from core.views import metrics_view
 
 
 
@@ -12,6 +13,7 @@ from drf_yasg import openapi
 router = DefaultRouter()
 router.register(r'tasks', TaskViewSet, basename='task')
 router.register(r'needs', NeedViewSet, basename='need')
+router.register(r'projects', ProjectViewSet, basename='project')
 
 # -------------------- SWAGGER / REDOC --------------------
 schema_view = get_schema_view(
@@ -36,4 +38,7 @@ urlpatterns = [
     path('swagger/', schema_view.with_ui('swagger', cache_timeout=0), name='schema-swagger-ui'),
     path('redoc/', schema_view.with_ui('redoc', cache_timeout=0), name='schema-redoc'),
 
+    # Métriques Prometheus
+    path('metrics', metrics_view, name='metrics'),
+
 ]
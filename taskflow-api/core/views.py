@@ -0,0 +1,18 @@
+from django.http import HttpResponse
+
+from core import metrics
+from core.monitoring import get_pipeline
+from tasks import graph
+
+
+def metrics_view(request):
+    """ Métriques au format d'exposition Prometheus (text/plain; version=0.0.4) """
+    graph_stats = graph.cache_stats()
+    kpi = get_pipeline().stats()
+    extra = [
+        ("taskflow_graph_cache_hits_total", "counter", "Instantanés de graphe servis depuis le cache.", graph_stats["hit"]),
+        ("taskflow_graph_cache_misses_total", "counter", "Instantanés de graphe reconstruits.", graph_stats["miss"]),
+        ("taskflow_kpi_dropped_total", "counter", "Enregistrements KPI abandonnés (file pleine, ce processus).", kpi["dropped"]),
+    ]
+    body = metrics.render(metrics.collect(), extra)
+    return HttpResponse(body, content_type="text/plain; version=0.0.4; charset=utf-8")
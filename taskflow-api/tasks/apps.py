@@ -1,6 +1,22 @@
 from django.apps import AppConfig
+from django.db import connections
+from django.db.models.signals import post_migrate
 
 
 class TasksConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'tasks'
+
+    def ready(self):
+        from . import signals  # noqa: F401
+
+        post_migrate.connect(restore_search_triggers, sender=self)
+
+
+def restore_search_triggers(using, **kwargs):
+    """ Triggers FTS supprimés par la reconstruction SQLite d'une table (AlterField…) """
+    if connections[using].vendor != 'sqlite':
+        return
+    from .search import Fts5Backend
+
+    Fts5Backend().ensure_triggers(using)
@@ -0,0 +1,169 @@
+import gc
+import json
+import platform
+import statistics
+import subprocess
+import time
+import tracemalloc
+
+import django
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import Client
+from django.test.utils import override_settings
+from django.utils import timezone
+
+from core.profiler import capture_queries
+from .models import Task, TaskLink, Need, NeedTrace, Project
+from . import datagen
+
+# ============================================================================ #
+# BENCHMARKS DES ENDPOINTS
+# ============================================================================ #
+# Jeu de données généré en masse (datagen), puis chaque scénario est appelé
+# via le client de test Django :
+#   latence  : `repeat` appels chronométrés après un appel de chauffe
+#   requêtes : nombre de requêtes SQL d'un appel
+#   mémoire  : pic d'allocation Python (tracemalloc) d'un appel non chronométré
+# Le rapport JSON (un objet par scénario) se compare d'un commit à l'autre.
+
+# options de datagen.generate ; chaînes (fan_out=1) pour mesurer les sous-arbres profonds
+SCALES = {
+    "tiny": {"users": 50, "projects": 2, "tasks_per_project": 200, "depth": 9, "fan_out": 1,
+             "links_per_task": 2, "attachments_per_task": 0, "needs": 50, "traces_per_need": 2},
+    "small": {"users": 50, "projects": 20, "tasks_per_project": 500, "depth": 49, "fan_out": 1,
+              "links_per_task": 2, "attachments_per_task": 0.2, "needs": 2_000, "traces_per_need": 2},
+    "medium": {"users": 200, "projects": 200, "tasks_per_project": 500, "depth": 99, "fan_out": 1,
+               "links_per_task": 2, "attachments_per_task": 0.2, "needs": 20_000, "traces_per_need": 2},
+    "large": {"users": 1_000, "projects": 1_000, "tasks_per_project": 500, "depth": 99, "fan_out": 1,
+              "links_per_task": 2, "attachments_per_task": 0.2, "needs": 100_000, "traces_per_need": 2},
+}
+
+
+# ----------------- Jeu de données -----------------
+def seed(scale="small", seed_value=42):
+    """ Jeu de données de l'échelle `scale` (voir datagen) ; renvoie les volumes insérés """
+    return datagen.generate(seed=seed_value, prefix="bench", **SCALES[scale])
+
+
+def dataset_counts():
+    return {
+        "projects": Project.objects.count(),
+        "tasks": Task.objects.count(),
+        "links": TaskLink.objects.count(),
+        "needs": Need.objects.count(),
+        "traces": NeedTrace.objects.count(),
+    }
+
+
+# ----------------- Mesure -----------------
+def measure(call, repeat=5, warmup=1):
+    """ Statistiques d'un scénario (à la pytest-benchmark) : latences, requêtes SQL, pic mémoire """
+    for _ in range(warmup):
+        call()
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        response = call()
+        timings.append((time.perf_counter() - started) * 1000)
+
+    with capture_queries() as profile:
+        call()
+    gc.collect()
+    tracemalloc.start()
+    try:
+        call()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    timings.sort()
+    return {
+        "status": response.status_code,
+        "min_ms": round(timings[0], 2),
+        "median_ms": round(statistics.median(timings), 2),
+        "p95_ms": round(timings[min(len(timings) - 1, int(len(timings) * 0.95))], 2),
+        "max_ms": round(timings[-1], 2),
+        "queries": profile.count,
+        "n_plus_one": len(profile.n_plus_one()),
+        "peak_kb": round(peak / 1024, 1),
+    }
+
+
+def scenarios():
+    """ {nom: appel} sur les données présentes (projet le plus peuplé, chaîne la plus profonde…) """
+    client = Client(SERVER_NAME="localhost")
+    admin = User.objects.filter(is_superuser=True).first() or User.objects.create_superuser("bench-admin", password=None)
+    admin_client = Client(SERVER_NAME="localhost")
+    admin_client.force_login(admin)
+
+    project = Project.objects.order_by("-tasks_total").first()
+    root = Task.objects.filter(project=project, parent__isnull=True).order_by("id").first()
+    need = Need.objects.order_by("id").first()
+    toggle = {"status": need.status}
+
+    def need_update():
+        toggle["status"] = "En cours" if toggle["status"] != "En cours" else "Nouveau"
+        return client.patch(f"/api/needs/{need.id}/", {"status": toggle["status"]}, content_type="application/json")
+
+    rows = [{"title": f"Bench {i}", "status": "À faire", "project": project.id} for i in range(500)]
+    return {
+        "task_list": lambda: client.get("/api/tasks/?page_size=50"),
+        "task_list_filtered": lambda: client.get(f"/api/tasks/?project={project.id}&status=À faire&page_size=50"),
+        "task_retrieve": lambda: client.get(f"/api/tasks/{root.id}/"),
+        "kanban": lambda: client.get(f"/api/tasks/kanban/?project={project.id}"),
+        "gantt": lambda: client.get(f"/api/tasks/gantt/?project={project.id}"),
+        "search": lambda: client.get("/api/tasks/search/?q=rapp"),
+        "bulk_create": lambda: client.post("/api/tasks/", {"tasks": rows}, content_type="application/json"),
+        "need_update": need_update,
+        "admin_dashboard": lambda: admin_client.get("/admin/"),
+    }
+
+
+def _commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=5).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def run(names=None, repeat=5, warmup=1, progress=None):
+    """ Rapport complet ; cache de réponses désactivé pour mesurer le calcul réel """
+    with override_settings(ALLOWED_HOSTS=["localhost"], RESPONSE_CACHE_TIMEOUT=0):
+        calls = scenarios()
+        results = {}
+        for name, call in calls.items():
+            if names and name not in names:
+                continue
+            results[name] = measure(call, repeat, warmup)
+            if progress:
+                progress(name, results[name])
+    return {
+        "meta": {
+            "commit": _commit(),
+            "created": timezone.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "django": django.get_version(),
+            "database": connection.vendor,
+            "repeat": repeat,
+            "dataset": dataset_counts(),
+        },
+        "results": results,
+    }
+
+
+def compare(report, previous):
+    """ [(scénario, médiane avant, après, écart %, requêtes avant, après)] """
+    rows = []
+    for name, result in report["results"].items():
+        before = previous.get("results", {}).get(name)
+        if not before:
+            continue
+        delta = (result["median_ms"] - before["median_ms"]) / before["median_ms"] * 100 if before["median_ms"] else 0.0
+        rows.append((name, before["median_ms"], result["median_ms"], round(delta, 1), before["queries"], result["queries"]))
+    return rows
+
+
+def write(report, path):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
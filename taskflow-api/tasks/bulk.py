@@ -0,0 +1,128 @@
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models.functions import Length
+from django.utils import timezone
+
+from .models import Task, Project, PATH_STEP, fits_in_path, path_segment
+from . import counters
+from . import graph
+from . import response_cache
+
+# ============================================================================ #
+# OPÉRATIONS EN MASSE SUR LES TÂCHES
+# ============================================================================ #
+# Les lignes arrivent déjà validées champ par champ (TaskBulkItemSerializer) ;
+# les références sont contrôlées par lot (1 requête par modèle référencé) puis
+# les tâches sont insérées par bulk_create dans une seule transaction.
+
+BULK_BATCH_SIZE = 500
+
+# champ de la ligne -> modèle référencé
+REFERENCE_MODELS = {
+    "owner": User,
+    "reporter": User,
+    "project": Project,
+    "parent": Task,
+}
+
+
+def existing_ids(model, ids, batch_size=BULK_BATCH_SIZE):
+    """ Sous-ensemble de `ids` présent en base (requêtes par lots) """
+    ids = list(ids)
+    found = set()
+    for i in range(0, len(ids), batch_size):
+        found.update(model.objects.filter(pk__in=ids[i:i + batch_size]).values_list("pk", flat=True))
+    return found
+
+
+def check_references(rows):
+    """
+    Vérifie que tous les ids référencés existent.
+    Renvoie {index de ligne: {champ: message}} (vide si tout est valide).
+    """
+    wanted = {}
+    for field, model in REFERENCE_MODELS.items():
+        ids = {row[field] for row in rows if row.get(field) is not None}
+        wanted.setdefault(model, set()).update(ids)
+    existing = {model: existing_ids(model, ids) for model, ids in wanted.items()}
+
+    errors = {}
+    for index, row in enumerate(rows):
+        for field, model in REFERENCE_MODELS.items():
+            value = row.get(field)
+            if value is not None and value not in existing[model]:
+                errors.setdefault(index, {})[field] = f"{model.__name__} {value} introuvable."
+
+    # profondeur : le path de la nouvelle tâche (path du parent + son segment) doit tenir
+    parents = {row["parent"] for row in rows if row.get("parent") is not None}
+    too_deep = {
+        task_id for task_id, length in
+        Task.objects.filter(pk__in=parents).annotate(length=Length("path")).values_list("id", "length")
+        if not fits_in_path(length + PATH_STEP)
+    } if parents else set()
+    for index, row in enumerate(rows):
+        if row.get("parent") in too_deep:
+            errors.setdefault(index, {})["parent"] = "Hiérarchie trop profonde."
+    return errors
+
+
+def task_from_row(row):
+    """ Task non enregistrée depuis une ligne validée (références = ids) """
+    return Task(**{f"{name}_id" if name in REFERENCE_MODELS else name: value for name, value in row.items()})
+
+
+def bulk_create_tasks(rows, batch_size=BULK_BATCH_SIZE):
+    """ Insère les lignes validées ; renvoie les tâches créées (pk renseignés) """
+    tasks = [task_from_row(row) for row in rows]
+    # bulk_create ne passe pas par Task.save : path calculé ici depuis les parents
+    parent_ids = {t.parent_id for t in tasks if t.parent_id}
+    parent_paths = dict(Task.objects.filter(pk__in=parent_ids).values_list("id", "path")) if parent_ids else {}
+    for task in tasks:
+        if task.parent_id:
+            task.path = parent_paths[task.parent_id] + path_segment(task.parent_id)
+    with transaction.atomic():
+        created = Task.objects.bulk_create(tasks, batch_size=batch_size)
+        # bulk_create ne déclenche pas les signaux : compteurs recalculés pour les projets touchés
+        counters.rebuild({t.project_id for t in created if t.project_id})
+    graph.invalidate({t.project_id for t in created})
+    response_cache.invalidate({t.project_id for t in created})
+    return created
+
+
+def bulk_update_tasks(updates, batch_size=BULK_BATCH_SIZE):
+    """
+    Applique {task_id: {champ: valeur}} (lignes déjà validées).
+    Un seul jeu de modifications : QuerySet.update ; sinon bulk_update.
+    Renvoie {task_id: "updated" | "not_found"}.
+    """
+    # QuerySet.update / bulk_update ne passent pas par save() : updated_at posé à la main
+    now = timezone.now()
+    changes_by_id = {
+        task_id: {f"{name}_id" if name in REFERENCE_MODELS else name: value for name, value in changes.items()}
+        for task_id, changes in updates.items()
+    }
+    fields = sorted({name for changes in changes_by_id.values() for name in changes})
+
+    with transaction.atomic():
+        old = dict(Task.objects.filter(pk__in=list(changes_by_id)).values_list("id", "project_id"))
+        distinct = {tuple(sorted(changes.items())) for task_id, changes in changes_by_id.items() if task_id in old}
+
+        if len(distinct) == 1:
+            Task.objects.filter(pk__in=list(old)).update(**dict(distinct.pop()), updated_at=now)
+        elif distinct:
+            tasks = list(Task.objects.filter(pk__in=list(old)).only("id", *fields))
+            for task in tasks:
+                for name, value in changes_by_id[task.id].items():
+                    setattr(task, name, value)
+                task.updated_at = now
+            Task.objects.bulk_update(tasks, [*fields, "updated_at"], batch_size=batch_size)
+
+        if {"status", "project_id"} & set(fields):
+            touched = set(old.values())
+            touched.update(c["project_id"] for c in changes_by_id.values() if "project_id" in c)
+            counters.rebuild(touched)
+        if "project_id" in fields:
+            graph.invalidate(touched)
+        response_cache.invalidate(set(old.values()) | {c["project_id"] for c in changes_by_id.values() if "project_id" in c})
+
+    return {task_id: "updated" if task_id in old else "not_found" for task_id in changes_by_id}
@@ -0,0 +1,83 @@
+import hashlib
+
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+from core import db_router
+
+from .models import Task, TaskLink, Attachment, TaskTombstone
+from . import response_cache
+
+# ============================================================================ #
+# REQUÊTES CONDITIONNELLES (ETag / Last-Modified)
+# ============================================================================ #
+# Les validateurs viennent d'agrégats (COUNT, MAX(updated_at)) sur le queryset
+# de la réponse et sur les pierres tombales, sans sérialiser : si le client a
+# déjà la bonne version, la réponse est un 304 vide après quelques agrégats.
+# Toute écriture, quel que soit le processus (autre worker, admin, commande),
+# change ces agrégats.
+# Cache des réponses partagé entre processus (response_cache.is_shared) : les
+# versions qu'il tient sont incrémentées par toutes les écritures, d'où qu'elles
+# viennent ; elles servent alors de validateurs sans requête SQL. Lecture sur un
+# réplica : agrégats, calculés sur les mêmes données que le corps (la version
+# compte peut-être déjà une écriture que le réplica n'a pas encore reçue).
+
+
+def queryset_state(queryset, field="updated_at"):
+    """ (nombre de lignes, dernière modification) du queryset """
+    state = queryset.order_by().aggregate(rows=Count("pk"), last=Max(field))
+    return state["rows"], state["last"]
+
+
+def nested_state():
+    """ Version globale des données imbriquées hors tâches (liens, pièces jointes) """
+    return queryset_state(TaskLink.objects.all(), "id"), queryset_state(Attachment.objects.all(), "id")
+
+
+def deletions_since(project_id=None):
+    """ Dernière suppression de tâche (les suppressions ne laissent pas d'updated_at) """
+    tombstones = TaskTombstone.objects.all()
+    if project_id is not None:
+        tombstones = tombstones.filter(project_id=project_id)
+    return tombstones.aggregate(last=Max("deleted_at"))["last"]
+
+
+def data_state(queryset, project_id=None, nested=False):
+    """
+    (parties de l'ETag, dernière modification) calculées sur les données.
+    `nested` : la réponse imbrique sous-tâches, liens et pièces jointes ; l'état
+    de toutes les tâches remplace alors celui du queryset (il le couvre).
+    """
+    if nested:
+        queryset = Task.objects.all()
+    rows, last_modified = queryset_state(queryset)
+    deleted = deletions_since(project_id)
+    if deleted and (last_modified is None or deleted > last_modified):
+        last_modified = deleted
+    extra = nested_state() if nested else None
+    timestamp = int(last_modified.timestamp()) if last_modified else None
+    return (rows, last_modified, deleted, extra), timestamp
+
+
+def respond(request, queryset, build_response, project_id=None, nested=False):
+    """
+    Renvoie 304 si ETag / Last-Modified du client sont à jour, sinon
+    `build_response()` complétée par les en-têtes de validation.
+    """
+    if response_cache.is_shared() and not db_router.reading_from_replica():
+        version, modified = response_cache.state(project_id)
+        parts, timestamp = (version,), int(modified)
+    else:
+        parts, timestamp = data_state(queryset, project_id, nested)
+
+    raw = "|".join(str(part) for part in (request.get_full_path(), *parts))
+    etag = quote_etag(hashlib.md5(raw.encode()).hexdigest())
+
+    response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+    if response is None:
+        response = build_response()
+    response["ETag"] = etag
+    if timestamp is not None:
+        response["Last-Modified"] = http_date(timestamp)
+    return response
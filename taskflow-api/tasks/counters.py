@@ -0,0 +1,99 @@
+from collections import defaultdict
+
+from django.db.models import Count, F
+
+# ============================================================================ #
+# COMPTEURS DE TÂCHES PAR PROJET
+# ============================================================================ #
+# Project.tasks_* est maintenu de façon incrémentale :
+#   - save/delete unitaires : signaux (tasks.signals),
+#   - chemins de masse (bulk_create, QuerySet.update) : appel explicite à
+#     rebuild() sur les projets touchés.
+
+# Statut -> champ compteur sur Project
+STATUS_COUNTER_FIELDS = {
+    "À faire": "tasks_todo",
+    "En cours": "tasks_in_progress",
+    "Fait": "tasks_done",
+    "Nouveau": "tasks_new",
+}
+COUNTER_FIELDS = ["tasks_total", *STATUS_COUNTER_FIELDS.values()]
+
+
+STATE_FIELDS = ("project_id", "status")
+
+
+def counter_state(task, fallback=(None, None)):
+    """
+    (project_id, status) tel que chargé, sans déclencher de requête sur un champ
+    différé ; un champ absent prend la valeur de `fallback`.
+    """
+    return tuple(task.__dict__.get(field, default) for field, default in zip(STATE_FIELDS, fallback))
+
+
+def is_partial(task):
+    """ Instance chargée avec only()/defer() sans project_id ou status """
+    return not task.__dict__.keys() >= set(STATE_FIELDS)
+
+
+def stored_state(task):
+    """
+    (project_id, status) en base : état d'avant d'une instance partielle,
+    relu au moment du save/delete (sans lui, le total bouge mais pas le statut).
+    """
+    from .models import Task
+
+    return Task.objects.filter(pk=task.pk).values_list(*STATE_FIELDS).first()
+
+
+def add_delta(deltas, state, sign):
+    """ Ajoute ±1 au total et au statut du projet `state` dans `deltas` """
+    project_id, status = state
+    if project_id is None:
+        return
+    deltas[project_id]["tasks_total"] += sign
+    if status in STATUS_COUNTER_FIELDS:
+        deltas[project_id][STATUS_COUNTER_FIELDS[status]] += sign
+
+
+def new_deltas():
+    return defaultdict(lambda: defaultdict(int))
+
+
+def apply_deltas(deltas):
+    """ Une requête UPDATE par projet modifié """
+    from .models import Project
+
+    for project_id, changes in deltas.items():
+        changes = {field: F(field) + delta for field, delta in changes.items() if delta}
+        if changes:
+            Project.objects.filter(pk=project_id).update(**changes)
+
+
+def rebuild(project_ids=None):
+    """
+    Recalcule les compteurs depuis la table des tâches.
+    `project_ids=None` : tous les projets. Renvoie le nombre de projets mis à jour.
+    """
+    from .models import Project, Task
+
+    projects = Project.objects.all()
+    tasks = Task.objects.filter(project__isnull=False)
+    if project_ids is not None:
+        project_ids = set(project_ids) - {None}
+        projects = projects.filter(pk__in=project_ids)
+        tasks = tasks.filter(project_id__in=project_ids)
+
+    counts = defaultdict(lambda: dict.fromkeys(COUNTER_FIELDS, 0))
+    for project_id, status, total in tasks.order_by().values_list("project_id", "status").annotate(n=Count("id")):
+        counts[project_id]["tasks_total"] += total
+        if status in STATUS_COUNTER_FIELDS:
+            counts[project_id][STATUS_COUNTER_FIELDS[status]] += total
+
+    updated = []
+    for project in projects.only("id", *COUNTER_FIELDS):
+        for field, value in counts[project.pk].items():
+            setattr(project, field, value)
+        updated.append(project)
+    Project.objects.bulk_update(updated, COUNTER_FIELDS, batch_size=500)
+    return len(updated)
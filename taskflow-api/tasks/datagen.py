@@ -0,0 +1,281 @@
+import random
+from datetime import date, timedelta
+
+from django.contrib.auth.models import User
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .models import (
+    Task, TaskLink, Attachment, Need, NeedTrace, Project, ProjectMember,
+    STATUSES, TASK_TYPES, PRIORITY, PATH_STEP, path_segment,
+)
+from . import counters
+from . import graph
+from . import response_cache
+
+# ============================================================================ #
+# GÉNÉRATEUR DE DONNÉES SYNTHÉTIQUES
+# ============================================================================ #
+# Jeux de données volumineux et reproductibles (graine) pour les tests de charge :
+#   - ids attribués d'avance : parents, chemins matérialisés et liens sont connus
+#     avant l'insertion, tout passe par bulk_create par lots (pas de save())
+#   - arbres de tâches en pré-ordre : le parent d'un nœud de niveau L est le
+#     dernier nœud émis au niveau L-1, un chemin par niveau suffit
+#   - liens "blocks" toujours d'une tâche antérieure vers une postérieure
+#     ("depends_on" dans l'autre sens) : le graphe reste acyclique
+#   - created_at / timestamp (auto_now_add) étalés après coup par plage d'ids
+# Les signaux ne sont pas émis : compteurs, caches et séquences sont remis à
+# niveau à la fin.
+
+DEFAULTS = {
+    "users": 200,
+    "projects": 10,
+    "members": 8,                   # membres par projet
+    "tasks_per_project": 1000,
+    "depth": 3,                     # niveaux sous la racine
+    "fan_out": 4,                   # enfants par tâche
+    "links_per_task": 1,
+    "attachments_per_task": 0.2,    # moyenne (tirage par tâche)
+    "needs": 1000,
+    "traces_per_need": 3,
+    "history_days": 365,
+}
+BATCH_SIZE = 5000
+STAMP_CHUNK = 500                   # lignes partageant une même date de création
+LINK_WINDOW = 50                    # un lien vise une des 50 tâches précédentes du projet
+MAX_DEPTH = Task._meta.get_field("path").max_length // PATH_STEP
+
+WORDS = ("rapport", "export", "client", "api", "bug", "migration", "recette", "facture",
+         "tableau", "import", "connexion", "mobile", "paiement", "notification", "archive")
+MODULES = ("core", "front", "api", "mobile", "reporting", "billing")
+VERSIONS = ("v1.0", "v1.1", "v2.0", "v2.1", "v3.0")
+ROLES = [code for code, _ in ProjectMember.ROLE_CHOICES]
+TYPES = [code for code, _ in TASK_TYPES]
+PRIORITIES = [code for code, _ in PRIORITY]
+PROGRESS = {"Nouveau": 0, "À faire": 0, "En cours": 50, "Fait": 100}
+
+
+def tree_levels(count, depth, fan_out):
+    """ Niveaux (0 = racine) de `count` nœuds en pré-ordre, forêt d'arbres complets tronquée """
+    produced = 0
+    while produced < count:
+        yield 0
+        produced += 1
+        # pile de [niveau, enfants restant à émettre]
+        stack = [[0, fan_out]] if depth > 0 else []
+        while stack and produced < count:
+            top = stack[-1]
+            if top[1] == 0:
+                stack.pop()
+                continue
+            top[1] -= 1
+            level = top[0] + 1
+            yield level
+            produced += 1
+            if level < depth:
+                stack.append([level, fan_out])
+
+
+def _next_id(model):
+    last = model.objects.order_by("-id").values_list("id", flat=True).first()
+    return (last or 0) + 1
+
+
+class Generator:
+    """ Tampons par modèle, vidés par lots dans l'ordre des clés étrangères """
+
+    def __init__(self, seed=42, batch_size=BATCH_SIZE, prefix="gen", **options):
+        self.options = {**DEFAULTS, **options}
+        if not 0 <= self.options["depth"] <= MAX_DEPTH:
+            raise ValueError(f"Profondeur maximale : {MAX_DEPTH} (longueur de Task.path).")
+        self.rng = random.Random(seed)
+        self.batch_size = batch_size
+        self.prefix = prefix
+        self.now = timezone.now()
+        self.today = date.today()
+        self.counts = {name: 0 for name in ("users", "projects", "members", "tasks", "links", "attachments", "needs", "traces")}
+        self._tasks, self._links, self._attachments = [], [], []
+
+    # ----------------- Écriture par lots -----------------
+    def _stamp(self, model, field, first_id, last_id, when):
+        """ auto_now_add : date réelle posée après l'insertion, une requête par plage d'ids """
+        model.objects.filter(id__range=(first_id, last_id)).update(**{field: when})
+
+    def _days_ago(self, first):
+        # la première plage est "d'aujourd'hui" (tableau de bord), les autres étalées dans l'historique
+        return 0 if first else self.rng.randrange(1, self.options["history_days"])
+
+    def _flush(self):
+        if self._tasks:
+            Task.objects.bulk_create(self._tasks, batch_size=self.batch_size)
+            for start in range(0, len(self._tasks), STAMP_CHUNK):
+                chunk = self._tasks[start:start + STAMP_CHUNK]
+                when = self.now - timedelta(days=self._days_ago(chunk[0].id == self.first_task))
+                self._stamp(Task, "created_at", chunk[0].id, chunk[-1].id, when)
+        if self._links:
+            TaskLink.objects.bulk_create(self._links, batch_size=self.batch_size)
+        if self._attachments:
+            Attachment.objects.bulk_create(self._attachments, batch_size=self.batch_size)
+        self.counts["tasks"] += len(self._tasks)
+        self.counts["links"] += len(self._links)
+        self.counts["attachments"] += len(self._attachments)
+        self._tasks, self._links, self._attachments = [], [], []
+
+    # ----------------- Référentiels -----------------
+    def _users(self):
+        if User.objects.filter(username__startswith=f"{self.prefix}-").exists():
+            raise ValueError(f"Des utilisateurs '{self.prefix}-*' existent déjà : choisir un autre préfixe.")
+        # mot de passe "!" : compte inutilisable, pas de hachage
+        User.objects.bulk_create(
+            [User(username=f"{self.prefix}-{i}", password="!") for i in range(self.options["users"])],
+            batch_size=self.batch_size,
+        )
+        self.counts["users"] = self.options["users"]
+        return list(User.objects.filter(username__startswith=f"{self.prefix}-").order_by("id").values_list("id", flat=True))
+
+    def _projects(self, user_ids):
+        """ [(id projet, ids des membres)] ; le premier membre est propriétaire """
+        first = _next_id(Project)
+        projects, members, result = [], [], []
+        for i in range(self.options["projects"]):
+            team = self.rng.sample(user_ids, min(self.options["members"], len(user_ids)))
+            projects.append(Project(
+                id=first + i, name=f"Projet {self.prefix} {i}", code=f"{self.prefix.upper()}{i:05d}",
+                owner_id=team[0], start_date=self.today - timedelta(days=self.rng.randrange(365)),
+            ))
+            members += [
+                ProjectMember(project_id=first + i, user_id=u, role="owner" if k == 0 else self.rng.choice(ROLES))
+                for k, u in enumerate(team)
+            ]
+            result.append((first + i, team))
+        Project.objects.bulk_create(projects, batch_size=self.batch_size)
+        ProjectMember.objects.bulk_create(members, batch_size=self.batch_size)
+        self.counts["projects"] = len(projects)
+        self.counts["members"] = len(members)
+        return result
+
+    # ----------------- Tâches, liens, pièces jointes -----------------
+    def _task(self, task_id, project_id, team, parent_id, path, level):
+        rng = self.rng
+        status = rng.choice(STATUSES)
+        start = self.today + timedelta(days=rng.randrange(-180, 180))
+        return Task(
+            id=task_id, project_id=project_id, parent_id=parent_id, path=path,
+            title=f"{rng.choice(WORDS).capitalize()} {rng.choice(WORDS)} #{task_id}",
+            status=status, progress=PROGRESS[status],
+            type=TYPES[min(level, len(TYPES) - 1)] if parent_id else rng.choice(TYPES[:3]),
+            priority=rng.choice(PRIORITIES), module=rng.choice(MODULES), target_version=rng.choice(VERSIONS),
+            owner_id=rng.choice(team), reporter_id=rng.choice(team),
+            start_date=start, due_date=start + timedelta(days=rng.randrange(1, 30)),
+        )
+
+    def _project_tasks(self, project_id, team, task_id):
+        opts, rng = self.options, self.rng
+        first = task_id
+        level_ids, level_paths = [], []
+        for level in tree_levels(opts["tasks_per_project"], opts["depth"], opts["fan_out"]):
+            if level == 0:
+                parent_id, path = None, ""
+            else:
+                parent_id = level_ids[level - 1]
+                path = level_paths[level - 1] + path_segment(parent_id)
+            del level_ids[level:], level_paths[level:]
+            level_ids.append(task_id)
+            level_paths.append(path)
+            self._tasks.append(self._task(task_id, project_id, team, parent_id, path, level))
+
+            window = task_id - first
+            for offset in rng.sample(range(1, min(window, LINK_WINDOW) + 1), min(window, opts["links_per_task"])):
+                earlier = task_id - offset
+                link_type = rng.choice(("blocks", "blocks", "depends_on", "relates"))
+                src, dst = (task_id, earlier) if link_type == "depends_on" else (earlier, task_id)
+                self._links.append(TaskLink(src_task_id=src, dst_task_id=dst, link_type=link_type, created_at=self.now))
+
+            attachments = int(opts["attachments_per_task"]) + (rng.random() < opts["attachments_per_task"] % 1)
+            for n in range(attachments):
+                self._attachments.append(Attachment(
+                    task_id=task_id, file=f"attachments/task_{task_id}/piece_{n}.{rng.choice(('pdf', 'png', 'txt'))}",
+                    uploaded_by_id=rng.choice(team), uploaded_at=self.now - timedelta(days=rng.randrange(30)),
+                ))
+
+            task_id += 1
+            if len(self._tasks) >= self.batch_size:
+                self._flush()
+        return task_id
+
+    # ----------------- Besoins et historique -----------------
+    def _needs(self, user_ids):
+        """
+        Historique de statuts cohérent : chaque trace part du statut précédent.
+        Les traces d'un lot sont créées tour par tour, chaque tour est une plage
+        d'ids contiguë : une requête pour horodater tout un tour.
+        """
+        opts, rng = self.options, self.rng
+        need_id, trace_id = _next_id(Need), _next_id(NeedTrace)
+        rounds = opts["traces_per_need"]
+        for start in range(0, opts["needs"], STAMP_CHUNK):
+            size = min(STAMP_CHUNK, opts["needs"] - start)
+            created = self.now - timedelta(days=self._days_ago(start == 0))
+            states = [rng.choice(STATUSES) for _ in range(size)]
+            needs = [
+                Need(id=need_id + i, title=f"Besoin {rng.choice(WORDS)} {start + i}",
+                     description=" ".join(rng.choice(WORDS) for _ in range(12)), owner_id=rng.choice(user_ids))
+                for i in range(size)
+            ]
+            traces, stamps = [], []
+            for r in range(rounds):
+                first_trace = trace_id
+                for i in range(size):
+                    old = states[i]
+                    new = rng.choice([s for s in STATUSES if s != old])
+                    traces.append(NeedTrace(id=trace_id, need_id=need_id + i, user_id=rng.choice(user_ids),
+                                            old_status=old, new_status=new,
+                                            old_validated=old == "Fait", new_validated=new == "Fait"))
+                    states[i] = new
+                    trace_id += 1
+                stamps.append((first_trace, trace_id - 1, created + timedelta(hours=r + 1)))
+            for need, state in zip(needs, states):
+                need.status, need.is_validated = state, state == "Fait"
+
+            Need.objects.bulk_create(needs, batch_size=self.batch_size)
+            self._stamp(Need, "created_at", need_id, need_id + size - 1, created)
+            NeedTrace.objects.bulk_create(traces, batch_size=self.batch_size)
+            for first_trace, last_trace, when in stamps:
+                self._stamp(NeedTrace, "timestamp", first_trace, last_trace, when)
+            need_id += size
+            self.counts["needs"] += size
+            self.counts["traces"] += len(traces)
+
+    # ----------------- Point d'entrée -----------------
+    def run(self):
+        with transaction.atomic():
+            user_ids = self._users()
+            projects = self._projects(user_ids)
+            task_id = self.first_task = _next_id(Task)
+            for project_id, team in projects:
+                task_id = self._project_tasks(project_id, team, task_id)
+            self._flush()
+            self._needs(user_ids)
+            _reset_sequences()
+
+        project_ids = [p for p, _ in projects]
+        counters.rebuild(project_ids)
+        graph.invalidate(project_ids)
+        response_cache.invalidate(project_ids)
+        return self.counts
+
+
+def _reset_sequences():
+    """ Ids posés à la main : les séquences (PostgreSQL) repartent après le plus grand id """
+    statements = connection.ops.sequence_reset_sql(
+        no_style(), [User, Project, ProjectMember, Task, TaskLink, Attachment, Need, NeedTrace],
+    )
+    with connection.cursor() as cursor:
+        for sql in statements:
+            cursor.execute(sql)
+
+
+def generate(seed=42, batch_size=BATCH_SIZE, prefix="gen", **options):
+    """ Génère le jeu de données décrit par `options` (voir DEFAULTS) ; renvoie les volumes insérés """
+    return Generator(seed, batch_size, prefix, **options).run()
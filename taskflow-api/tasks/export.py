@@ -0,0 +1,118 @@
+import csv
+from datetime import date, datetime
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+
+# ============================================================================ #
+# EXPORT EN FLUX (CSV / JSON lines)
+# ============================================================================ #
+# values_list() + iterator(chunk_size) : aucun objet modèle, lecture par blocs
+# (curseur côté serveur sur PostgreSQL), chaque ligne est encodée puis envoyée
+# aussitôt. Mémoire constante quel que soit le nombre de lignes.
+# Les relations sont aplaties par jointure (owner -> username, project -> code…).
+
+CHUNK_SIZE = 2000
+FORMATS = {
+    "csv": "text/csv; charset=utf-8",
+    "jsonl": "application/x-ndjson",
+}
+
+# (colonne exportée, lookup ORM)
+TASK_COLUMNS = (
+    ("id", "id"),
+    ("title", "title"),
+    ("status", "status"),
+    ("type", "type"),
+    ("priority", "priority"),
+    ("progress", "progress"),
+    ("module", "module"),
+    ("target_version", "target_version"),
+    ("start_date", "start_date"),
+    ("due_date", "due_date"),
+    ("created_at", "created_at"),
+    ("updated_at", "updated_at"),
+    ("owner_id", "owner_id"),
+    ("owner", "owner__username"),
+    ("reporter", "reporter__username"),
+    ("project_id", "project_id"),
+    ("project", "project__code"),
+    ("parent_id", "parent_id"),
+    ("parent", "parent__title"),
+)
+
+NEED_TRACE_COLUMNS = (
+    ("id", "id"),
+    ("need_id", "need_id"),
+    ("need", "need__title"),
+    ("user", "user__username"),
+    ("old_status", "old_status"),
+    ("new_status", "new_status"),
+    ("old_validated", "old_validated"),
+    ("new_validated", "new_validated"),
+    ("timestamp", "timestamp"),
+)
+
+
+_encoder = DjangoJSONEncoder()
+
+
+class InvalidExport(ValueError):
+    pass
+
+
+def select_columns(columns, requested):
+    """ Colonnes demandées (?fields=a,b), dans l'ordre demandé ; toutes par défaut """
+    if not requested:
+        return columns
+    available = dict(columns)
+    unknown = [name for name in requested if name not in available]
+    if unknown:
+        raise InvalidExport(f"Colonnes inconnues : {', '.join(unknown)}.")
+    return tuple((name, available[name]) for name in requested)
+
+
+def _cell(value):
+    """ Valeur CSV : mêmes représentations que le JSON (dates ISO, booléens true/false) """
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, (date, datetime)):
+        return _encoder.default(value)
+    return value
+
+
+class _Echo:
+    """ Tampon d'écriture pour csv.writer : renvoie la ligne au lieu de la stocker """
+
+    def write(self, value):
+        return value
+
+
+def rows(queryset, columns, chunk_size=CHUNK_SIZE):
+    return queryset.values_list(*(lookup for _, lookup in columns)).iterator(chunk_size=chunk_size)
+
+
+def stream_csv(queryset, columns, chunk_size=CHUNK_SIZE):
+    writer = csv.writer(_Echo())
+    yield writer.writerow([name for name, _ in columns])
+    for row in rows(queryset, columns, chunk_size):
+        yield writer.writerow([_cell(value) for value in row])
+
+
+def stream_jsonl(queryset, columns, chunk_size=CHUNK_SIZE):
+    names = [name for name, _ in columns]
+    encoder = DjangoJSONEncoder(ensure_ascii=False)
+    for row in rows(queryset, columns, chunk_size):
+        yield encoder.encode(dict(zip(names, row))) + "\n"
+
+
+def response(queryset, columns, fmt, filename):
+    """ StreamingHttpResponse en pièce jointe ; `fmt` : csv | jsonl """
+    if fmt not in FORMATS:
+        raise InvalidExport(f"Format inconnu : {fmt} (formats : {', '.join(FORMATS)}).")
+    lines = stream_csv(queryset, columns) if fmt == "csv" else stream_jsonl(queryset, columns)
+    resp = StreamingHttpResponse((line.encode("utf-8") for line in lines), content_type=FORMATS[fmt])
+    resp["Content-Disposition"] = f'attachment; filename="{filename}.{fmt}"'
+    return resp
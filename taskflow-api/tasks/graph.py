@@ -0,0 +1,407 @@
+import time
+from array import array
+from collections import deque
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models import Q
+
+from core import db_router
+
+from .models import Task, TaskLink
+from .response_cache import is_shared
+
+# ============================================================================ #
+# GRAPHE DE DÉPENDANCES (TaskLink)
+# ============================================================================ #
+# Les liens d'un projet sont chargés en une requête puis rangés en tableaux
+# d'adjacence compacts (format CSR : offsets + cibles, indices entiers).
+# Arête u -> v : u doit être terminée avant v.
+#   "blocks"     : src -> dst
+#   "depends_on" : dst -> src
+#   "relates"    : pas de contrainte d'ordre
+
+ORDERING_LINK_TYPES = ("blocks", "depends_on")
+
+
+class CycleError(ValueError):
+    pass
+
+
+def ordering_edge(link_type, src_id, dst_id):
+    """ (avant, après) pour un lien d'ordonnancement, None pour "relates" """
+    if link_type == "blocks":
+        return src_id, dst_id
+    if link_type == "depends_on":
+        return dst_id, src_id
+    return None
+
+
+def _csr(size, pairs):
+    """ Tableaux (offsets, cibles) pour des paires (source, cible) d'indices """
+    offsets = array("l", [0] * (size + 1))
+    for source, _ in pairs:
+        offsets[source + 1] += 1
+    for i in range(size):
+        offsets[i + 1] += offsets[i]
+    targets = array("l", [0] * len(pairs))
+    cursor = array("l", offsets[:-1])
+    for source, target in pairs:
+        targets[cursor[source]] = target
+        cursor[source] += 1
+    return offsets, targets
+
+
+class DependencyGraph:
+    """
+    Graphe immuable : `ids` liste les tâches (indice -> id),
+    `durations[i]` la durée en jours de la tâche i (0 si non datée).
+    """
+
+    def __init__(self, nodes, edges, durations=None):
+        durations = durations or {}
+        edges = {(u, v) for u, v in edges}
+        # nœuds liés en tête : leurs indices (= positions de bits) restent petits
+        linked = {t for edge in edges for t in edge}
+        self.ids = sorted(linked) + sorted(set(nodes) - linked)
+        self.linked_count = len(linked)
+        self.index = {task_id: i for i, task_id in enumerate(self.ids)}
+        pairs = [(self.index[u], self.index[v]) for u, v in edges]
+        self.succ_offsets, self.succ = _csr(len(self.ids), pairs)
+        self.pred_offsets, self.pred = _csr(len(self.ids), [(v, u) for u, v in pairs])
+        self.durations = array("l", [durations.get(task_id, 0) for task_id in self.ids])
+        # fermetures transitives (bitsets par nœud), calculées par precompute()
+        self._reach = None
+        self._reached_by = None
+
+    def __len__(self):
+        return len(self.ids)
+
+    @property
+    def edge_count(self):
+        return len(self.succ)
+
+    # ----------------- Parcours -----------------
+    def _neighbours(self, offsets, targets, i):
+        return targets[offsets[i]:offsets[i + 1]]
+
+    def precompute(self, max_nodes=None):
+        """
+        Fermeture transitive en bitsets (entiers Python) dans les deux sens,
+        pour répondre aux requêtes d'atteignabilité sans parcours.
+        Ignorée si le graphe a un cycle ou dépasse `max_nodes` nœuds liés.
+        """
+        if max_nodes is not None and self.linked_count > max_nodes:
+            return self
+        try:
+            order = self._topological_indices()
+        except CycleError:
+            return self
+        reach = [0] * len(self.ids)
+        for i in reversed(order):
+            for j in self._neighbours(self.succ_offsets, self.succ, i):
+                reach[i] |= (1 << j) | reach[j]
+        reached_by = [0] * len(self.ids)
+        for i in order:
+            for p in self._neighbours(self.pred_offsets, self.pred, i):
+                reached_by[i] |= (1 << p) | reached_by[p]
+        self._reach, self._reached_by = reach, reached_by
+        return self
+
+    @staticmethod
+    def _bits(bitset):
+        i = 0
+        while bitset:
+            if bitset & 1:
+                yield i
+            bitset >>= 1
+            i += 1
+
+    def _reachable(self, start, forward=True):
+        """ Indices atteignables depuis `start` (exclu), vers l'aval ou l'amont """
+        if self._reach is not None:
+            closure = self._reach if forward else self._reached_by
+            return set(self._bits(closure[start]))
+        offsets, targets = (self.succ_offsets, self.succ) if forward else (self.pred_offsets, self.pred)
+        seen = {start}
+        queue = deque([start])
+        while queue:
+            for j in self._neighbours(offsets, targets, queue.popleft()):
+                if j not in seen:
+                    seen.add(j)
+                    queue.append(j)
+        seen.discard(start)
+        return seen
+
+    def successors(self, task_id):
+        """ Tâches qui attendent (transitivement) `task_id` """
+        if task_id not in self.index:
+            return []
+        return sorted(self.ids[j] for j in self._reachable(self.index[task_id]))
+
+    def blockers(self, task_id):
+        """ Tâches à terminer (transitivement) avant `task_id` """
+        if task_id not in self.index:
+            return []
+        return sorted(self.ids[j] for j in self._reachable(self.index[task_id], forward=False))
+
+    def would_create_cycle(self, before_id, after_id):
+        """ Ajouter before -> after fermerait-il un cycle ? (after atteint-il before ?) """
+        if before_id == after_id:
+            return True
+        if before_id not in self.index or after_id not in self.index:
+            return False
+        if self._reach is not None:
+            return bool(self._reach[self.index[after_id]] >> self.index[before_id] & 1)
+        return self.index[before_id] in self._reachable(self.index[after_id])
+
+    # ----------------- Ordonnancement -----------------
+    def _topological_indices(self):
+        indegree = array("l", [self.pred_offsets[i + 1] - self.pred_offsets[i] for i in range(len(self.ids))])
+        queue = deque(i for i in range(len(self.ids)) if indegree[i] == 0)
+        order = []
+        while queue:
+            i = queue.popleft()
+            order.append(i)
+            for j in self._neighbours(self.succ_offsets, self.succ, i):
+                indegree[j] -= 1
+                if indegree[j] == 0:
+                    queue.append(j)
+        if len(order) != len(self.ids):
+            raise CycleError("Cycle détecté dans les dépendances.")
+        return order
+
+    def topological_order(self):
+        return [self.ids[i] for i in self._topological_indices()]
+
+    def cycles(self):
+        """
+        Composantes fortement connexes de plus d'une tâche (Tarjan itératif) :
+        un lien dont les deux extrémités sont dans la même composante est sur un cycle.
+        """
+        counter = 0
+        index = array("l", [-1] * len(self.ids))
+        low = array("l", [0] * len(self.ids))
+        on_stack = bytearray(len(self.ids))
+        stack, components = [], []
+        # seuls les nœuds liés peuvent appartenir à un cycle
+        for root in range(self.linked_count):
+            if index[root] != -1:
+                continue
+            work = [(root, 0)]
+            while work:
+                i, edge = work.pop()
+                if edge == 0:
+                    index[i] = low[i] = counter
+                    counter += 1
+                    stack.append(i)
+                    on_stack[i] = 1
+                start, end = self.succ_offsets[i], self.succ_offsets[i + 1]
+                if start + edge < end:
+                    j = self.succ[start + edge]
+                    work.append((i, edge + 1))
+                    if index[j] == -1:
+                        work.append((j, 0))
+                    elif on_stack[j]:
+                        low[i] = min(low[i], index[j])
+                    continue
+                if work:
+                    parent = work[-1][0]
+                    low[parent] = min(low[parent], low[i])
+                if low[i] == index[i]:
+                    component = []
+                    while True:
+                        j = stack.pop()
+                        on_stack[j] = 0
+                        component.append(self.ids[j])
+                        if j == i:
+                            break
+                    if len(component) > 1:
+                        components.append(set(component))
+        return components
+
+    def critical_path(self):
+        """
+        Plus long chemin pondéré par la durée des tâches.
+        Renvoie (durée totale en jours, [ids du chemin]).
+        """
+        if not self.ids:
+            return 0, []
+        finish = array("l", [0] * len(self.ids))
+        previous = array("l", [-1] * len(self.ids))
+        for i in self._topological_indices():
+            best = -1
+            for p in self._neighbours(self.pred_offsets, self.pred, i):
+                if best == -1 or finish[p] > finish[best]:
+                    best = p
+            previous[i] = best
+            finish[i] = self.durations[i] + (finish[best] if best != -1 else 0)
+
+        end = max(range(len(self.ids)), key=finish.__getitem__)
+        path = []
+        while end != -1:
+            path.append(self.ids[end])
+            end = previous[end]
+        path.reverse()
+        return max(finish), path
+
+
+# ----------------- Chargement -----------------
+def task_duration(start_date, due_date):
+    if start_date and due_date and due_date >= start_date:
+        return (due_date - start_date).days + 1
+    return 0
+
+
+def build_graph(project_ids):
+    """
+    Graphe des tâches des projets `project_ids` (None = tâches sans projet).
+    2 requêtes : tâches (dates) + liens touchant ces projets.
+    """
+    project_ids = set(project_ids)
+    in_projects = Q(project_id__in=project_ids - {None})
+    if None in project_ids:
+        in_projects |= Q(project__isnull=True)
+
+    durations = {
+        task_id: task_duration(start, due)
+        for task_id, start, due in Task.objects.filter(in_projects).values_list("id", "start_date", "due_date")
+    }
+    links = (
+        TaskLink.objects
+        .filter(link_type__in=ORDERING_LINK_TYPES)
+        .filter(Q(src_task__in=Task.objects.filter(in_projects)) | Q(dst_task__in=Task.objects.filter(in_projects)))
+        .values_list("link_type", "src_task_id", "dst_task_id")
+    )
+    edges = [ordering_edge(link_type, src, dst) for link_type, src, dst in links]
+    return DependencyGraph(durations.keys(), edges, durations)
+
+
+def creates_cycle(before_id, after_id, batch_size=500):
+    """
+    Ajouter before -> after fermerait-il un cycle ? Parcours en largeur depuis
+    `after` sur les liens d'ordonnancement de tous les projets (un cycle peut
+    traverser les liens internes d'un autre projet) : une requête par niveau et
+    par paquet de `batch_size` tâches, seule la partie atteignable est lue.
+    """
+    if before_id == after_id:
+        return True
+    seen, frontier = {after_id}, [after_id]
+    while frontier:
+        reached = set()
+        for i in range(0, len(frontier), batch_size):
+            chunk = frontier[i:i + batch_size]
+            links = (
+                TaskLink.objects
+                .filter(Q(link_type="blocks", src_task_id__in=chunk) | Q(link_type="depends_on", dst_task_id__in=chunk))
+                .values_list("link_type", "src_task_id", "dst_task_id")
+            )
+            reached.update(ordering_edge(link_type, src, dst)[1] for link_type, src, dst in links)
+        if before_id in reached:
+            return True
+        frontier = list(reached - seen)
+        seen.update(frontier)
+    return False
+
+
+# ============================================================================ #
+# INSTANTANÉS EN CACHE
+# ============================================================================ #
+# Un instantané (graphe + fermeture transitive) par ensemble de projets, stocké
+# dans le cache Django sous une clé incluant la version de chaque projet.
+# Invalider un projet = incrémenter sa version : les anciens instantanés ne
+# sont plus jamais lus et expirent d'eux-mêmes.
+# Cache GRAPH_CACHE_ALIAS partagé entre processus obligatoire : en mémoire
+# locale, une écriture d'un autre worker (ou d'une commande) ne périmerait pas
+# les instantanés de celui-ci ; le graphe est alors reconstruit à chaque appel.
+# Les écritures (contrôle de cycle de `link`) ne lisent jamais d'instantané.
+
+CACHE_PREFIX = "taskflow:graph"
+STATS_KEYS = {"hit": f"{CACHE_PREFIX}:stats:hits", "miss": f"{CACHE_PREFIX}:stats:misses"}
+
+
+def _alias():
+    return getattr(settings, "GRAPH_CACHE_ALIAS", "default")
+
+
+def _cache():
+    return caches[_alias()]
+
+
+def _version_key(project_id):
+    return f"{CACHE_PREFIX}:version:{project_id if project_id is not None else 'none'}"
+
+
+def _project_versions(project_ids):
+    keys = {project_id: _version_key(project_id) for project_id in project_ids}
+    found = _cache().get_many(keys.values())
+    versions = {}
+    for project_id, key in keys.items():
+        if key not in found:
+            # version initiale horodatée : une clé de version évincée ne peut
+            # pas ressusciter un ancien instantané
+            _cache().add(key, time.time_ns(), timeout=None)
+            found[key] = _cache().get(key)
+        versions[project_id] = found[key]
+    return versions
+
+
+def _bump(project_ids):
+    for project_id in project_ids:
+        try:
+            _cache().incr(_version_key(project_id))
+        except ValueError:
+            _cache().set(_version_key(project_id), time.time_ns(), timeout=None)
+
+
+def invalidate(project_ids):
+    """
+    Périme les instantanés de ces projets (appelé par les signaux et les chemins de masse).
+    Deuxième incrément au commit : un instantané reconstruit pendant la transaction,
+    à partir des données pas encore validées, n'est jamais réutilisé.
+    """
+    project_ids = set(project_ids)
+    _bump(project_ids)
+    transaction.on_commit(lambda: _bump(project_ids))
+
+
+def _count(outcome):
+    try:
+        _cache().incr(STATS_KEYS[outcome])
+    except ValueError:
+        _cache().add(STATS_KEYS[outcome], 0, timeout=None)
+        _cache().incr(STATS_KEYS[outcome])
+
+
+def cache_stats():
+    """ Compteurs hit/miss (partagés entre workers si le cache l'est) """
+    values = _cache().get_many(STATS_KEYS.values())
+    return {outcome: values.get(key, 0) for outcome, key in STATS_KEYS.items()}
+
+
+def load_graph(project_ids):
+    """ Graphe des projets `project_ids`, depuis le cache si possible (`graph.cached`) """
+    if not is_shared(_alias()):
+        _count("miss")
+        graph = build_graph(project_ids)
+        graph.cached = False
+        return graph
+
+    project_ids = sorted(set(project_ids), key=lambda p: (p is None, p or 0))
+    versions = _project_versions(project_ids)
+    key = f"{CACHE_PREFIX}:" + "|".join(f"{p}@{versions[p]}" for p in project_ids)
+
+    graph = _cache().get(key)
+    if graph is not None:
+        _count("hit")
+        graph.cached = True
+        return graph
+
+    _count("miss")
+    graph = build_graph(project_ids).precompute(max_nodes=getattr(settings, "GRAPH_CLOSURE_MAX_NODES", 5000))
+    # lu sur un réplica : pas d'instantané (voir db_router.reading_from_replica)
+    if not db_router.reading_from_replica():
+        _cache().set(key, graph, timeout=getattr(settings, "GRAPH_CACHE_TIMEOUT", 3600))
+    graph.cached = False
+    return graph
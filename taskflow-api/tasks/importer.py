@@ -0,0 +1,511 @@
+import csv
+import json
+import os
+import subprocess
+import sys
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+from rest_framework import serializers
+
+from .models import Task, TaskLink, Project, ImportRun, ImportRow, fits_in_path, path_segment
+from .serializers import TaskBulkItemSerializer
+from . import bulk
+from . import counters
+from . import graph
+from . import response_cache
+
+# ============================================================================ #
+# IMPORT EN MASSE (CSV / JSON lines)
+# ============================================================================ #
+# Le fichier est lu en flux, par lots de BATCH_SIZE lignes :
+#   1. "tasks"   : validation (TaskBulkItemSerializer, owner/reporter/project
+#                  résolus par username / code via des dictionnaires en mémoire),
+#                  bulk_create des tâches + une ImportRow par ligne (clé externe
+#                  -> tâche, références à relier, erreurs)
+#   2. "parents" : parents résolus par clé externe (requête par lot sur ImportRow),
+#                  chemins calculés niveau par niveau ; ce qui ne se place jamais
+#                  est un cycle
+#   3. "links"   : liens "type:clé;type:clé" créés par bulk_create
+#   4. "cycles"  : liens importés qui ferment un cycle de dépendances supprimés
+# Chaque lot est une transaction qui avance aussi le point de reprise de l'import
+# (phase + position) : après une interruption, run_import() reprend au lot suivant.
+# Aucun signal n'est émis (bulk_create, UPDATE en masse) : chaque lot invalide
+# lui-même graphe et réponses en cache de ses projets, et pose updated_at, pour
+# qu'un client qui synchronise ou revalide entre deux phases voie l'avancement.
+# Mémoire bornée : seuls les utilisateurs et projets sont chargés en entier.
+# Un seul exécutant par import : run_import() prend d'abord le bail de l'import
+# (UPDATE conditionnel), le renouvelle à chaque lot et le perd s'il n'y a pas
+# touché depuis IMPORT_LEASE_SECONDS (exécutant tué : l'import peut être repris).
+
+BATCH_SIZE = 2000
+FORMATS = {".csv": "csv", ".jsonl": "jsonl", ".ndjson": "jsonl"}
+KEY_COLUMNS = ("external_id", "id")
+PARENT_COLUMNS = ("parent_external_id", "parent_id")
+LINK_TYPES = [code for code, _ in TaskLink.LINK_TYPES]
+MAX_KEY = ImportRow._meta.get_field("key").max_length
+# colonnes reprises telles quelles (les références sont résolues à part)
+FIELDS = [name for name in TaskBulkItemSerializer.Meta.fields if name not in bulk.REFERENCE_MODELS]
+
+
+class ImportFailed(ValueError):
+    pass
+
+
+class ImportBusy(ImportFailed):
+    """ Import déjà pris par un autre exécutant (bail en cours) """
+
+
+class ImportLost(ImportFailed):
+    """ Bail repris par un autre exécutant pendant l'exécution """
+
+
+# ----------------- Lecture -----------------
+def detect_format(name, fmt=None):
+    fmt = fmt or FORMATS.get(os.path.splitext(name)[1].lower())
+    if fmt not in ("csv", "jsonl"):
+        raise ImportFailed("Format inconnu : fichier .csv ou .jsonl attendu (ou format=csv|jsonl).")
+    return fmt
+
+
+def read_rows(path, fmt):
+    """ (numéro de ligne, dict) en flux ; dict None pour une ligne JSON illisible """
+    # utf-8-sig : accepte les CSV enregistrés avec BOM (Excel)
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        if fmt == "csv":
+            reader = csv.DictReader(f)
+            if not set(KEY_COLUMNS) & set(reader.fieldnames or ()):
+                raise ImportFailed(f"Colonne de clé externe requise : {' ou '.join(KEY_COLUMNS)}.")
+            for row in reader:
+                yield reader.line_num, row
+            return
+        for number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError:
+                row = None
+            yield number, row if isinstance(row, dict) else None
+
+
+def _first(raw, names):
+    for name in names:
+        value = raw.get(name)
+        if value is not None and value != "":
+            return str(value).strip()
+    return ""
+
+
+def _links(raw):
+    """ "type:clé;type:clé" (CSV) ou [{"type": ..., "target": ...}] (JSON) -> chaîne normalisée """
+    value = raw.get("links")
+    if isinstance(value, list):
+        return ";".join(f"{link.get('type', '')}:{link.get('target', '')}" if isinstance(link, dict) else str(link)
+                        for link in value)
+    return str(value or "").strip()
+
+
+def _error(row, field, message):
+    row.errors = {**(row.errors or {}), field: [*((row.errors or {}).get(field, [])), message]}
+
+
+# ----------------- Phase 1 : tâches -----------------
+def _lookups():
+    """ Dictionnaires de résolution : username -> id, code projet -> id """
+    users = dict(User.objects.values_list("username", "id"))
+    return {
+        "owner": (users, "Utilisateur"),
+        "reporter": (users, "Utilisateur"),
+        "project": (dict(Project.objects.values_list("code", "id")), "Projet"),
+    }
+
+
+def _import_batch(run, batch, lookups, validator):
+    keys = {_first(raw, KEY_COLUMNS) for _, raw in batch if raw}
+    taken = set(ImportRow.objects.filter(run=run, key__in=keys, task__isnull=False).values_list("key", flat=True))
+    tasks, rows = [], []
+    for line, raw in batch:
+        row = ImportRow(run=run, line=line)
+        rows.append(row)
+        if raw is None:
+            _error(row, "non_field_errors", "Ligne JSON invalide.")
+            continue
+
+        # clés trop longues refusées : tronquées, deux clés distinctes se confondraient
+        key, parent_key = _first(raw, KEY_COLUMNS), _first(raw, PARENT_COLUMNS)
+        row.key = key[:MAX_KEY]
+        if not key:
+            _error(row, KEY_COLUMNS[0], "Clé externe manquante.")
+        elif len(key) > MAX_KEY:
+            _error(row, KEY_COLUMNS[0], f"Clé trop longue ({len(key)} caractères, {MAX_KEY} au plus).")
+        elif key in taken:
+            _error(row, KEY_COLUMNS[0], f"Clé '{key}' en double.")
+        if len(parent_key) > MAX_KEY:
+            _error(row, "parent", f"Clé parente trop longue ({len(parent_key)} caractères, {MAX_KEY} au plus).")
+
+        data = {name: raw[name] for name in FIELDS if raw.get(name) not in (None, "")}
+        for field, (mapping, label) in lookups.items():
+            name = _first(raw, (field,))
+            if not name:
+                continue
+            if name in mapping:
+                data[field] = mapping[name]
+            else:
+                _error(row, field, f"{label} '{name}' introuvable.")
+        try:
+            validated = validator.run_validation(data)
+        except serializers.ValidationError as e:
+            for field, messages in e.detail.items():
+                for message in messages:
+                    _error(row, field, str(message))
+        if row.errors:
+            continue
+
+        taken.add(row.key)
+        row.parent_key = parent_key
+        row.wired = not row.parent_key
+        row.links = _links(raw)
+        row.task = bulk.task_from_row(validated)
+        tasks.append(row.task)
+
+    with transaction.atomic():
+        Task.objects.bulk_create(tasks, batch_size=BATCH_SIZE)
+        for row in rows:
+            row.task_id = row.task.pk if row.task else None
+        ImportRow.objects.bulk_create(rows, batch_size=BATCH_SIZE)
+        run.position += len(batch)
+        run.rows += len(batch)
+        run.created += len(tasks)
+        run.rejected += len(batch) - len(tasks)
+        run.save(update_fields=["position", "rows", "created", "rejected"])
+    _invalidate({task.project_id for task in tasks})
+
+
+def _load_tasks(run, batch_size, progress):
+    lookups = _lookups()
+    validator = TaskBulkItemSerializer()
+    batch = []
+    for number, (line, raw) in enumerate(read_rows(run.path, run.format)):
+        if number < run.position:
+            continue    # déjà importée (reprise)
+        batch.append((line, raw))
+        if len(batch) >= batch_size:
+            _import_batch(run, batch, lookups, validator)
+            batch = []
+            progress(run)
+    if batch:
+        _import_batch(run, batch, lookups, validator)
+        progress(run)
+
+
+# ----------------- Phase 2 : parents -----------------
+def _set_parents(placements):
+    """
+    (parent_id, path, id) : une requête préparée exécutée N fois ; bulk_update
+    construirait un CASE WHEN par lot, bien plus coûteux à compiler.
+    updated_at posé à la main, comme bulk.bulk_update_tasks (synchro incrémentale).
+    """
+    table = connection.ops.quote_name(Task._meta.db_table)
+    now = connection.ops.adapt_datetimefield_value(timezone.now())
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            f"UPDATE {table} SET parent_id = %s, path = %s, updated_at = %s WHERE id = %s",
+            [(parent_id, path, now, task_id) for parent_id, path, task_id in placements],
+        )
+
+
+def _mark_wired(rows):
+    """ wired=True en une requête ; seules les lignes en erreur sont réécrites une à une """
+    ImportRow.objects.filter(id__in=[row.id for row in rows]).update(wired=True)
+    ImportRow.objects.bulk_update([row for row in rows if row.errors], ["errors"])
+
+
+def _wire_batch(run, rows, batch_size):
+    """ Relie les lignes dont le parent est déjà placé ; renvoie True si au moins une a avancé """
+    parents = {
+        key: (task_id, wired)
+        for key, task_id, wired in ImportRow.objects.filter(
+            run=run, key__in={row.parent_key for row in rows}, task__isnull=False,
+        ).values_list("key", "task_id", "wired")
+    }
+    paths = dict(Task.objects.filter(pk__in=[t for t, wired in parents.values() if wired]).values_list("id", "path"))
+    placed = {}     # tâches reliées dans ce lot : id -> path
+    placements, done = [], []
+    for row in rows:
+        parent = parents.get(row.parent_key)
+        if parent is None:
+            _error(row, "parent", f"Parent '{row.parent_key}' introuvable (ou rejeté).")
+        elif parent[0] == row.task_id:
+            _error(row, "parent", "Une tâche ne peut pas être son propre parent.")
+        else:
+            parent_id, wired = parent
+            if parent_id in placed:
+                parent_path = placed[parent_id]
+            elif wired:
+                parent_path = paths[parent_id]
+            else:
+                continue    # parent pas encore placé : tour suivant
+            path = parent_path + path_segment(parent_id)
+            # même règle que Task.check_parent : le path laisse la place des enfants
+            if not fits_in_path(len(path)):
+                _error(row, "parent", "Hiérarchie trop profonde.")
+            else:
+                placements.append((parent_id, path, row.task_id))
+                placed[row.task_id] = path
+        row.wired = True
+        done.append(row)
+
+    with transaction.atomic():
+        _set_parents(placements)
+        _mark_wired(done)
+    _invalidate_tasks(placed)
+    return bool(done)
+
+
+def _wire_parents(run, batch_size, progress):
+    """
+    Tours successifs sur les lignes non reliées : un parent placé avant son
+    enfant (ordre du fichier) se relie en un tour, sinon au tour suivant.
+    Un tour sans progrès : les lignes restantes sont dans un cycle.
+    """
+    pending = ImportRow.objects.filter(run=run, wired=False)
+    while pending.exists():
+        advanced, last = False, 0
+        while True:
+            rows = list(pending.filter(id__gt=last).order_by("id")[:batch_size])
+            if not rows:
+                break
+            last = rows[-1].id
+            advanced |= _wire_batch(run, rows, batch_size)
+            progress(run)
+        if advanced:
+            continue
+        while True:
+            rows = list(pending.order_by("id")[:batch_size])
+            if not rows:
+                break
+            for row in rows:
+                _error(row, "parent", "Cycle détecté dans la hiérarchie.")
+            _mark_wired(rows)
+            progress(run)
+
+
+# ----------------- Phase 3 : liens -----------------
+def _parse_links(value):
+    for entry in value.split(";"):
+        entry = entry.strip()
+        if entry:
+            link_type, _, key = entry.partition(":")
+            yield entry, link_type.strip(), key.strip()
+
+
+def _create_links(run, batch_size, progress):
+    while True:
+        rows = list(
+            ImportRow.objects.filter(run=run, id__gt=run.position, task__isnull=False)
+            .exclude(links="").order_by("id")[:batch_size]
+        )
+        if not rows:
+            return
+        keys = {key for row in rows for _, _, key in _parse_links(row.links)}
+        targets = dict(ImportRow.objects.filter(run=run, key__in=keys, task__isnull=False).values_list("key", "task_id"))
+        now = timezone.now()
+        # (source, cible, type) -> lien : doublons du fichier comptés une seule fois
+        links, failed = {}, {}
+        for row in rows:
+            for entry, link_type, key in _parse_links(row.links):
+                if link_type not in LINK_TYPES:
+                    message = f"'{entry}' : type inconnu ({', '.join(LINK_TYPES)})."
+                elif key not in targets:
+                    message = f"'{entry}' : tâche '{key}' introuvable (ou rejetée)."
+                elif targets[key] == row.task_id:
+                    message = f"'{entry}' : une tâche ne peut pas se lier à elle-même."
+                else:
+                    links.setdefault((row.task_id, targets[key], link_type), TaskLink(
+                        src_task_id=row.task_id, dst_task_id=targets[key], link_type=link_type, created_at=now,
+                    ))
+                    continue
+                _error(row, "links", message)
+                failed[row.id] = row
+
+        with transaction.atomic():
+            # tâches créées par cet import : aucun lien existant, pas de conflit possible
+            TaskLink.objects.bulk_create(links.values(), batch_size=batch_size)
+            ImportRow.objects.bulk_update(failed.values(), ["errors"], batch_size=batch_size)
+            run.position = rows[-1].id
+            run.linked += len(links)
+            run.save(update_fields=["position", "linked"])
+        _invalidate_tasks({task_id for src, dst, _ in links for task_id in (src, dst)})
+        progress(run)
+
+
+# ----------------- Phase 4 : cycles -----------------
+def _run_tasks(run):
+    return ImportRow.objects.filter(run=run, task__isnull=False).values("task_id")
+
+
+def _break_cycles(run):
+    """
+    Les liens importés ont été créés sans contrôle un par un : par projet touché,
+    les liens d'ordonnancement importés internes à une composante cyclique sont
+    supprimés et signalés sur leur ligne (les liens existants formaient un DAG).
+    """
+    linked = ImportRow.objects.filter(run=run, task__isnull=False).exclude(links="").values("task_id")
+    project_ids = set(Task.objects.filter(pk__in=linked).values_list("project_id", flat=True).distinct())
+    for project_id in project_ids:
+        _heartbeat(run)
+        for component in graph.build_graph([project_id]).cycles():
+            cyclic = TaskLink.objects.filter(
+                src_task_id__in=component, dst_task_id__in=component, link_type__in=graph.ORDERING_LINK_TYPES,
+            ).filter(src_task_id__in=_run_tasks(run))
+            removed = list(cyclic.values_list("src_task_id", "dst_task_id", "link_type"))
+            if not removed:
+                continue
+            keys = dict(ImportRow.objects.filter(run=run, task_id__in=component).values_list("task_id", "key"))
+            rows = {row.task_id: row for row in ImportRow.objects.filter(run=run, task_id__in={s for s, _, _ in removed})}
+            for src, dst, link_type in removed:
+                _error(rows[src], "links", f"'{link_type}:{keys.get(dst, dst)}' : supprimé, cycle de dépendances.")
+            with transaction.atomic():
+                cyclic.delete()
+                ImportRow.objects.bulk_update(rows.values(), ["errors"])
+                run.linked -= len(removed)
+                run.save(update_fields=["linked"])
+            _invalidate({project_id})
+
+
+# ----------------- Pilotage -----------------
+def _lease_expiry():
+    return timezone.now() - timedelta(seconds=getattr(settings, "IMPORT_LEASE_SECONDS", 300))
+
+
+def claimable(run):
+    """ Import pas terminé et sans exécutant vivant """
+    return run.status != "done" and (
+        run.status != "running" or run.heartbeat_at is None or run.heartbeat_at < _lease_expiry()
+    )
+
+
+def claim(run):
+    """
+    Prend le bail de l'import (une seule requête, gagnée par un seul exécutant)
+    et recharge son point de reprise ; ImportBusy si un autre le tient.
+    """
+    owner = uuid.uuid4().hex
+    taken = (
+        ImportRun.objects.filter(pk=run.pk).exclude(status="done")
+        .filter(~Q(status="running") | Q(heartbeat_at__isnull=True) | Q(heartbeat_at__lt=_lease_expiry()))
+        .update(status="running", message="", lease_owner=owner, heartbeat_at=timezone.now())
+    )
+    run.refresh_from_db()
+    if not taken:
+        raise ImportBusy(f"Import {run.id} déjà en cours ou terminé.")
+    return run
+
+
+def _heartbeat(run):
+    if not ImportRun.objects.filter(pk=run.pk, lease_owner=run.lease_owner).update(heartbeat_at=timezone.now()):
+        raise ImportLost(f"Import {run.id} repris par un autre exécutant.")
+
+
+def _invalidate(project_ids):
+    graph.invalidate(project_ids)
+    response_cache.invalidate(project_ids)
+
+
+def _invalidate_tasks(task_ids):
+    if task_ids:
+        _invalidate(set(Task.objects.filter(pk__in=task_ids).values_list("project_id", flat=True).distinct()))
+
+
+def _advance(run, phase):
+    run.phase, run.position = phase, 0
+    run.save(update_fields=["phase", "position"])
+
+
+def _finish(run):
+    project_ids = set(Task.objects.filter(pk__in=_run_tasks(run)).values_list("project_id", flat=True).distinct())
+    # bulk_create / UPDATE en masse : aucun signal émis
+    counters.rebuild(project_ids - {None})
+    _invalidate(project_ids)
+    run.status, run.phase, run.finished_at = "done", "done", timezone.now()
+    run.save(update_fields=["status", "phase", "finished_at"])
+
+
+def start(path, source=None, fmt=None, user=None):
+    """ Nouvel import du fichier `path` (non exécuté : voir run_import) """
+    return ImportRun.objects.create(
+        source=source or os.path.basename(path), path=os.path.abspath(path),
+        format=detect_format(source or path, fmt), created_by=user,
+    )
+
+
+def launch(run):
+    """
+    Exécute l'import hors de la requête HTTP : `manage.py import_tasks --resume`
+    dans un processus détaché (survit au worker) ; suivi par report() / GET import/<id>.
+    """
+    subprocess.Popen(
+        [sys.executable, str(settings.BASE_DIR / "manage.py"), "import_tasks", "--resume", str(run.id)],
+        stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, start_new_session=True,
+    )
+
+
+def run_import(run, batch_size=BATCH_SIZE, progress=None):
+    """
+    Exécute l'import, ou le reprend à sa phase et sa position enregistrées.
+    ImportBusy si un autre exécutant le tient déjà.
+    """
+    claim(run)
+    report_progress = progress or (lambda run: None)
+
+    def progress(run):
+        _heartbeat(run)
+        report_progress(run)
+
+    try:
+        if run.phase == "tasks":
+            _load_tasks(run, batch_size, progress)
+            _advance(run, "parents")
+        if run.phase == "parents":
+            _wire_parents(run, batch_size, progress)
+            _advance(run, "links")
+        if run.phase == "links":
+            _create_links(run, batch_size, progress)
+            _advance(run, "cycles")
+        if run.phase == "cycles":
+            _break_cycles(run)
+            _finish(run)
+    except ImportLost:
+        raise   # statut tenu par le nouvel exécutant
+    except Exception as e:
+        run.status, run.message = "failed", str(e)
+        run.save(update_fields=["status", "message"])
+        raise
+    return run
+
+
+def report(run, errors=100):
+    """ Compteurs + les `errors` premières lignes en erreur (toutes phases) """
+    failed = ImportRow.objects.filter(run=run, errors__isnull=False)
+    return {
+        "id": run.id,
+        "source": run.source,
+        "status": run.status,
+        "phase": run.phase,
+        "message": run.message,
+        "rows": run.rows,
+        "created": run.created,
+        "rejected": run.rejected,
+        "linked": run.linked,
+        "error_count": failed.count(),
+        "errors": [
+            {"line": line, "key": key, "errors": row_errors}
+            for line, key, row_errors in failed.order_by("line").values_list("line", "key", "errors")[:errors]
+        ],
+    }
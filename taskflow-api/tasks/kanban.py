@@ -0,0 +1,63 @@
+from django.db.models import Count, F, Window
+from django.db.models.functions import RowNumber
+
+from .models import STATUSES
+
+# ============================================================================ #
+# MOTEUR KANBAN
+# ============================================================================ #
+# Le regroupement par statut est fait par la base :
+#   - 1 requête GROUP BY pour les compteurs de colonnes,
+#   - 1 requête fenêtrée (ROW_NUMBER par statut) pour les N premières cartes.
+# Les colonnes se paginent ensuite par curseur (id de la dernière carte).
+
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 100
+
+# Ordre des cartes dans une colonne (le curseur suit cet ordre)
+CARD_ORDER = "-id"
+
+
+def parse_limit(raw, default=DEFAULT_LIMIT, maximum=MAX_LIMIT):
+    """ Taille demandée, bornée à [1, maximum] """
+    try:
+        limit = int(raw)
+    except (TypeError, ValueError):
+        return default
+    return max(1, min(limit, maximum))
+
+
+def build_board(queryset, limit=DEFAULT_LIMIT):
+    """
+    Plateau complet : {statut: {"count", "cards", "next_cursor"}}.
+    `cards` contient des instances Task (à sérialiser par l'appelant).
+    """
+    counts = dict(
+        queryset.order_by().values_list("status").annotate(total=Count("id"))
+    )
+    ranked = (
+        queryset
+        .annotate(rank=Window(RowNumber(), partition_by=F("status"), order_by=F("id").desc()))
+        .filter(rank__lte=limit)
+        .order_by("status", CARD_ORDER)
+    )
+
+    board = {status: {"count": counts.get(status, 0), "cards": [], "next_cursor": None} for status in STATUSES}
+    for task in ranked:
+        board.setdefault(task.status, {"count": counts.get(task.status, 0), "cards": [], "next_cursor": None})
+        board[task.status]["cards"].append(task)
+
+    for column in board.values():
+        if column["cards"] and column["count"] > len(column["cards"]):
+            column["next_cursor"] = column["cards"][-1].id
+    return board
+
+
+def load_column(queryset, status, cursor=None, limit=DEFAULT_LIMIT):
+    """ Cartes suivantes d'une colonne, après `cursor` (id exclu) """
+    qs = queryset.filter(status=status).order_by(CARD_ORDER)
+    if cursor is not None:
+        qs = qs.filter(id__lt=cursor)
+    cards = list(qs[:limit + 1])
+    next_cursor = cards[limit - 1].id if len(cards) > limit else None
+    return cards[:limit], next_cursor
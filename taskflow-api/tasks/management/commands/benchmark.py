@@ -0,0 +1,48 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from tasks import benchmarks
+from tasks.models import Task
+
+
+class Command(BaseCommand):
+    help = ("Benchmark des endpoints (latence, requêtes SQL, pic mémoire) sur un jeu de données généré ; "
+            "rapport JSON comparable d'un commit à l'autre.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--scale", choices=list(benchmarks.SCALES), default="small")
+        parser.add_argument("--seed", type=int, default=42, help="Graine du générateur")
+        parser.add_argument("--reuse", action="store_true", help="Mesurer les données déjà présentes, sans générer")
+        parser.add_argument("--repeat", type=int, default=5, help="Appels chronométrés par scénario")
+        parser.add_argument("--only", action="append", help="Scénario(s) à mesurer (tous par défaut)")
+        parser.add_argument("--output", default="benchmark.json", help="Fichier du rapport JSON")
+        parser.add_argument("--compare", help="Rapport précédent : affiche les écarts de médiane")
+
+    def handle(self, *args, **options):
+        if options["reuse"]:
+            if not Task.objects.exists():
+                raise CommandError("Base vide : lancer sans --reuse pour générer les données.")
+        else:
+            if Task.objects.exists():
+                raise CommandError("La base contient déjà des tâches : utiliser une base dédiée, ou --reuse.")
+            self.stdout.write(f"Génération du jeu '{options['scale']}'…")
+            counts = benchmarks.seed(options["scale"], options["seed"])
+            self.stdout.write(", ".join(f"{k}={v}" for k, v in counts.items()))
+
+        def progress(name, r):
+            self.stdout.write(
+                f"{name:<20} {r['status']}  médiane {r['median_ms']:>9.2f} ms  p95 {r['p95_ms']:>9.2f} ms  "
+                f"{r['queries']:>5} requêtes  {r['peak_kb']:>9.1f} Ko"
+            )
+
+        report = benchmarks.run(options["only"], options["repeat"], progress=progress)
+        report["meta"]["scale"] = None if options["reuse"] else options["scale"]
+        benchmarks.write(report, options["output"])
+        self.stdout.write(self.style.SUCCESS(f"Rapport écrit dans {options['output']}"))
+
+        if options["compare"]:
+            with open(options["compare"], encoding="utf-8") as f:
+                previous = json.load(f)
+            for name, before, after, delta, q_before, q_after in benchmarks.compare(report, previous):
+                self.stdout.write(f"{name:<20} {before:>9.2f} -> {after:>9.2f} ms ({delta:+.1f} %)  requêtes {q_before} -> {q_after}")
@@ -0,0 +1,86 @@
+import os
+import sqlite3
+import tempfile
+import time
+from multiprocessing import Pool
+
+from django.core.management.base import BaseCommand
+
+from core.database import SQLITE_PRAGMAS
+
+# Chaque processus imite un worker gunicorn : transactions courtes
+# "lecture puis écriture" (comme un save() Django précédé d'un SELECT).
+PROFILES = ("default", "tuned")
+
+
+def _connect(path, profile):
+    if profile == "tuned":
+        conn = sqlite3.connect(path, timeout=SQLITE_PRAGMAS["busy_timeout"] / 1000, isolation_level=None)
+        for name, value in SQLITE_PRAGMAS.items():
+            conn.execute(f"PRAGMA {name}={value}")
+    else:
+        # réglages d'origine : journal DELETE, synchronous FULL, transactions différées
+        conn = sqlite3.connect(path, timeout=5, isolation_level=None)
+    return conn
+
+
+def _worker(args):
+    path, profile, worker, transactions = args
+    conn = _connect(path, profile)
+    begin = "BEGIN IMMEDIATE" if profile == "tuned" else "BEGIN"
+    committed = locked = 0
+    for i in range(transactions):
+        try:
+            conn.execute(begin)
+            conn.execute("SELECT COUNT(*) FROM bench WHERE worker = ?", (worker,)).fetchone()
+            conn.execute("INSERT INTO bench (worker, payload) VALUES (?, ?)", (worker, f"tâche {i}" * 8))
+            conn.execute("COMMIT")
+            committed += 1
+        except sqlite3.OperationalError:
+            # "database is locked"
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            locked += 1
+    conn.close()
+    return committed, locked
+
+
+def run_profile(profile, workers, transactions):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.sqlite3")
+        setup = _connect(path, profile)
+        setup.execute("CREATE TABLE bench (id INTEGER PRIMARY KEY, worker INTEGER, payload TEXT)")
+        setup.execute("CREATE INDEX bench_worker ON bench (worker)")
+        setup.close()
+
+        started = time.perf_counter()
+        with Pool(workers) as pool:
+            results = pool.map(_worker, [(path, profile, w, transactions) for w in range(workers)])
+        elapsed = time.perf_counter() - started
+
+    committed = sum(r[0] for r in results)
+    return {
+        "profile": profile,
+        "workers": workers,
+        "committed": committed,
+        "locked": sum(r[1] for r in results),
+        "seconds": round(elapsed, 3),
+        "commits_per_s": round(committed / elapsed, 1) if elapsed else 0,
+    }
+
+
+class Command(BaseCommand):
+    help = "Débit d'écriture SQLite concurrent (plusieurs processus) : profil d'origine vs profil WAL."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=4)
+        parser.add_argument("--transactions", type=int, default=300, help="Transactions par worker")
+        parser.add_argument("--profile", choices=PROFILES, action="append", help="Profil(s) à mesurer (les deux par défaut)")
+
+    def handle(self, *args, **options):
+        for profile in options["profile"] or PROFILES:
+            r = run_profile(profile, options["workers"], options["transactions"])
+            self.stdout.write(
+                f"{r['profile']:<8} {r['workers']} workers : {r['committed']} commits en {r['seconds']}s "
+                f"({r['commits_per_s']}/s), {r['locked']} 'database is locked'"
+            )
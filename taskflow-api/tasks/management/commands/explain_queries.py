@@ -0,0 +1,95 @@
+import json
+from datetime import date, timedelta
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+
+from tasks import query_plan
+from tasks.models import Project
+
+# tables minuscules : un parcours complet y est normal
+DEFAULT_IGNORED = ("django_content_type", "django_migrations", "auth_permission")
+
+
+def default_urls():
+    """ Accès typiques de l'API, paramétrés avec un projet et un utilisateur existants """
+    project = Project.objects.order_by("id").values_list("id", flat=True).first() or 1
+    owner = User.objects.order_by("id").values_list("id", flat=True).first() or 1
+    today = date.today()
+    window = f"from={today - timedelta(days=30)}&to={today + timedelta(days=30)}"
+    return [
+        "/api/tasks/?page_size=50",
+        "/api/tasks/?status=Fait&page_size=50",
+        f"/api/tasks/?project={project}&status=À faire&page_size=50",
+        f"/api/tasks/?owner={owner}&status=En cours&page_size=50",
+        f"/api/tasks/?due_date={today}&page_size=50",
+        "/api/tasks/?ordering=-created_at&page_size=50",
+        f"/api/tasks/kanban/?project={project}",
+        f"/api/tasks/gantt/?project={project}&{window}",
+        "/api/tasks/sync/",
+        "/api/tasks/search/?q=rapport",
+        "/api/needs/?page_size=50",
+        "/api/projects/?page_size=50",
+    ]
+
+
+class Command(BaseCommand):
+    help = (
+        "Rejoue des requêtes (URLs de l'API ou fichier SQL) dans EXPLAIN QUERY PLAN "
+        "et signale les parcours complets de table et les tris temporaires."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--url", action="append", dest="urls", help="URL GET à rejouer (répétable)")
+        parser.add_argument("--file", help="Fichier de requêtes SQL capturées, une par ligne")
+        parser.add_argument("--ignore", action="append", default=[], help="Table à ignorer (répétable)")
+        parser.add_argument("--json", action="store_true", help="Rapport JSON")
+        parser.add_argument("--fail-on-scan", action="store_true", help="Code de sortie 1 si un parcours complet est trouvé")
+
+    def handle(self, *args, **options):
+        if connection.vendor != "sqlite":
+            raise CommandError("EXPLAIN QUERY PLAN : disponible uniquement sous SQLite.")
+
+        captured = []
+        if options["file"]:
+            with open(options["file"], encoding="utf-8") as f:
+                captured += [(options["file"], line.strip()) for line in f if line.strip()]
+        if options["urls"] or not options["file"]:
+            captured += self.replay(options["urls"] or default_urls())
+
+        report = query_plan.analyse(captured, ignore_tables=set(DEFAULT_IGNORED) | set(options["ignore"]))
+        if options["json"]:
+            self.stdout.write(json.dumps(report, indent=2, ensure_ascii=False))
+        else:
+            self.print_report(report, len(captured))
+
+        if options["fail_on_scan"] and any(kind == "full_scan" for r in report for kind, _ in r["issues"]):
+            raise SystemExit(1)
+
+    def replay(self, urls):
+        """ [(url, sql)] des requêtes émises par chaque GET (client interne, cache de réponses désactivé) """
+        client = Client(SERVER_NAME="localhost")
+        captured = []
+        with override_settings(RESPONSE_CACHE_TIMEOUT=0, ALLOWED_HOSTS=["localhost"]):
+            for url in urls:
+                with CaptureQueriesContext(connection) as ctx:
+                    response = client.get(url)
+                if response.status_code >= 400:
+                    self.stderr.write(f"{url} : HTTP {response.status_code}")
+                captured += [(url, q["sql"]) for q in ctx.captured_queries]
+        return captured
+
+    def print_report(self, report, total):
+        if not report:
+            self.stdout.write(self.style.SUCCESS(f"{total} requête(s) analysée(s) : aucun parcours complet."))
+            return
+        for entry in report:
+            for kind, detail in entry["issues"]:
+                label = self.style.ERROR("PARCOURS COMPLET") if kind == "full_scan" else self.style.WARNING("TRI TEMPORAIRE")
+                self.stdout.write(f"{label} {detail}  (x{entry['count']})")
+            self.stdout.write(f"  sources : {', '.join(entry['sources'])}")
+            self.stdout.write(f"  {entry['sql'][:300]}\n")
+        self.stdout.write(f"{total} requête(s) analysée(s), {len(report)} forme(s) à examiner.")
@@ -0,0 +1,43 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from tasks import datagen
+
+
+class Command(BaseCommand):
+    help = ("Génère un jeu de données synthétique reproductible (projets, membres, arbres de tâches, "
+            "liens, pièces jointes, besoins et historique) par bulk_create.")
+
+    def add_arguments(self, parser):
+        defaults = datagen.DEFAULTS
+        parser.add_argument("--seed", type=int, default=42, help="Graine : mêmes options + même graine = mêmes données")
+        parser.add_argument("--prefix", default="gen", help="Préfixe des utilisateurs et codes projet générés")
+        parser.add_argument("--batch-size", type=int, default=datagen.BATCH_SIZE)
+        parser.add_argument("--users", type=int, default=defaults["users"])
+        parser.add_argument("--projects", type=int, default=defaults["projects"])
+        parser.add_argument("--members", type=int, default=defaults["members"], help="Membres par projet")
+        parser.add_argument("--tasks-per-project", type=int, default=defaults["tasks_per_project"])
+        parser.add_argument("--depth", type=int, default=defaults["depth"],
+                            help=f"Niveaux sous chaque racine (max {datagen.MAX_DEPTH})")
+        parser.add_argument("--fan-out", type=int, default=defaults["fan_out"], help="Enfants par tâche")
+        parser.add_argument("--links-per-task", type=int, default=defaults["links_per_task"])
+        parser.add_argument("--attachments-per-task", type=float, default=defaults["attachments_per_task"])
+        parser.add_argument("--needs", type=int, default=defaults["needs"])
+        parser.add_argument("--traces-per-need", type=int, default=defaults["traces_per_need"])
+        parser.add_argument("--history-days", type=int, default=defaults["history_days"])
+
+    def handle(self, *args, **options):
+        generation = {name: options[name] for name in datagen.DEFAULTS}
+        started = time.perf_counter()
+        try:
+            counts = datagen.generate(options["seed"], options["batch_size"], options["prefix"], **generation)
+        except ValueError as e:
+            raise CommandError(str(e))
+        elapsed = time.perf_counter() - started
+
+        rows = sum(counts.values())
+        self.stdout.write(", ".join(f"{name}={count}" for name, count in counts.items()))
+        self.stdout.write(self.style.SUCCESS(
+            f"{rows} lignes en {elapsed:.1f}s ({rows / elapsed * 60:,.0f} lignes/min)".replace(",", " ")
+        ))
@@ -0,0 +1,67 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from tasks import importer
+from tasks.models import ImportRun
+
+
+class Command(BaseCommand):
+    help = ("Importe des tâches depuis un fichier CSV ou JSON lines (clés externes, parents, liens), "
+            "par lots ; reprend un import interrompu avec --resume.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", nargs="?", help="Fichier .csv ou .jsonl")
+        parser.add_argument("--format", choices=["csv", "jsonl"], help="Format (déduit de l'extension par défaut)")
+        parser.add_argument("--resume", type=int, metavar="ID", help="Reprendre l'import n° ID")
+        parser.add_argument("--batch-size", type=int, default=importer.BATCH_SIZE)
+        parser.add_argument("--errors", type=int, default=20, help="Lignes en erreur à afficher")
+
+    def handle(self, *args, **options):
+        if options["resume"]:
+            run = ImportRun.objects.filter(pk=options["resume"]).first()
+            if run is None:
+                raise CommandError(f"Import {options['resume']} introuvable.")
+            if run.status == "done":
+                raise CommandError(f"Import {run.id} déjà terminé.")
+            self.stdout.write(f"Reprise de l'import {run.id} ({run.source}) en phase '{run.phase}'")
+        elif options["path"]:
+            try:
+                run = importer.start(options["path"], fmt=options["format"])
+            except importer.ImportFailed as e:
+                raise CommandError(str(e))
+            self.stdout.write(f"Import {run.id} : {run.source}")
+        else:
+            raise CommandError("Indiquer un fichier, ou --resume ID.")
+
+        started = time.perf_counter()
+        shown = {"phase": None}
+
+        def progress(run):
+            if run.phase != shown["phase"]:
+                shown["phase"] = run.phase
+                self.stdout.write(f"  phase {run.phase}…")
+            if run.phase == "tasks" and run.rows % 100_000 < options["batch_size"]:
+                self.stdout.write(f"    {run.rows} lignes lues ({time.perf_counter() - started:.0f}s)")
+
+        try:
+            importer.run_import(run, options["batch_size"], progress)
+        except importer.ImportFailed as e:
+            raise CommandError(f"{e} (import {run.id})")
+        except KeyboardInterrupt:
+            run.status, run.message = "failed", "Interrompu."
+            run.save(update_fields=["status", "message"])
+            raise CommandError(f"Interrompu : reprendre avec --resume {run.id}")
+
+        report = importer.report(run, options["errors"])
+        elapsed = time.perf_counter() - started
+        rate = f"{report['rows'] / elapsed * 60:,.0f}".replace(",", " ")
+        self.stdout.write(self.style.SUCCESS(
+            f"{report['created']} tâches créées, {report['rejected']} lignes rejetées, {report['linked']} liens "
+            f"en {elapsed:.1f}s ({rate} lignes/min)"
+        ))
+        if report["error_count"]:
+            self.stdout.write(self.style.WARNING(f"{report['error_count']} lignes en erreur :"))
+            for error in report["errors"]:
+                details = "; ".join(f"{field}: {' '.join(messages)}" for field, messages in error["errors"].items())
+                self.stdout.write(f"  ligne {error['line']} [{error['key']}] {details}")
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from tasks import counters
+
+
+class Command(BaseCommand):
+    help = "Recalcule les compteurs de tâches dénormalisés de chaque projet."
+
+    def add_arguments(self, parser):
+        parser.add_argument("project_ids", nargs="*", type=int, help="Projets à recalculer (tous par défaut)")
+
+    def handle(self, *args, **options):
+        project_ids = options["project_ids"] or None
+        updated = counters.rebuild(project_ids)
+        self.stdout.write(self.style.SUCCESS(f"{updated} projet(s) recalculé(s)."))
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from tasks import search
+
+
+class Command(BaseCommand):
+    help = "Reconstruit l'index plein texte des tâches et des besoins (backend FTS5)."
+
+    def handle(self, *args, **options):
+        backend = search.get_backend()
+        if not hasattr(backend, "rebuild"):
+            self.stdout.write(f"{type(backend).__name__} : pas d'index à reconstruire.")
+            return
+        backend.rebuild()
+        self.stdout.write(self.style.SUCCESS("Index de recherche reconstruit."))
@@ -0,0 +1,36 @@
+import sqlite3
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core.db_router import PRIMARY, replica_aliases
+
+
+def copy_sqlite(source, target):
+    """ Copie cohérente d'une base SQLite ouverte (API de sauvegarde en ligne) """
+    src = sqlite3.connect(source)
+    dst = sqlite3.connect(target)
+    try:
+        src.backup(dst)
+    finally:
+        dst.close()
+        src.close()
+
+
+class Command(BaseCommand):
+    help = (
+        "Démo locale : recopie la base SQLite primaire vers chaque réplica (TASKFLOW_DB_REPLICAS). "
+        "En production, la réplication est celle de PostgreSQL."
+    )
+
+    def handle(self, *args, **options):
+        primary = settings.DATABASES[PRIMARY]
+        if not primary["ENGINE"].endswith("sqlite3"):
+            raise CommandError("sync_replicas ne concerne que SQLite (PostgreSQL : réplication native).")
+        replicas = replica_aliases()
+        if not replicas:
+            self.stdout.write("Aucun réplica configuré (TASKFLOW_DB_REPLICAS).")
+            return
+        for alias in replicas:
+            copy_sqlite(str(primary["NAME"]), str(settings.DATABASES[alias]["NAME"]))
+            self.stdout.write(self.style.SUCCESS(f"{alias} <- {primary['NAME']}"))
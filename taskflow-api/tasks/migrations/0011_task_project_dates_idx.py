@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-17 06:47
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0010_remove_project_updated_at_project_code_project_color_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['project', 'start_date', 'due_date'], name='task_project_dates_idx'),
+        ),
+    ]
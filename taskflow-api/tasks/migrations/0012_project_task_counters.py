@@ -0,0 +1,62 @@
+# Generated by Django 5.2.18 on 2026-10-17 06:48
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+STATUS_COUNTER_FIELDS = {
+    "À faire": "tasks_todo",
+    "En cours": "tasks_in_progress",
+    "Fait": "tasks_done",
+    "Nouveau": "tasks_new",
+}
+
+
+def fill_counters(apps, schema_editor):
+    Project = apps.get_model('tasks', 'Project')
+    Task = apps.get_model('tasks', 'Task')
+    rows = Task.objects.filter(project__isnull=False).order_by().values_list('project_id', 'status').annotate(n=Count('id'))
+    counts = {}
+    for project_id, status, n in rows:
+        fields = counts.setdefault(project_id, dict.fromkeys(['tasks_total', *STATUS_COUNTER_FIELDS.values()], 0))
+        fields['tasks_total'] += n
+        if status in STATUS_COUNTER_FIELDS:
+            fields[STATUS_COUNTER_FIELDS[status]] += n
+    for project_id, fields in counts.items():
+        Project.objects.filter(pk=project_id).update(**fields)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0011_task_project_dates_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='project',
+            name='tasks_done',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='tasks_in_progress',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='tasks_new',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='tasks_todo',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='tasks_total',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
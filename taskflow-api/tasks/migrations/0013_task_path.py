@@ -0,0 +1,48 @@
+# Generated by Django 5.2.18 on 2026-10-17 06:52
+
+from django.db import migrations, models
+
+
+def fill_paths(apps, schema_editor):
+    Task = apps.get_model('tasks', 'Task')
+    parents = dict(Task.objects.values_list('id', 'parent_id'))
+    paths = {}
+
+    def path_of(task_id):
+        # chemin itératif : pas de récursion Python sur les hiérarchies profondes
+        chain, seen = [], {task_id}
+        current = parents[task_id]
+        while current is not None and current not in paths:
+            if current in seen:
+                # cycle hérité (créé avant ce contrôle) : coupé à cet endroit
+                current = None
+                break
+            seen.add(current)
+            chain.append(current)
+            current = parents[current]
+        prefix = paths.get(current, '') + (str(current).zfill(10) if current is not None else '')
+        for ancestor in reversed(chain):
+            paths[ancestor] = prefix
+            prefix += str(ancestor).zfill(10)
+        return prefix
+
+    for task_id in parents:
+        paths[task_id] = path_of(task_id)
+    tasks = [Task(id=task_id, path=path) for task_id, path in paths.items()]
+    Task.objects.bulk_update(tasks, ['path'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0012_project_task_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='task',
+            name='path',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=2000),
+        ),
+        migrations.RunPython(fill_paths, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-17 06:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0014_task_sync'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='tasktombstone',
+            index=models.Index(fields=['project_id', 'deleted_at'], name='tombstone_project_idx'),
+        ),
+    ]
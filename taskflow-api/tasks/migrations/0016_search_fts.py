@@ -0,0 +1,55 @@
+from django.db import migrations
+
+# Index plein texte FTS5 (SQLite uniquement) en "external content" : le texte
+# reste dans tasks_task / tasks_need, les triggers tiennent l'index à jour,
+# y compris pour bulk_create / QuerySet.update. Index de préfixes 2-4 lettres
+# pour les recherches "mot*".
+INDEXES = {
+    'tasks_task': ('tasks_task_fts', ('title', 'module', 'target_version')),
+    'tasks_need': ('tasks_need_fts', ('title', 'description')),
+}
+
+
+def _statements(source, table, fields):
+    columns = ', '.join(fields)
+    new = ', '.join(f'new.{f}' for f in fields)
+    old = ', '.join(f'old.{f}' for f in fields)
+    delete_old = f"INSERT INTO {table}({table}, rowid, {columns}) VALUES ('delete', old.id, {old});"
+    insert_new = f"INSERT INTO {table}(rowid, {columns}) VALUES (new.id, {new});"
+    return [
+        f"CREATE VIRTUAL TABLE {table} USING fts5({columns}, content='{source}', content_rowid='id', "
+        f"tokenize='unicode61 remove_diacritics 2', prefix='2 3 4')",
+        f"CREATE TRIGGER {table}_ai AFTER INSERT ON {source} BEGIN {insert_new} END",
+        f"CREATE TRIGGER {table}_ad AFTER DELETE ON {source} BEGIN {delete_old} END",
+        # seules les colonnes indexées déclenchent une réécriture (pas status, updated_at…)
+        f"CREATE TRIGGER {table}_au AFTER UPDATE OF {columns} ON {source} BEGIN {delete_old} {insert_new} END",
+        f"INSERT INTO {table}({table}) VALUES ('rebuild')",
+    ]
+
+
+def create_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for source, (table, fields) in INDEXES.items():
+        for sql in _statements(source, table, fields):
+            schema_editor.execute(sql)
+
+
+def drop_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for table, _ in INDEXES.values():
+        for suffix in ('_ai', '_ad', '_au'):
+            schema_editor.execute(f'DROP TRIGGER IF EXISTS {table}{suffix}')
+        schema_editor.execute(f'DROP TABLE IF EXISTS {table}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0015_tombstone_project_idx'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_indexes, drop_indexes),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 5.2.18 on 2026-10-17 07:36
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0017_task_status_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImportRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(max_length=255)),
+                ('path', models.CharField(max_length=1000)),
+                ('format', models.CharField(max_length=10)),
+                ('status', models.CharField(choices=[('running', 'En cours'), ('failed', 'Interrompu'), ('done', 'Terminé')], default='running', max_length=20)),
+                ('phase', models.CharField(default='tasks', max_length=20)),
+                ('position', models.BigIntegerField(default=0)),
+                ('rows', models.PositiveIntegerField(default=0)),
+                ('created', models.PositiveIntegerField(default=0)),
+                ('rejected', models.PositiveIntegerField(default=0)),
+                ('linked', models.PositiveIntegerField(default=0)),
+                ('message', models.TextField(blank=True)),
+                ('started_at', models.DateTimeField(auto_now_add=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ImportRow',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('line', models.PositiveIntegerField()),
+                ('key', models.CharField(blank=True, max_length=100)),
+                ('parent_key', models.CharField(blank=True, max_length=100)),
+                ('links', models.TextField(blank=True)),
+                ('wired', models.BooleanField(default=True)),
+                ('errors', models.JSONField(blank=True, null=True)),
+                ('task', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='tasks.task')),
+                ('run', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='import_rows', to='tasks.importrun')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['run', 'key'], name='importrow_run_key_idx'), models.Index(fields=['run', 'wired', 'id'], name='importrow_run_wired_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-17 08:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0018_import_runs'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='importrun',
+            name='heartbeat_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='importrun',
+            name='lease_owner',
+            field=models.CharField(blank=True, max_length=32),
+        ),
+        migrations.AlterField(
+            model_name='importrun',
+            name='status',
+            field=models.CharField(choices=[('queued', 'En attente'), ('running', 'En cours'), ('failed', 'Interrompu'), ('done', 'Terminé')], default='queued', max_length=20),
+        ),
+    ]
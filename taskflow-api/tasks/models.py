@@ -1,13 +1,18 @@
 from django.db import models
+from django.db.models import Value
+from django.db.models import Max
+from django.db.models.functions import Concat, Length, Substr
 from django.core.exceptions import ValidationError
 from django.contrib.auth.models import User
 from django.utils import timezone
 
 # --- Statuts existants + extension Kanban ---
+STATUSES = ["À faire", "En cours", "Fait", "Nouveau"]
+
+
 def validate_status(value):
-    allowed = ["À faire", "En cours", "Fait", "Nouveau"]
-    if value not in allowed:
-        raise ValidationError(f"Statut invalide : {allowed}")
+    if value not in STATUSES:
+        raise ValidationError(f"Statut invalide : {STATUSES}")
 
 # --- Nouveau : type de tâche ---
 TASK_TYPES = [
@@ -46,17 +51,23 @@ class Project(models.Model):
     # Audit
     created_at = models.DateTimeField(auto_now_add=True)
 
+    # Compteurs dénormalisés (maintenus par tasks.counters, reconstruits par
+    # la commande rebuild_project_counters)
+    tasks_total = models.PositiveIntegerField(default=0, editable=False)
+    tasks_todo = models.PositiveIntegerField(default=0, editable=False)
+    tasks_in_progress = models.PositiveIntegerField(default=0, editable=False)
+    tasks_done = models.PositiveIntegerField(default=0, editable=False)
+    tasks_new = models.PositiveIntegerField(default=0, editable=False)
+
     def __str__(self):
         return f"{self.code} – {self.name}"
 
     @property
     def progression(self):
-        """ % des tâches faites """
-        tasks = self.tasks.all()
-        if not tasks.exists():
+        """ % des tâches faites (à partir des compteurs, sans requête) """
+        if not self.tasks_total:
             return 0
-        done = tasks.filter(status="Fait").count()
-        return round((done / tasks.count()) * 100)
+        return round((self.tasks_done / self.tasks_total) * 100)
 
 
 class ProjectMember(models.Model):
@@ -78,6 +89,32 @@ class ProjectMember(models.Model):
         return f"{self.user} – {self.project} ({self.role})"
 
 
+# --- Hiérarchie matérialisée ---
+# Task.path = ids des ancêtres (racine -> parent), chacun sur PATH_STEP chiffres.
+# Chemins purement numériques et de largeur fixe : l'ordre lexicographique est
+# le même quelle que soit la collation, donc "tous les descendants" est un
+# simple intervalle sur l'index de path.
+PATH_STEP = 10
+
+
+def path_segment(task_id):
+    return str(task_id).zfill(PATH_STEP)
+
+
+def path_ids(path):
+    return [int(path[i:i + PATH_STEP]) for i in range(0, len(path), PATH_STEP)]
+
+
+def fits_in_path(length):
+    """ Un path de `length` caractères laisse-t-il la place d'un segment (préfixe de ses enfants) ? """
+    return length + PATH_STEP <= Task._meta.get_field("path").max_length
+
+
+def prefix_upper_bound(prefix):
+    """ Plus petit chemin strictement après tous ceux qui commencent par `prefix` """
+    return prefix[:-PATH_STEP] + path_segment(int(prefix[-PATH_STEP:]) + 1)
+
+
 # --- Tâche ---
 class Task(models.Model):
     title = models.CharField(max_length=200)
@@ -100,23 +137,101 @@ class Task(models.Model):
     parent = models.ForeignKey("self", on_delete=models.CASCADE, related_name="children", null=True, blank=True)
     project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name="tasks", null=True, blank=True)
     updated_at = models.DateTimeField(auto_now=True)
+    path = models.CharField(max_length=2000, blank=True, default="", editable=False, db_index=True)
+
+    class Meta:
+        indexes = [
+            # Gantt : tâches d'un projet chevauchant une fenêtre de dates
+            models.Index(fields=["project", "start_date", "due_date"], name="task_project_dates_idx"),
+            # Synchro incrémentale : tâches modifiées depuis un jeton
+            models.Index(fields=["updated_at", "id"], name="task_updated_at_idx"),
+            # Kanban / filtres ?project=&status= : comptage par colonne sans lire la table
+            models.Index(fields=["project", "status"], name="task_project_status_idx"),
+            # "Mes tâches" : ?owner=&status=
+            models.Index(fields=["owner", "status"], name="task_owner_status_idx"),
+        ]
 
     def clean(self):
-        if self.parent and self.parent_id == self.id:
-            raise ValidationError("Une tâche ne peut pas être son propre parent.")
-        ancestor = self.parent
-        while ancestor:
-            # comparer par pk est plus sûr
-            if ancestor.pk == (self.pk or None):
-                raise ValidationError("Cycle détecté dans la hiérarchie.")
-            ancestor = ancestor.parent
+        self.check_parent(self.parent)
         if not (0 <= self.progress <= 100):
             raise ValidationError("Le champ 'progress' doit être entre 0 et 100.")
 
+    def check_parent(self, parent):
+        """
+        Refuse un parent qui créerait un cycle (lecture du path, sans remonter l'arbre)
+        ou une hiérarchie trop profonde pour Task.path.
+        """
+        if parent is None:
+            return
+        if self.pk is not None:
+            if parent.pk == self.pk:
+                raise ValidationError("Une tâche ne peut pas être son propre parent.")
+            if self.pk in path_ids(parent.path):
+                raise ValidationError("Cycle détecté dans la hiérarchie.")
+        # déplacement : le descendant le plus profond suit la tâche
+        extra = 0
+        if self.pk is not None and parent.subtree_prefix != self.path:
+            deepest = self.descendants().aggregate(length=Max(Length("path")))["length"]
+            extra = deepest - len(self.path) if deepest else 0
+        if not fits_in_path(len(parent.subtree_prefix) + extra):
+            raise ValidationError("Hiérarchie trop profonde.")
+
+    # ----------------- Hiérarchie matérialisée -----------------
+    @property
+    def subtree_prefix(self):
+        """ Préfixe commun aux paths de tous les descendants """
+        return self.path + path_segment(self.pk)
+
+    def ancestor_ids(self):
+        return path_ids(self.path)
+
+    def descendants(self):
+        prefix = self.subtree_prefix
+        return Task.objects.filter(path__gte=prefix, path__lt=prefix_upper_bound(prefix))
+
+    def ancestors(self):
+        return Task.objects.filter(pk__in=self.ancestor_ids())
+
+    def save(self, *args, **kwargs):
+        old_path = self.path
+        new_path = self.parent.subtree_prefix if self.parent_id else ""
+        if self.parent_id and (self.pk is None or new_path != old_path):
+            # avant la mise à jour du path : check_parent lit le sous-arbre actuel
+            self.check_parent(self.parent)
+        self.path = new_path
+        if kwargs.get("update_fields") is not None and self.path != old_path:
+            kwargs["update_fields"] = {*kwargs["update_fields"], "path"}
+        if self.pk is not None and self.path != old_path and not kwargs.get("force_insert"):
+            old_prefix = old_path + path_segment(self.pk)
+            super().save(*args, **kwargs)
+            # déplacement : réécrit les paths du sous-arbre en une requête
+            Task.objects.filter(path__gte=old_prefix, path__lt=prefix_upper_bound(old_prefix)).update(
+                path=Concat(Value(self.subtree_prefix), Substr("path", len(old_prefix) + 1))
+            )
+            return
+        super().save(*args, **kwargs)
+
     def __str__(self):
         return f"{self.title} (id={self.id})"
 
 
+# --- Pierres tombales (synchro incrémentale) ---
+class TaskTombstone(models.Model):
+    """ Trace d'une tâche supprimée, renvoyée par /tasks/sync/ """
+    task_id = models.BigIntegerField()
+    project_id = models.BigIntegerField(null=True, blank=True)
+    deleted_at = models.DateTimeField(default=timezone.now, db_index=True)
+
+    class Meta:
+        indexes = [
+            # suppressions d'un projet, par date
+            models.Index(fields=["project_id", "deleted_at"], name="tombstone_project_idx"),
+        ]
+
+    def __str__(self):
+        return f"Tâche supprimée #{self.task_id} – {self.deleted_at:%Y-%m-%d %H:%M:%S}"
+
+
 # --- Relations entre tâches ---
 class TaskLink(models.Model):
     LINK_TYPES = [
@@ -179,3 +294,60 @@ class NeedTrace(models.Model):
 
     def __str__(self):
         return f"Trace Need #{self.need.id} – {self.timestamp:%Y-%m-%d %H:%M:%S}"
+
+
+# --- Imports en masse (tasks.importer) ---
+class ImportRun(models.Model):
+    """
+    Un import de fichier ; phase + position = point de reprise.
+    Un seul exécutant à la fois : celui qui a pris le bail (lease_owner),
+    renouvelé à chaque lot (heartbeat_at) ; bail expiré = exécutant disparu.
+    """
+    PHASES = ["tasks", "parents", "links", "cycles", "done"]
+    STATUSES = [
+        ("queued", "En attente"),
+        ("running", "En cours"),
+        ("failed", "Interrompu"),
+        ("done", "Terminé"),
+    ]
+
+    source = models.CharField(max_length=255)
+    path = models.CharField(max_length=1000)        # fichier relu à la reprise
+    format = models.CharField(max_length=10)
+    status = models.CharField(max_length=20, choices=STATUSES, default="queued")
+    lease_owner = models.CharField(max_length=32, blank=True)
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+    phase = models.CharField(max_length=20, default="tasks")
+    position = models.BigIntegerField(default=0)
+    rows = models.PositiveIntegerField(default=0)
+    created = models.PositiveIntegerField(default=0)
+    rejected = models.PositiveIntegerField(default=0)
+    linked = models.PositiveIntegerField(default=0)
+    message = models.TextField(blank=True)
+    created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
+    started_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"Import #{self.id} {self.source} ({self.status})"
+
+
+class ImportRow(models.Model):
+    """
+    Ligne lue : clé externe -> tâche créée (résolution des parents et liens en
+    seconde passe, par lots), références à relier, erreurs de la ligne.
+    """
+    run = models.ForeignKey(ImportRun, on_delete=models.CASCADE, related_name="import_rows")
+    line = models.PositiveIntegerField()
+    key = models.CharField(max_length=100, blank=True)
+    task = models.ForeignKey(Task, on_delete=models.SET_NULL, null=True, blank=True, related_name="+")
+    parent_key = models.CharField(max_length=100, blank=True)
+    links = models.TextField(blank=True)           # "type:clé;type:clé"
+    wired = models.BooleanField(default=True)      # False : parent pas encore relié
+    errors = models.JSONField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["run", "key"], name="importrow_run_key_idx"),
+            models.Index(fields=["run", "wired", "id"], name="importrow_run_wired_idx"),
+        ]
@@ -0,0 +1,61 @@
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import CursorPagination
+from rest_framework.response import Response
+
+# ============================================================================ #
+# PAGINATION PAR CURSEUR (KEYSET)
+# ============================================================================ #
+# Activée dès que le client envoie ?cursor= ou ?page_size= ; sans ces
+# paramètres les listes restent non paginées (comportement historique).
+# Pas d'OFFSET : chaque page reprend après la dernière clé vue, donc un coût
+# constant quelle que soit la profondeur. Le total (COUNT) est optionnel.
+# Un ?ordering= hors KEYSET_ORDERINGS (ex. title) est refusé dès qu'on pagine.
+
+KEYSET_ORDERINGS = {
+    "-id": ("-id",),
+    "id": ("id",),
+    "created_at": ("created_at", "id"),
+    "-created_at": ("-created_at", "-id"),
+}
+
+
+class KeysetPagination(CursorPagination):
+    page_size = 50
+    page_size_query_param = "page_size"
+    max_page_size = 500
+    ordering = KEYSET_ORDERINGS["-id"]
+    count_query_param = "count"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        params = request.query_params
+        if self.cursor_query_param not in params and self.page_size_query_param not in params:
+            return None
+        self.count = queryset.count() if params.get(self.count_query_param) in ("1", "true") else None
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_ordering(self, request, queryset, view):
+        """
+        ?ordering= : seules les orderings à clé unique (ou départagées par id), 400 sinon.
+        Sans paramètre : l'ordre du queryset s'il est départagé par id (ex. descendants : path, id).
+        """
+        raw = request.query_params.get("ordering")
+        if raw:
+            if raw not in KEYSET_ORDERINGS:
+                raise ValidationError({"ordering": f"Tri '{raw}' incompatible avec la pagination ({', '.join(KEYSET_ORDERINGS)})."})
+            return KEYSET_ORDERINGS[raw]
+        current = tuple(queryset.query.order_by)
+        if current and current[-1].lstrip("-") in ("id", "pk"):
+            return current
+        return self.ordering
+
+    def get_paginated_response(self, data):
+        payload = {"next": self.get_next_link(), "previous": self.get_previous_link()}
+        if self.count is not None:
+            payload["count"] = self.count
+        payload["results"] = data
+        return Response(payload)
+
+    def get_paginated_response_schema(self, schema):
+        response_schema = super().get_paginated_response_schema(schema)
+        response_schema["properties"]["count"] = {"type": "integer", "example": 123}
+        return response_schema
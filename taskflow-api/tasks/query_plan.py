@@ -0,0 +1,76 @@
+import re
+from collections import defaultdict
+
+from django.db import connections
+
+# ============================================================================ #
+# ANALYSE DES PLANS D'EXÉCUTION (EXPLAIN QUERY PLAN, SQLite)
+# ============================================================================ #
+# Chaque requête capturée est rejouée dans EXPLAIN QUERY PLAN ; on relève :
+#   full_scan : "SCAN <table>" sans index (lecture de toute la table)
+#   temp_sort : "USE TEMP B-TREE" (tri / regroupement sans index adapté)
+# Les requêtes de même forme (littéraux retirés) sont regroupées.
+
+NUMBER_RE = re.compile(r"\b\d+(\.\d+)?\b")
+STRING_RE = re.compile(r"'(?:[^']|'')*'")
+# placeholders SQLite (?) ou PostgreSQL / MySQL (%s)
+IN_LIST_RE = re.compile(r"\bIN \((?:(?:\?|%s), )*(?:\?|%s)\)")
+ALIAS_RE = re.compile(r'"(\w+)"\s+(?:AS\s+)?"?(\w+)"?(?=[\s,)]|$)')
+SCAN_RE = re.compile(r"^SCAN (\w+)(.*)$")
+
+
+def fingerprint(sql):
+    """ Forme de la requête : littéraux remplacés par ?, listes IN réduites """
+    shape = STRING_RE.sub("?", sql)
+    shape = NUMBER_RE.sub("?", shape)
+    return IN_LIST_RE.sub("IN (...)", shape)
+
+
+def explain(sql, params=None, using="default"):
+    """ Lignes "detail" du plan SQLite """
+    with connections[using].cursor() as cursor:
+        cursor.execute("EXPLAIN QUERY PLAN " + sql, params)
+        return [row[-1] for row in cursor.fetchall()]
+
+
+def issues(sql, plan, tables=None):
+    """
+    [(type, table ou détail)] pour un plan. `tables` : tables réelles de la base ;
+    les parcours de sous-requêtes (alias "qualify", CTE…) sont alors ignorés.
+    """
+    aliases = {alias: table for table, alias in ALIAS_RE.findall(sql)}
+    found = []
+    for detail in plan:
+        scan = SCAN_RE.match(detail)
+        if scan and "USING" not in scan.group(2) and "VIRTUAL TABLE" not in scan.group(2):
+            table = aliases.get(scan.group(1), scan.group(1))
+            if tables is None or table in tables:
+                found.append(("full_scan", table))
+        elif "USE TEMP B-TREE" in detail:
+            found.append(("temp_sort", detail))
+    return found
+
+
+def analyse(captured, using="default", ignore_tables=()):
+    """
+    `captured` : [(source, sql)] (source = URL rejouée, fichier…).
+    Renvoie les constats regroupés par forme de requête, plus fréquents d'abord.
+    """
+    tables = set(connections[using].introspection.table_names())
+    report = defaultdict(lambda: {"count": 0, "sources": set(), "issues": None, "sql": None})
+    for source, sql in captured:
+        if not sql.lstrip().upper().startswith(("SELECT", "WITH")):
+            continue
+        entry = report[fingerprint(sql)]
+        entry["count"] += 1
+        entry["sources"].add(source)
+        if entry["issues"] is None:
+            entry["sql"] = sql
+            entry["issues"] = [i for i in issues(sql, explain(sql, using=using), tables) if i[1] not in ignore_tables]
+    return sorted(
+        (
+            {"shape": shape, "count": e["count"], "sources": sorted(e["sources"]), "issues": e["issues"], "sql": e["sql"]}
+            for shape, e in report.items() if e["issues"]
+        ),
+        key=lambda r: -r["count"],
+    )
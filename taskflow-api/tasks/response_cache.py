@@ -0,0 +1,153 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.utils.cache import get_conditional_response
+from django.utils.http import parse_http_date_safe
+from rest_framework.response import Response
+
+from core import db_router
+
+# ============================================================================ #
+# CACHE DES RÉPONSES LOURDES (kanban, gantt)
+# ============================================================================ #
+# Les données d'une réponse 200 sont stockées dans le cache Django configuré
+# par RESPONSE_CACHE_ALIAS (locmem, fichier, redis…), sous une clé :
+#   vue + périmètre@version + empreinte des paramètres de requête.
+# Périmètre = projet demandé (?project=), ou "all" sans filtre projet.
+# Invalider un projet = incrémenter sa version et celle de "all" ; les autres
+# projets gardent leurs entrées. On met en cache `response.data` (pas les
+# octets) : la négociation de contenu DRF reste faite à chaque requête.
+# Actif seulement sur un cache partagé entre processus (is_shared) : en mémoire
+# locale, chaque worker garderait sa copie après une écriture d'un autre.
+# Jamais alimenté depuis un réplica : l'entrée porterait la version déjà
+# incrémentée par l'écrivain avec des données d'avant son écriture.
+
+CACHE_PREFIX = "taskflow:responses"
+ALL_PROJECTS = "all"
+HEADER = "X-Response-Cache"
+
+
+LOCAL_BACKENDS = ("LocMemCache", "DummyCache")
+
+
+def _alias():
+    return getattr(settings, "RESPONSE_CACHE_ALIAS", "default")
+
+
+def _cache():
+    return caches[_alias()]
+
+
+def is_shared(alias=None):
+    """
+    Cache commun à tous les processus (fichier, redis…) ? En mémoire locale,
+    une écriture d'un autre processus n'incrémente pas les versions de celui-ci.
+    """
+    backend = settings.CACHES[alias or _alias()]["BACKEND"]
+    return not backend.endswith(LOCAL_BACKENDS)
+
+
+def _version_key(scope):
+    return f"{CACHE_PREFIX}:version:{scope}"
+
+
+def _version(scope):
+    key = _version_key(scope)
+    version = _cache().get(key)
+    if version is None:
+        # version initiale horodatée : une clé évincée ne ressuscite pas d'anciennes entrées
+        _cache().add(key, time.time_ns(), timeout=None)
+        version = _cache().get(key)
+    return version
+
+
+def _modified_key(scope):
+    return f"{CACHE_PREFIX}:modified:{scope}"
+
+
+def _scope(project_id):
+    return str(project_id) if project_id is not None else ALL_PROJECTS
+
+
+def _bump(scopes):
+    for scope in scopes:
+        try:
+            _cache().incr(_version_key(scope))
+        except ValueError:
+            _cache().set(_version_key(scope), time.time_ns(), timeout=None)
+    _cache().set_many({_modified_key(scope): time.time() for scope in scopes}, timeout=None)
+
+
+def invalidate(project_ids):
+    """
+    Périme les réponses de ces projets (et les réponses sans filtre projet).
+    Comme pour le graphe : deuxième incrément au commit de la transaction.
+    """
+    scopes = {str(p) if p is not None else "none" for p in project_ids} | {ALL_PROJECTS}
+    _bump(scopes)
+    transaction.on_commit(lambda: _bump(scopes))
+
+
+def state(project_id=None):
+    """
+    (version, date de la dernière écriture) du projet, ou de toutes les données
+    sans projet : validateurs ETag / Last-Modified sans requête SQL (tasks.conditional).
+    """
+    scope = _scope(project_id)
+    modified = _cache().get(_modified_key(scope))
+    if modified is None:
+        # clé absente (démarrage, éviction) : heure courante, au pire un 200 de trop
+        _cache().add(_modified_key(scope), time.time(), timeout=None)
+        modified = _cache().get(_modified_key(scope))
+    return _version(scope), modified
+
+
+def cache_key(view_name, request, project_id=None):
+    """ `project_id` : entier déjà validé par la vue (même forme que pour invalidate) """
+    scope = _scope(project_id)
+    params = sorted((k, tuple(request.query_params.getlist(k))) for k in request.query_params)
+    digest = hashlib.md5(repr(params).encode()).hexdigest()
+    return f"{CACHE_PREFIX}:{view_name}:{scope}@{_version(scope)}:{digest}"
+
+
+def enabled():
+    return is_shared() and getattr(settings, "RESPONSE_CACHE_TIMEOUT", 60) > 0
+
+
+def cached_response(request, view_name, build_response, project_id=None):
+    """
+    Réponse depuis le cache (0 requête SQL, 304 compris) ou `build_response()`
+    mise en cache si c'est un 200 DRF. En-tête X-Response-Cache : hit / miss
+    (off : cache local ou désactivé).
+    """
+    if not enabled():
+        response = build_response()
+        response[HEADER] = "off"
+        return response
+    key = cache_key(view_name, request, project_id)
+    entry = _cache().get(key)
+    if entry is not None:
+        data, etag, last_modified = entry
+        response = get_conditional_response(
+            request, etag=etag, last_modified=parse_http_date_safe(last_modified) if last_modified else None,
+        )
+        if response is None:
+            response = Response(data)
+        for header, value in (("ETag", etag), ("Last-Modified", last_modified)):
+            if value:
+                response[header] = value
+        response[HEADER] = "hit"
+        return response
+
+    response = build_response()
+    if isinstance(response, Response) and response.status_code == 200 and not db_router.reading_from_replica():
+        _cache().set(
+            key,
+            (response.data, response.get("ETag"), response.get("Last-Modified")),
+            timeout=getattr(settings, "RESPONSE_CACHE_TIMEOUT", 60),
+        )
+    response[HEADER] = "miss"
+    return response
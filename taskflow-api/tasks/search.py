@@ -0,0 +1,135 @@
+import re
+from functools import reduce
+from operator import and_, or_
+
+from django.conf import settings
+from django.db import connection, connections, DEFAULT_DB_ALIAS
+from django.db.models import Q
+from django.utils.module_loading import import_string
+
+from .models import Task, Need
+
+# ============================================================================ #
+# RECHERCHE PLEIN TEXTE (tâches, besoins)
+# ============================================================================ #
+# Backend choisi par SEARCH_BACKEND (chemin pointé) ; par défaut FTS5 sous
+# SQLite (tables virtuelles tenues à jour par triggers, migration 0016), sinon
+# un repli icontains. Un backend renvoie des ids classés par pertinence.
+# Chaque mot est cherché en préfixe ("rap" trouve "rapport"), tous les mots
+# doivent être présents.
+# Une migration qui reconstruit tasks_task ou tasks_need sous SQLite (AlterField,
+# RemoveField…) supprime leurs triggers sans erreur : ils sont recréés après
+# chaque migrate (post_migrate, tasks.apps) et par rebuild_search_index.
+
+SEARCH_INDEXES = {
+    Task: {"table": "tasks_task_fts", "fields": ("title", "module", "target_version"), "weights": (10.0, 2.0, 1.0)},
+    Need: {"table": "tasks_need_fts", "fields": ("title", "description"), "weights": (10.0, 1.0)},
+}
+
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 200
+# au-delà, seuls les N résultats les plus récents sont classés (bm25 coûte par ligne trouvée)
+RANK_CANDIDATES = 5000
+
+WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def terms(query):
+    """ Mots de la requête (ponctuation et opérateurs FTS ignorés) """
+    return WORD_RE.findall(query or "")
+
+
+class ContainsBackend:
+    """ Repli portable : un icontains par mot et par champ (parcours de table) """
+
+    def search(self, model, query, limit):
+        fields = SEARCH_INDEXES[model]["fields"]
+        words = terms(query)
+        if not words:
+            return []
+        condition = reduce(and_, (reduce(or_, (Q(**{f"{name}__icontains": word}) for name in fields)) for word in words))
+        return list(model.objects.filter(condition).order_by("-id").values_list("id", flat=True)[:limit])
+
+
+class Fts5Backend:
+    """
+    Index FTS5 (SQLite) : classement bm25, titre pondéré plus fort.
+    Une requête très large ("a*") ne classe que les RANK_CANDIDATES correspondances
+    les plus récentes : le temps de réponse reste borné quelle que soit la table,
+    mais une correspondance plus ancienne n'est jamais renvoyée, même très pertinente.
+    """
+
+    def match_expression(self, query):
+        return " ".join(f'"{word}"*' for word in terms(query))
+
+    def search(self, model, query, limit):
+        expression = self.match_expression(query)
+        if not expression:
+            return []
+        index = SEARCH_INDEXES[model]
+        weights = ", ".join(str(w) for w in index["weights"])
+        table = index["table"]
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT rowid FROM ("
+                f"  SELECT rowid, bm25({table}, {weights}) AS score FROM {table}"
+                f"  WHERE {table} MATCH %s ORDER BY rowid DESC LIMIT %s"
+                f") ORDER BY score LIMIT %s",
+                [expression, RANK_CANDIDATES, limit],
+            )
+            return [row[0] for row in cursor.fetchall()]
+
+    def triggers(self, model):
+        """ Triggers qui tiennent l'index de `model` à jour (mêmes définitions que la migration 0016) """
+        index = SEARCH_INDEXES[model]
+        source, table, fields = model._meta.db_table, index["table"], index["fields"]
+        columns = ", ".join(fields)
+        new = ", ".join(f"new.{f}" for f in fields)
+        old = ", ".join(f"old.{f}" for f in fields)
+        delete_old = f"INSERT INTO {table}({table}, rowid, {columns}) VALUES ('delete', old.id, {old});"
+        insert_new = f"INSERT INTO {table}(rowid, {columns}) VALUES (new.id, {new});"
+        return {
+            f"{table}_ai": f"CREATE TRIGGER {table}_ai AFTER INSERT ON {source} BEGIN {insert_new} END",
+            f"{table}_ad": f"CREATE TRIGGER {table}_ad AFTER DELETE ON {source} BEGIN {delete_old} END",
+            f"{table}_au": f"CREATE TRIGGER {table}_au AFTER UPDATE OF {columns} ON {source} BEGIN {delete_old} {insert_new} END",
+        }
+
+    def ensure_triggers(self, using=DEFAULT_DB_ALIAS):
+        """
+        Recrée les triggers manquants des index existants et reconstruit ces index
+        (écritures faites sans trigger). Renvoie les noms des triggers recréés.
+        """
+        recreated = []
+        with connections[using].cursor() as cursor:
+            cursor.execute("SELECT name FROM sqlite_master WHERE type IN ('table', 'trigger')")
+            existing = {row[0] for row in cursor.fetchall()}
+            for model, index in SEARCH_INDEXES.items():
+                if index["table"] not in existing:
+                    continue  # migration 0016 pas (ou plus) appliquée
+                missing = {name: sql for name, sql in self.triggers(model).items() if name not in existing}
+                for name, sql in missing.items():
+                    cursor.execute(sql)
+                if missing:
+                    cursor.execute(f"INSERT INTO {index['table']}({index['table']}) VALUES ('rebuild')")
+                    recreated.extend(missing)
+        return recreated
+
+    def rebuild(self):
+        self.ensure_triggers()
+        with connection.cursor() as cursor:
+            for index in SEARCH_INDEXES.values():
+                cursor.execute(f"INSERT INTO {index['table']}({index['table']}) VALUES ('rebuild')")
+
+
+def get_backend():
+    path = getattr(settings, "SEARCH_BACKEND", None)
+    if path:
+        return import_string(path)()
+    return Fts5Backend() if connection.vendor == "sqlite" else ContainsBackend()
+
+
+def search(queryset, query, limit):
+    """ Instances du queryset correspondant à `query`, dans l'ordre de pertinence """
+    ids = get_backend().search(queryset.model, query, limit)
+    found = queryset.in_bulk(ids)
+    return [found[obj_id] for obj_id in ids if obj_id in found]
@@ -1,6 +1,44 @@
 from rest_framework import serializers
 from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db.models import Prefetch
 from .models import Task, Need, NeedTrace, TaskLink, Attachment, Project, ProjectMember
+from .tree import TaskTree
+
+
+# ----------------------------
+# CHAMPS PARTIELS + PLAN DE REQUÊTE
+# ----------------------------
+class SparseFieldsMixin:
+    """
+    Sérialisation partielle : `context["fields"]` restreint les champs rendus.
+    Les sous-classes déclarent les relations nécessaires à chaque champ
+    (`select_plan` / `prefetch_plan`) pour que la vue construise son queryset.
+    """
+    select_plan = {}
+    prefetch_plan = {}
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        wanted = self.context.get("fields")
+        if wanted:
+            unknown = [name for name in wanted if name not in self.fields]
+            if unknown:
+                raise serializers.ValidationError({"fields": f"Champs inconnus : {', '.join(unknown)}."})
+            for name in set(self.fields) - set(wanted):
+                self.fields.pop(name)
+
+    @classmethod
+    def query_plan(cls, wanted=None):
+        """ (select_related, prefetch_related) nécessaires pour les champs `wanted` """
+        select = [rel for name, rel in cls.select_plan.items() if not wanted or name in wanted]
+        prefetch = [rel for name, rel in cls.prefetch_plan.items() if not wanted or name in wanted]
+        return select, prefetch
+
+    @classmethod
+    def plan_queryset(cls, queryset, wanted=None):
+        select, prefetch = cls.query_plan(wanted)
+        return queryset.select_related(*select).prefetch_related(*prefetch)
 
 
 # ----------------------------
@@ -71,7 +109,7 @@ class TaskLinkSerializer(serializers.ModelSerializer):
 # ----------------------------
 # TASK SERIALIZER
 # ----------------------------
-class TaskSerializer(serializers.ModelSerializer):
+class TaskSerializer(SparseFieldsMixin, serializers.ModelSerializer):
 
     owner = UserSerializer(read_only=True)
     reporter = UserSerializer(read_only=True)
@@ -81,12 +119,34 @@ class TaskSerializer(serializers.ModelSerializer):
     attachments = AttachmentSerializer(many=True, read_only=True)
     links = serializers.SerializerMethodField()
 
+    # "children" est résolu par TaskTree, pas par le queryset
+    select_plan = {"owner": "owner", "reporter": "reporter"}
+    prefetch_plan = {
+        "attachments": Prefetch("attachments", queryset=Attachment.objects.order_by("id")),
+        "links": Prefetch("links_from", queryset=TaskLink.objects.order_by("id")),
+    }
+
     class Meta:
         model = Task
-        fields = "__all__"
+        exclude = ["path"]
+
+    def validate_parent(self, parent):
+        if parent is not None:
+            task = self.instance if isinstance(self.instance, Task) else Task()
+            try:
+                task.check_parent(parent)
+            except DjangoValidationError as e:
+                raise serializers.ValidationError(e.messages)
+        return parent
 
     def get_children(self, obj):
-        return TaskSerializer(obj.children.all(), many=True).data
+        # L'arbre est normalement fourni par la vue ; sinon on le charge pour ce seul nœud
+        tree = self.context.get("task_tree")
+        if tree is None:
+            select, prefetch = self.query_plan(self.context.get("fields"))
+            tree = TaskTree([obj], select_related=select, prefetch=prefetch)
+        context = {**self.context, "task_tree": tree}
+        return TaskSerializer(tree.children_of(obj.id), many=True, context=context).data
 
     def get_links(self, obj):
         return [
@@ -100,6 +160,65 @@ class TaskSerializer(serializers.ModelSerializer):
         ]
 
 
+# ----------------------------
+# TASK BULK ITEM SERIALIZER (création en masse)
+# ----------------------------
+class TaskBulkItemSerializer(serializers.ModelSerializer):
+    """
+    Validation d'une ligne d'import sans requête : les clés étrangères sont de
+    simples entiers, vérifiés ensuite par lot (tasks.bulk.check_references).
+    """
+    owner = serializers.IntegerField(required=False, allow_null=True)
+    reporter = serializers.IntegerField(required=False, allow_null=True)
+    project = serializers.IntegerField(required=False, allow_null=True)
+    parent = serializers.IntegerField(required=False, allow_null=True)
+
+    class Meta:
+        model = Task
+        fields = [
+            "title", "status", "type", "priority", "target_version", "module",
+            "start_date", "due_date", "progress", "owner", "reporter", "project", "parent",
+        ]
+
+    def validate_progress(self, value):
+        if not (0 <= value <= 100):
+            raise serializers.ValidationError("Le champ 'progress' doit être entre 0 et 100.")
+        return value
+
+
+# ----------------------------
+# TASK BULK UPDATE SERIALIZER (modification en masse)
+# ----------------------------
+class TaskBulkUpdateSerializer(serializers.ModelSerializer):
+    """ Champs modifiables en masse ; utilisé avec partial=True """
+    owner = serializers.IntegerField(required=False, allow_null=True)
+    project = serializers.IntegerField(required=False, allow_null=True)
+
+    class Meta:
+        model = Task
+        fields = ["status", "priority", "owner", "target_version", "project"]
+
+
+# ----------------------------
+# TASK SYNC SERIALIZER (synchro incrémentale, à plat)
+# ----------------------------
+class TaskSyncSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Task
+        exclude = ["path"]
+
+
+# ----------------------------
+# TASK CARD SERIALIZER (Kanban, sans relations imbriquées)
+# ----------------------------
+class TaskCardSerializer(serializers.ModelSerializer):
+    owner = serializers.ReadOnlyField(source="owner.username")
+
+    class Meta:
+        model = Task
+        fields = ["id", "title", "status", "type", "priority", "owner", "due_date", "progress", "parent"]
+
+
 # ----------------------------
 # NEED SERIALIZER
 # ----------------------------
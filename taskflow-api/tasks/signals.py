@@ -0,0 +1,169 @@
+from django.db.models.signals import post_init, pre_save, post_save, pre_delete, post_delete
+from django.dispatch import receiver
+
+from .models import Task, TaskLink, TaskTombstone, Project, Attachment
+from . import counters
+from . import graph
+from . import response_cache
+
+
+def graph_state(task):
+    """ Ce qui, dans une tâche, influe sur le graphe de dépendances de son projet """
+    return task.__dict__.get("project_id"), task.__dict__.get("start_date"), task.__dict__.get("due_date")
+
+
+@receiver(post_init, sender=Task)
+def remember_loaded_state(sender, instance, **kwargs):
+    instance._counter_state = counters.counter_state(instance)
+    instance._counter_partial = counters.is_partial(instance)
+    instance._graph_state = graph_state(instance)
+    instance._loaded_project_id = instance.__dict__.get("project_id")
+
+
+# ============================================================================ #
+# COMPTEURS PROJET ET PIERRES TOMBALES (synchro incrémentale)
+# ============================================================================ #
+def _complete_counter_state(instance):
+    """ Instance partielle (only/defer) : l'état d'avant est relu en base, une fois """
+    if instance._counter_partial and not instance._state.adding:
+        stored = counters.stored_state(instance)
+        if stored is not None:
+            instance._counter_state = stored
+        instance._counter_partial = False
+
+
+@receiver(pre_save, sender=Task)
+def complete_counter_state(sender, instance, **kwargs):
+    _complete_counter_state(instance)
+
+
+@receiver(post_save, sender=Task)
+def update_counters_on_save(sender, instance, created, **kwargs):
+    old = None if created else instance._counter_state
+    # champ toujours différé : ni assigné ni enregistré, il garde sa valeur d'avant
+    new = counters.counter_state(instance, fallback=old or (None, None))
+    if old == new:
+        return
+    deltas = counters.new_deltas()
+    if old is not None:
+        counters.add_delta(deltas, old, -1)
+    counters.add_delta(deltas, new, +1)
+    counters.apply_deltas(deltas)
+    instance._counter_state = new
+
+
+# Suppression en cascade (projet, sous-arbre) : Django émet pre_delete pour tous
+# les objets avant la première suppression, puis un post_delete par objet.
+# Les tâches sont accumulées sur l'objet à l'origine de la suppression (`origin`)
+# et traitées en une fois au post_delete de la dernière.
+def _deletion(origin):
+    batch = getattr(origin, "_task_deletion", None)
+    if batch is None:
+        batch = origin._task_deletion = {"pending": {}, "deleted": {}, "projects": set()}
+    return batch
+
+
+@receiver(pre_delete, sender=Project)
+def remember_deleted_project(sender, instance, origin=None, **kwargs):
+    _deletion(origin if origin is not None else instance)["projects"].add(instance.pk)
+
+
+@receiver(pre_delete, sender=Task)
+def remember_deleted_task(sender, instance, origin=None, **kwargs):
+    _complete_counter_state(instance)
+    _deletion(origin if origin is not None else instance)["pending"][instance.pk] = instance
+
+
+@receiver(post_delete, sender=Task)
+def apply_task_deletion(sender, instance, origin=None, **kwargs):
+    """ Dernière tâche de la cascade : compteurs (une requête par projet) + pierres tombales (bulk) """
+    batch = _deletion(origin if origin is not None else instance)
+    batch["deleted"][instance.pk] = batch["pending"].pop(instance.pk, instance)
+    if batch["pending"]:
+        return
+    deltas = counters.new_deltas()
+    for task in batch["deleted"].values():
+        # projet supprimé dans la même cascade : rien à décompter
+        if task._counter_state[0] not in batch["projects"]:
+            counters.add_delta(deltas, task._counter_state, -1)
+    counters.apply_deltas(deltas)
+    TaskTombstone.objects.bulk_create([
+        TaskTombstone(task_id=task_id, project_id=task.project_id) for task_id, task in batch["deleted"].items()
+    ])
+    batch["deleted"].clear()
+
+
+# ============================================================================ #
+# INSTANTANÉS DU GRAPHE DE DÉPENDANCES
+# ============================================================================ #
+def _task_projects(instance, fields, origin=None):
+    """
+    Projets des tâches référencées par `fields` (lien : deux extrémités, pièce
+    jointe : sa tâche), sans requête si les tâches sont en cache ou supprimées
+    dans la même cascade (liens et pièces jointes supprimés avant leurs tâches).
+    """
+    fields = [instance._meta.get_field(name) for name in fields]
+    if all(field.is_cached(instance) for field in fields):
+        return {field.get_cached_value(instance).project_id for field in fields}
+    batch = getattr(origin, "_task_deletion", None) or {"pending": {}, "deleted": {}}
+    known = {**batch["pending"], **batch["deleted"]}
+    task_ids = {getattr(instance, field.attname) for field in fields}
+    projects = {known[task_id].project_id for task_id in task_ids & known.keys()}
+    missing = task_ids - known.keys()
+    if missing:
+        projects.update(Task.objects.filter(pk__in=missing).values_list("project_id", flat=True))
+    return projects
+
+
+@receiver(post_save, sender=TaskLink)
+@receiver(post_delete, sender=TaskLink)
+def invalidate_caches_on_link_change(sender, instance, origin=None, **kwargs):
+    """ Graphe et réponses en cache (kanban, gantt) des projets du lien """
+    project_ids = _task_projects(instance, ("src_task", "dst_task"), origin)
+    graph.invalidate(project_ids)
+    response_cache.invalidate(project_ids)
+
+
+@receiver(post_save, sender=Task)
+def invalidate_graph_on_task_save(sender, instance, created, **kwargs):
+    old = None if created else instance._graph_state
+    new = graph_state(instance)
+    if old != new:
+        graph.invalidate({new[0]} | ({old[0]} if old else set()))
+    instance._graph_state = new
+
+
+@receiver(post_delete, sender=Task)
+def invalidate_graph_on_task_delete(sender, instance, **kwargs):
+    graph.invalidate({instance._graph_state[0]})
+
+
+# ============================================================================ #
+# CACHE DES RÉPONSES (kanban, gantt) ET VALIDATEURS ETag (tasks.conditional) :
+# seul le projet touché est invalidé (plus "all")
+# ============================================================================ #
+# (liens : invalidate_caches_on_link_change, avec le graphe)
+@receiver(post_save, sender=Task)
+def invalidate_responses_on_task_save(sender, instance, created, **kwargs):
+    # toute écriture change le contenu des cartes : ancien et nouveau projet
+    old = set() if created else {instance._loaded_project_id}
+    response_cache.invalidate({instance.project_id} | old)
+    instance._loaded_project_id = instance.project_id
+
+
+@receiver(post_delete, sender=Task)
+def invalidate_responses_on_task_delete(sender, instance, **kwargs):
+    response_cache.invalidate({instance.project_id})
+
+
+@receiver(post_save, sender=Project)
+@receiver(post_delete, sender=Project)
+def invalidate_responses_on_project_change(sender, instance, **kwargs):
+    response_cache.invalidate({instance.pk})
+
+
+@receiver(post_save, sender=Attachment)
+@receiver(post_delete, sender=Attachment)
+def invalidate_responses_on_attachment_change(sender, instance, origin=None, **kwargs):
+    # pièces jointes imbriquées dans la liste des tâches
+    response_cache.invalidate(_task_projects(instance, ("task",), origin))
@@ -0,0 +1,79 @@
+import datetime
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import Task, TaskTombstone
+
+# ============================================================================ #
+# SYNCHRO INCRÉMENTALE
+# ============================================================================ #
+# Jeton = "<updated_at en µs depuis l'epoch>:<id>" : position dans l'ordre
+# (updated_at, id). Un appel renvoie les tâches créées/modifiées après cette
+# position (index task_updated_at_idx) et les suppressions (TaskTombstone)
+# survenues depuis.
+# updated_at est posé au save(), pas au commit : une transaction validée après
+# un appel peut porter une date antérieure au jeton rendu. Le jeton final d'une
+# synchro reste donc SYNC_SAFETY_LAG secondes en arrière : l'appel suivant relit
+# cette fenêtre. Le client applique tâches et suppressions par id, un renvoi est
+# sans effet.
+
+DEFAULT_LIMIT = 500
+MAX_LIMIT = 5000
+
+EPOCH = datetime.datetime(1970, 1, 1, tzinfo=datetime.timezone.utc)
+
+
+class InvalidToken(ValueError):
+    pass
+
+
+def encode_token(timestamp, task_id=0):
+    return f"{(timestamp - EPOCH) // datetime.timedelta(microseconds=1)}:{task_id}"
+
+
+def decode_token(token):
+    try:
+        micros, task_id = (int(part) for part in token.split(":"))
+    except ValueError:
+        raise InvalidToken("Jeton de synchro invalide.")
+    return EPOCH + datetime.timedelta(microseconds=micros), task_id
+
+
+def changes_since(token=None, limit=DEFAULT_LIMIT):
+    """
+    Renvoie (tâches modifiées, ids supprimés, nouveau jeton, has_more).
+    Sans jeton : état complet (paginé par `limit`), sans suppressions.
+    """
+    tasks = Task.objects.order_by("updated_at", "id")
+    tombstones = TaskTombstone.objects.order_by("deleted_at", "id")
+    position = (EPOCH, 0)
+    if token:
+        since, since_id = position = decode_token(token)
+        tasks = tasks.filter(Q(updated_at__gt=since) | Q(updated_at=since, id__gt=since_id))
+        tombstones = tombstones.filter(deleted_at__gt=since)
+    else:
+        tombstones = tombstones.none()
+
+    changed = list(tasks[:limit + 1])
+    has_more = len(changed) > limit
+    changed = changed[:limit]
+
+    if has_more:
+        # page suivante : les suppressions postérieures viendront avec elle
+        position = (changed[-1].updated_at, changed[-1].id)
+        tombstones = tombstones.filter(deleted_at__lte=position[0])
+    deleted = list(tombstones.values_list("task_id", "deleted_at"))
+
+    if not has_more:
+        candidates = [position]
+        if changed:
+            candidates.append((changed[-1].updated_at, changed[-1].id))
+        if deleted:
+            candidates.append((deleted[-1][1], 0))
+        position = max(candidates)
+        lag = datetime.timedelta(seconds=getattr(settings, "SYNC_SAFETY_LAG", 5))
+        position = min(position, (timezone.now() - lag, 0))
+
+    return changed, [task_id for task_id, _ in deleted], encode_token(*position), has_more
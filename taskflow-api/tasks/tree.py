@@ -0,0 +1,73 @@
+from collections import defaultdict
+
+from functools import reduce
+from operator import or_
+
+from django.db.models import Q, prefetch_related_objects
+
+from .models import Task, prefix_upper_bound
+
+
+# ============================================================================ #
+# ARBRE DE TÂCHES MATÉRIALISÉ
+# ============================================================================ #
+# Charge tous les descendants d'un ensemble de racines en un nombre borné de
+# requêtes (intervalles sur Task.path), puis assemble la hiérarchie en mémoire.
+# Utilisé par TaskSerializer.get_children à la place de la récursion ORM.
+
+# Nombre maximal de racines par requête (limite de variables SQLite)
+ROOTS_BATCH_SIZE = 500
+
+# Relations chargées par défaut sur chaque nœud de l'arbre
+NODE_SELECT_RELATED = ("owner", "reporter")
+NODE_PREFETCH = ("attachments", "links_from")
+
+
+def descendants_filter(roots):
+    """ Q sélectionnant tous les descendants de `roots` (un intervalle de path par racine) """
+    ranges = []
+    for root in roots:
+        prefix = root.subtree_prefix
+        ranges.append(Q(path__gte=prefix, path__lt=prefix_upper_bound(prefix)))
+    return reduce(or_, ranges)
+
+
+class TaskTree:
+    """
+    Sous-arbres complets des tâches `roots`.
+    Coût : 1 requête par lot de racines + 1 requête par relation préchargée.
+    """
+
+    def __init__(self, roots, select_related=NODE_SELECT_RELATED, prefetch=NODE_PREFETCH):
+        self.roots = list(roots)
+        self.select_related = select_related
+        self.prefetch = prefetch
+        self._children = defaultdict(list)
+        self._load()
+
+    def _load(self):
+        roots = [t for t in self.roots if t.pk is not None]
+        # une racine dont un ancêtre est aussi racine est déjà couverte par son intervalle
+        root_ids = {t.pk for t in roots}
+        roots = [t for t in roots if root_ids.isdisjoint(t.ancestor_ids())]
+        nodes = {}
+        for i in range(0, len(roots), ROOTS_BATCH_SIZE):
+            qs = (
+                Task.objects
+                .filter(descendants_filter(roots[i:i + ROOTS_BATCH_SIZE]))
+                .select_related(*self.select_related)
+            )
+            # un nœud peut descendre de racines de lots différents
+            nodes.update((node.pk, node) for node in qs)
+        nodes = sorted(nodes.values(), key=lambda node: node.pk)
+
+        for node in nodes:
+            self._children[node.parent_id].append(node)
+
+        # Pièces jointes et liens : une requête pour tout l'arbre (racines comprises)
+        # (les instances déjà préchargées sont ignorées par Django)
+        if self.prefetch:
+            prefetch_related_objects(self.roots + nodes, *self.prefetch)
+
+    def children_of(self, task_id):
+        return self._children.get(task_id, [])
@@ -1,3 +1,5 @@
+import json
+
 from rest_framework.exceptions import APIException
 from rest_framework import status, filters, viewsets
 from rest_framework.response import Response
@@ -6,9 +8,24 @@ from rest_framework.decorators import action
 from rest_framework.parsers import MultiPartParser, FormParser
 from django.shortcuts import get_object_or_404
 from django.db import transaction
-
-from .models import Task, Need, NeedTrace, TaskLink, Attachment, Project
-from .serializers import TaskSerializer, NeedSerializer, TaskLinkSerializer, AttachmentSerializer, ProjectSerializer
+from django.http import StreamingHttpResponse
+from django.core.files.storage import default_storage
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils.dateparse import parse_date
+
+from .models import Task, Need, NeedTrace, TaskLink, Attachment, Project, ImportRun
+from .serializers import TaskSerializer, TaskCardSerializer, TaskBulkItemSerializer, TaskBulkUpdateSerializer, TaskSyncSerializer, NeedSerializer, TaskLinkSerializer, AttachmentSerializer, ProjectSerializer
+from .tree import TaskTree
+from .pagination import KeysetPagination
+from . import kanban as kanban_engine
+from . import bulk
+from . import graph as graph_engine
+from . import sync as sync_engine
+from . import conditional
+from . import response_cache
+from . import export as export_engine
+from . import importer
+from . import search as search_engine
 
 # ============================================================================ #
 # EXCEPTION MÉTIER
@@ -24,11 +41,63 @@ class BusinessRuleException(APIException):
 class TaskViewSet(viewsets.ModelViewSet):
     queryset = Task.objects.all().order_by('-id')
     serializer_class = TaskSerializer
+    pagination_class = KeysetPagination
 
     filter_backends = [filters.SearchFilter, filters.OrderingFilter, DjangoFilterBackend]
     search_fields = ['title', 'status']
     ordering_fields = ['created_at', 'title']
-    filterset_fields = ['status']
+    filterset_fields = ['status', 'project', 'owner', 'due_date']
+
+    # ----------------- CHAMPS PARTIELS (?fields=) -----------------
+    def get_requested_fields(self):
+        """ Champs demandés via ?fields=id,title,status (lecture uniquement) """
+        if self.request is None or self.request.method not in ("GET", "HEAD"):
+            return None
+        raw = self.request.query_params.get("fields")
+        if not raw:
+            return None
+        return [name.strip() for name in raw.split(",") if name.strip()]
+
+    # ----------------- QUERYSET PLANIFIÉ -----------------
+    def get_queryset(self):
+        """ select_related / prefetch_related déduits des champs sérialisés (list/retrieve) """
+        queryset = super().get_queryset()
+        if self.action not in ("list", "retrieve"):
+            return queryset
+        return self.get_serializer_class().plan_queryset(queryset, self.get_requested_fields())
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context["fields"] = self.get_requested_fields()
+        return context
+
+    # ----------------- LIST (ETag / Last-Modified) -----------------
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        fields = self.get_requested_fields()
+        nested = not fields or bool({"children", "attachments", "links"} & set(fields))
+        return conditional.respond(
+            request, queryset, lambda: super(TaskViewSet, self).list(request, *args, **kwargs), nested=nested,
+        )
+
+    # ----------------- SERIALIZER + ARBRE -----------------
+    def get_serializer(self, *args, **kwargs):
+        """
+        Lecture (list/retrieve) : charge en une fois les sous-arbres des tâches
+        sérialisées et les transmet au serializer via le contexte.
+        """
+        kwargs.setdefault("context", self.get_serializer_context())
+        fields = kwargs["context"].get("fields")
+        if args and "data" not in kwargs and (not fields or "children" in fields):
+            instances = args[0]
+            if isinstance(instances, Task):
+                instances = [instances]
+            else:
+                # évalue le queryset une seule fois ; le serializer réutilise ce cache
+                instances = list(instances)
+            select, prefetch = self.get_serializer_class().query_plan(fields)
+            kwargs["context"]["task_tree"] = TaskTree(instances, select_related=select, prefetch=prefetch)
+        return super().get_serializer(*args, **kwargs)
 
     # ----------------- CREATE (single or bulk) -----------------
     def create(self, request, *args, **kwargs):
@@ -43,23 +112,86 @@ class TaskViewSet(viewsets.ModelViewSet):
             # Auto-inject owner when missing and user authenticated
             if user:
                 for item in tasks_data:
-                    item.setdefault("owner", user.id)
-            serializer = self.get_serializer(data=tasks_data, many=True)
-        else:
-            data = request.data.copy()
-            if user and not data.get("owner"):
-                data["owner"] = user.id
-            serializer = self.get_serializer(data=data)
-
+                    if isinstance(item, dict):
+                        item.setdefault("owner", user.id)
+            return self.bulk_create(request, tasks_data)
+
+        data = request.data.copy()
+        if user and not data.get("owner"):
+            data["owner"] = user.id
+        serializer = self.get_serializer(data=data)
         serializer.is_valid(raise_exception=True)
         self.perform_create(serializer)
         return Response({"message": "Tâches créées", "data": serializer.data}, status=status.HTTP_201_CREATED)
 
+    # ----------------- BULK CREATE -----------------
+    def bulk_create(self, request, tasks_data):
+        """
+        Création en masse : validation de toutes les lignes puis bulk_create
+        par lots dans une transaction. Réponse : ids créés, ou objets complets
+        avec ?full=1.
+        """
+        serializer = TaskBulkItemSerializer(data=tasks_data, many=True)
+        serializer.is_valid(raise_exception=True)
+        rows = serializer.validated_data
+
+        errors = bulk.check_references(rows)
+        if errors:
+            return Response({"errors": errors}, status=status.HTTP_400_BAD_REQUEST)
+
+        created = bulk.bulk_create_tasks(rows)
+        ids = [t.id for t in created]
+        payload = {"message": "Tâches créées", "count": len(ids), "ids": ids}
+        if request.query_params.get("full") in ("1", "true"):
+            queryset = self.get_serializer_class().plan_queryset(Task.objects.filter(pk__in=ids).order_by("id"))
+            payload["data"] = self.get_serializer(queryset, many=True).data
+        return Response(payload, status=status.HTTP_201_CREATED)
+
+    # ----------------- BULK UPDATE -----------------
+    @action(detail=False, methods=["post"])
+    def bulk_update(self, request):
+        """
+        Modification en masse, en une transaction :
+          { "ids": [1, 2, 3], "changes": {"status": "Fait"} }
+          { "updates": [{"id": 1, "status": "Fait"}, {"id": 2, "owner": 3}] }
+        Réponse : résultat par id ("updated" / "not_found").
+        """
+        if "updates" in request.data:
+            items = request.data.get("updates")
+            if not isinstance(items, list) or not all(isinstance(i, dict) and "id" in i for i in items):
+                return Response({"error": "Le champ 'updates' doit être une liste d'objets avec 'id'."}, status=status.HTTP_400_BAD_REQUEST)
+        else:
+            ids, changes = request.data.get("ids"), request.data.get("changes")
+            if not isinstance(ids, list) or not isinstance(changes, dict):
+                return Response({"error": "Champs requis : ids (liste), changes (objet)."}, status=status.HTTP_400_BAD_REQUEST)
+            items = [{**changes, "id": task_id} for task_id in ids]
+        if not all(isinstance(item["id"], int) for item in items):
+            return Response({"error": "Les ids doivent être des entiers."}, status=status.HTTP_400_BAD_REQUEST)
+
+        updates, errors = {}, {}
+        for item in items:
+            serializer = TaskBulkUpdateSerializer(data=item, partial=True)
+            if serializer.is_valid():
+                updates[item["id"]] = serializer.validated_data
+            else:
+                errors[item["id"]] = serializer.errors
+        if not errors:
+            for index, field_errors in bulk.check_references(list(updates.values())).items():
+                errors[list(updates)[index]] = field_errors
+        if errors:
+            return Response({"errors": errors}, status=status.HTTP_400_BAD_REQUEST)
+
+        outcomes = bulk.bulk_update_tasks(updates)
+        return Response({
+            "updated": sum(1 for r in outcomes.values() if r == "updated"),
+            "results": [{"id": task_id, "result": result} for task_id, result in outcomes.items()],
+        }, status=status.HTTP_200_OK)
+
     # ----------------- OVERRIDE perform_create POUR OWNER -----------------
     def perform_create(self, serializer):
         """
         Pour single: si owner absent et user authentifié, on assigne.
-        Pour many: serializer.save() gère la création en masse.
+        (la création en masse passe par bulk_create)
         """
         try:
             # DRF ModelSerializer.save accepte kwargs ; pour la plupart des cas, laisser passer
@@ -79,10 +211,31 @@ class TaskViewSet(viewsets.ModelViewSet):
     @action(detail=True, methods=["get"])
     def children(self, request, pk=None):
         task = self.get_object()
-        children = task.children.all()
-        serializer = TaskSerializer(children, many=True, context={"request": request})
+        context = self.get_serializer_context()
+        select, prefetch = TaskSerializer.query_plan(context["fields"])
+        context["task_tree"] = TaskTree([task], select_related=select, prefetch=prefetch)
+        serializer = TaskSerializer(context["task_tree"].children_of(task.id), many=True, context=context)
         return Response(serializer.data, status=status.HTTP_200_OK)
 
+    # ----------------- ANCESTORS / DESCENDANTS -----------------
+    @action(detail=True, methods=["get"])
+    def ancestors(self, request, pk=None):
+        """ Chaîne racine -> parent (une requête sur les ids du path) """
+        task = self.get_object()
+        by_id = {t.id: t for t in task.ancestors().select_related("owner")}
+        chain = [by_id[i] for i in task.ancestor_ids() if i in by_id]
+        return Response(TaskCardSerializer(chain, many=True).data, status=status.HTTP_200_OK)
+
+    @action(detail=True, methods=["get"])
+    def descendants(self, request, pk=None):
+        """ Tous les descendants à plat, groupés par parent (un intervalle sur path) """
+        task = self.get_object()
+        qs = task.descendants().select_related("owner").order_by("path", "id")
+        page = self.paginate_queryset(qs)
+        if page is not None:
+            return self.get_paginated_response(TaskCardSerializer(page, many=True).data)
+        return Response(TaskCardSerializer(qs, many=True).data, status=status.HTTP_200_OK)
+
     # ----------------- LINK -----------------
     @action(detail=True, methods=["post"])
     def link(self, request, pk=None):
@@ -98,14 +251,61 @@ class TaskViewSet(viewsets.ModelViewSet):
 
         serializer = TaskLinkSerializer(data=payload)
         serializer.is_valid(raise_exception=True)
+
+        # Lien d'ordonnancement : refusé s'il ferme un cycle de dépendances.
+        # Contrôle et insertion dans la même transaction, extrémités verrouillées
+        # (ordre des ids) : deux liens concurrents sur les mêmes tâches se suivent.
+        # Graphe relu en base depuis la cible, jamais depuis un instantané en cache.
+        edge = graph_engine.ordering_edge(link_type, src.id, dst.id)
         try:
             with transaction.atomic():
+                list(Task.objects.select_for_update().filter(pk__in=[src.id, dst.id]).order_by("pk").values_list("pk"))
+                if edge and graph_engine.creates_cycle(*edge):
+                    return Response({"error": "Ce lien créerait un cycle de dépendances."}, status=status.HTTP_400_BAD_REQUEST)
                 link = serializer.save()
         except Exception as e:
             return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
         return Response(TaskLinkSerializer(link).data, status=status.HTTP_201_CREATED)
 
+    # ----------------- DÉPENDANCES -----------------
+    @action(detail=True, methods=["get"])
+    def blockers(self, request, pk=None):
+        """ Tâches à terminer avant celle-ci (transitivement, via blocks / depends_on) """
+        task = self.get_object()
+        graph = graph_engine.load_graph({task.project_id})
+        ids = graph.blockers(task.id)
+        blockers = Task.objects.filter(pk__in=ids).select_related("owner").order_by("id")
+        response = Response({"ids": ids, "tasks": TaskCardSerializer(blockers, many=True).data}, status=status.HTTP_200_OK)
+        response["X-Graph-Cache"] = "hit" if graph.cached else "miss"
+        return response
+
+    @action(detail=False, methods=["get"])
+    def dependencies(self, request):
+        """ ?project=<id> : ordre topologique + chemin critique (durées start_date -> due_date) """
+        project_id = request.query_params.get("project")
+        if project_id and not project_id.isdigit():
+            return Response({"error": "Projet invalide."}, status=status.HTTP_400_BAD_REQUEST)
+        graph = graph_engine.load_graph({int(project_id) if project_id else None})
+        try:
+            order = graph.topological_order()
+            duration, path = graph.critical_path()
+        except graph_engine.CycleError as e:
+            return Response({"error": str(e)}, status=status.HTTP_409_CONFLICT)
+        response = Response({
+            "tasks": len(graph),
+            "links": graph.edge_count,
+            "order": order,
+            "critical_path": {"duration": duration, "tasks": path},
+        }, status=status.HTTP_200_OK)
+        response["X-Graph-Cache"] = "hit" if graph.cached else "miss"
+        return response
+
+    @action(detail=False, methods=["get"])
+    def graph_cache(self, request):
+        """ Compteurs hit/miss du cache des graphes de dépendances """
+        return Response(graph_engine.cache_stats(), status=status.HTTP_200_OK)
+
     # ----------------- UPLOAD -----------------
     @action(detail=True, methods=["post"], parser_classes=[MultiPartParser, FormParser])
     def upload(self, request, pk=None):
@@ -120,48 +320,205 @@ class TaskViewSet(viewsets.ModelViewSet):
         serializer = AttachmentSerializer(attachment, context={"request": request})
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
+    # ----------------- SYNC -----------------
+    @action(detail=False, methods=["get"])
+    def sync(self, request):
+        """
+        ?since=<sync_token>&limit=<n> : tâches créées/modifiées + ids supprimés depuis le jeton.
+        Rappeler avec le `sync_token` renvoyé ; tant que `has_more`, rappeler immédiatement.
+        """
+        limit = kanban_engine.parse_limit(request.query_params.get("limit"), default=sync_engine.DEFAULT_LIMIT,
+                                          maximum=sync_engine.MAX_LIMIT)
+        try:
+            changed, deleted, token, has_more = sync_engine.changes_since(request.query_params.get("since"), limit)
+        except sync_engine.InvalidToken as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({
+            "changed": TaskSyncSerializer(changed, many=True).data,
+            "deleted": deleted,
+            "sync_token": token,
+            "has_more": has_more,
+        }, status=status.HTTP_200_OK)
+
+    # ----------------- RECHERCHE -----------------
+    @action(detail=False, methods=["get"])
+    def search(self, request):
+        """ ?q=<mots>&limit=<n> : tâches classées par pertinence (titre, module, version) """
+        return _search_response(request, Task.objects.select_related("owner"), TaskCardSerializer)
+
     # ----------------- KANBAN -----------------
     @action(detail=False, methods=["get"])
     def kanban(self, request):
-        project_id = request.query_params.get("project")
-        qs = self.queryset
-        if project_id:
+        """
+        ?project=<id>&limit=<n>            : plateau complet (compteurs + n premières cartes)
+        ?status=<statut>&cursor=<id>       : cartes suivantes d'une seule colonne
+        """
+        try:
+            project_id = _project_param(request)
+        except ValueError:
+            return Response({"error": "Projet invalide."}, status=status.HTTP_400_BAD_REQUEST)
+        column = request.query_params.get("status")
+        limit = kanban_engine.parse_limit(request.query_params.get("limit"))
+
+        qs = Task.objects.select_related("owner")
+        if project_id is not None:
             qs = qs.filter(project_id=project_id)
 
-        board = {"À faire": [], "En cours": [], "Fait": [], "Nouveau": []}
-        for task in qs:
-            board.get(task.status, []).append(TaskSerializer(task).data)
-
-        return Response(board, status=status.HTTP_200_OK)
+        cursor = request.query_params.get("cursor")
+        try:
+            cursor = int(cursor) if cursor else None
+        except ValueError:
+            return Response({"error": "Curseur invalide."}, status=status.HTTP_400_BAD_REQUEST)
+
+        def render():
+            if column:
+                cards, next_cursor = kanban_engine.load_column(qs, column, cursor, limit)
+                return Response({
+                    "status": column,
+                    "cards": TaskCardSerializer(cards, many=True).data,
+                    "next_cursor": next_cursor,
+                }, status=status.HTTP_200_OK)
+
+            board = kanban_engine.build_board(qs, limit)
+            for col in board.values():
+                col["cards"] = TaskCardSerializer(col["cards"], many=True).data
+            return Response(board, status=status.HTTP_200_OK)
+
+        return response_cache.cached_response(
+            request, "kanban", lambda: conditional.respond(request, qs, render, project_id), project_id,
+        )
 
     # ----------------- GANTT -----------------
+    GANTT_FIELDS = ("id", "title", "start_date", "due_date", "progress", "parent_id")
+
     @action(detail=False, methods=["get"])
     def gantt(self, request):
-        project_id = request.query_params.get("project")
-        qs = self.queryset.filter(start_date__isnull=False, due_date__isnull=False)
-        if project_id:
+        """
+        ?project=<id>                : tâches datées du projet
+        ?from=AAAA-MM-JJ&to=...      : seulement les tâches chevauchant la fenêtre
+        ?stream=1                    : export JSON lines en flux (mémoire constante)
+        """
+        try:
+            project_id = _project_param(request)
+        except ValueError:
+            return Response({"error": "Projet invalide."}, status=status.HTTP_400_BAD_REQUEST)
+        qs = Task.objects.filter(start_date__isnull=False, due_date__isnull=False)
+        if project_id is not None:
             qs = qs.filter(project_id=project_id)
 
-        result = [
-            {
-                "id": t.id,
-                "title": t.title,
-                "start_date": t.start_date,
-                "due_date": t.due_date,
-                "progress": t.progress,
-                "parent": t.parent_id,
-            }
-            for t in qs
-        ]
-        return Response(result, status=status.HTTP_200_OK)
+        window = {}
+        for param in ("from", "to"):
+            raw = request.query_params.get(param)
+            if raw:
+                try:
+                    window[param] = parse_date(raw)
+                except ValueError:
+                    window[param] = None
+                if window[param] is None:
+                    return Response({"error": f"Date invalide pour '{param}' (AAAA-MM-JJ)."}, status=status.HTTP_400_BAD_REQUEST)
+        # chevauchement : la tâche commence avant la fin de la fenêtre et finit après son début
+        if "to" in window:
+            qs = qs.filter(start_date__lte=window["to"])
+        if "from" in window:
+            qs = qs.filter(due_date__gte=window["from"])
+
+        rows = qs.order_by("start_date", "id").values(*self.GANTT_FIELDS)
+
+        def render():
+            if request.query_params.get("stream") in ("1", "true"):
+                lines = (json.dumps(_gantt_row(row), cls=DjangoJSONEncoder) + "\n" for row in rows.iterator(chunk_size=2000))
+                return StreamingHttpResponse(lines, content_type="application/x-ndjson")
+            return Response([_gantt_row(row) for row in rows], status=status.HTTP_200_OK)
+
+        # le flux NDJSON n'est pas mis en cache (cached_response ne garde que les Response DRF)
+        return response_cache.cached_response(
+            request, "gantt", lambda: conditional.respond(request, qs, render, project_id), project_id,
+        )
+
+
+    # ----------------- EXPORT -----------------
+    @action(detail=False, methods=["get"])
+    def export(self, request):
+        """
+        ?output=csv|jsonl           : toutes les tâches filtrées, en flux (CSV par défaut)
+        ?fields=id,title,owner      : colonnes (voir export.TASK_COLUMNS)
+        Mêmes filtres que la liste : status, project, owner, due_date, search, ordering.
+        """
+        queryset = self.filter_queryset(self.get_queryset())
+        try:
+            columns = export_engine.select_columns(export_engine.TASK_COLUMNS, self.get_requested_fields())
+            return export_engine.response(queryset, columns, request.query_params.get("output", "csv"), "tasks")
+        except export_engine.InvalidExport as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    # ----------------- IMPORT -----------------
+    @action(detail=False, methods=["post"], url_path="import", parser_classes=[MultiPartParser, FormParser])
+    def import_file(self, request):
+        """
+        Fichier `file` (.csv ou .jsonl, `format` pour forcer) : import en masse,
+        exécuté hors requête (importer.launch). Réponse 202 : rapport de l'import
+        en attente ; avancement et erreurs sur GET import/<id>/.
+        """
+        file = request.FILES.get("file", None)
+        if not file:
+            return Response({"error": "Aucun fichier envoyé."}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            fmt = importer.detect_format(file.name, request.data.get("format"))
+        except importer.ImportFailed as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        name = default_storage.save(f"imports/{file.name}", file)
+        run = importer.start(default_storage.path(name), source=file.name, fmt=fmt,
+                             user=request.user if request.user.is_authenticated else None)
+        importer.launch(run)
+        return Response(importer.report(run), status=status.HTTP_202_ACCEPTED)
+
+    @action(detail=False, methods=["get", "post"], url_path=r"import/(?P<run_id>\d+)")
+    def import_run(self, request, run_id=None):
+        """ GET : rapport d'un import (?errors=<n>) ; POST : reprise hors requête d'un import interrompu """
+        run = get_object_or_404(ImportRun, pk=run_id)
+        if request.method == "POST" and run.status != "done":
+            if not importer.claimable(run):
+                return Response({"error": f"Import {run.id} déjà en cours."}, status=status.HTTP_409_CONFLICT)
+            importer.launch(run)
+            return Response(importer.report(run), status=status.HTTP_202_ACCEPTED)
+        limit = kanban_engine.parse_limit(request.query_params.get("errors"), default=100, maximum=1000)
+        return Response(importer.report(run, limit), status=status.HTTP_200_OK)
+
+
+def _project_param(request):
+    """
+    ?project= en entier (None si absent ; ValueError sinon) : la même valeur sert
+    au filtre et à la clé de cache, "07" et "7" désignent le même périmètre.
+    """
+    raw = request.query_params.get("project")
+    return int(raw) if raw else None
+
+
+def _gantt_row(row):
+    """ Ligne Gantt : expose parent_id sous le nom historique 'parent' """
+    row["parent"] = row.pop("parent_id")
+    return row
+
+
+def _search_response(request, queryset, serializer_class):
+    """ Action `search` commune aux tâches et aux besoins """
+    query = request.query_params.get("q", "")
+    if not search_engine.terms(query):
+        return Response({"error": "Paramètre 'q' requis."}, status=status.HTTP_400_BAD_REQUEST)
+    limit = kanban_engine.parse_limit(request.query_params.get("limit"), default=search_engine.DEFAULT_LIMIT,
+                                      maximum=search_engine.MAX_LIMIT)
+    results = search_engine.search(queryset, query, limit)
+    return Response(serializer_class(results, many=True).data, status=status.HTTP_200_OK)
 
 
 # ============================================================================ #
 # NEED VIEWSET
 # ============================================================================ #
 class NeedViewSet(viewsets.ModelViewSet):
-    queryset = Need.objects.all().order_by('-id')
+    queryset = Need.objects.select_related('owner').order_by('-id')
     serializer_class = NeedSerializer
+    pagination_class = KeysetPagination
 
     # ----------------- CREATE -----------------
     def create(self, request, *args, **kwargs):
@@ -208,13 +565,54 @@ class NeedViewSet(viewsets.ModelViewSet):
             raise BusinessRuleException("Impossible de supprimer un besoin 'En cours'.")
         return super().destroy(request, *args, **kwargs)
 
+    # ----------------- RECHERCHE -----------------
+    @action(detail=False, methods=["get"])
+    def search(self, request):
+        """ ?q=<mots>&limit=<n> : besoins classés par pertinence (titre, description) """
+        return _search_response(request, self.get_queryset(), NeedSerializer)
+
+    # ----------------- EXPORT DE L'HISTORIQUE -----------------
+    @action(detail=False, methods=["get"], url_path="traces/export")
+    def export_traces(self, request):
+        """
+        ?output=csv|jsonl                        : historique (NeedTrace) en flux
+        ?need=<id>&user=<id>&new_status=<statut>  : filtres
+        ?from=AAAA-MM-JJ&to=AAAA-MM-JJ            : traces de cette période (bornes incluses)
+        """
+        params = request.query_params
+        qs = NeedTrace.objects.order_by("id")
+        for param in ("need", "user"):
+            raw = params.get(param)
+            if raw:
+                if not raw.isdigit():
+                    return Response({"error": f"Identifiant invalide pour '{param}'."}, status=status.HTTP_400_BAD_REQUEST)
+                qs = qs.filter(**{f"{param}_id": int(raw)})
+        if params.get("new_status"):
+            qs = qs.filter(new_status=params["new_status"])
+        for param, lookup in (("from", "timestamp__date__gte"), ("to", "timestamp__date__lte")):
+            raw = params.get(param)
+            if raw:
+                try:
+                    day = parse_date(raw)
+                except ValueError:
+                    day = None
+                if day is None:
+                    return Response({"error": f"Date invalide pour '{param}' (AAAA-MM-JJ)."}, status=status.HTTP_400_BAD_REQUEST)
+                qs = qs.filter(**{lookup: day})
+        try:
+            return export_engine.response(qs, export_engine.NEED_TRACE_COLUMNS, params.get("output", "csv"), "need_traces")
+        except export_engine.InvalidExport as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
 
 # ============================================================================ #
 # PROJECT VIEWSET
 # ============================================================================ #
 class ProjectViewSet(viewsets.ModelViewSet):
-    queryset = Project.objects.all().order_by("-id")
+    # progression vient des compteurs dénormalisés : aucune requête par projet
+    queryset = Project.objects.select_related("owner").prefetch_related("projectmember_set__user").order_by("-id")
     serializer_class = ProjectSerializer
+    pagination_class = KeysetPagination
 
     def perform_create(self, serializer):
         serializer.save(owner=self.request.user if self.request.user.is_authenticated else None)
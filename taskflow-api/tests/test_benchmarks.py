@@ -0,0 +1,59 @@
+import json
+
+import pytest
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from tasks import benchmarks
+from tasks.models import Task, TaskLink, Project
+
+
+@pytest.fixture
+def seeded(db):
+    return benchmarks.seed("tiny", seed_value=1)
+
+
+# ---------------------------
+# Jeu de données
+# ---------------------------
+def test_seed_builds_deep_chains(seeded):
+    assert seeded["tasks"] == Task.objects.count() == 400
+    assert seeded["links"] == TaskLink.objects.count()
+    # chaînes de profondeur 10 : chemin matérialisé cohérent avec le parent
+    deepest = Task.objects.order_by("-id").first()
+    assert deepest.ancestor_ids() == list(range(deepest.id - 9, deepest.id))
+    # compteurs dénormalisés reconstruits
+    assert sum(Project.objects.values_list("tasks_total", flat=True)) == 400
+
+
+# ---------------------------
+# Mesures et rapport
+# ---------------------------
+def test_run_measures_every_scenario(seeded):
+    report = benchmarks.run(repeat=1, warmup=0)
+    assert set(report["results"]) == {
+        "task_list", "task_list_filtered", "task_retrieve", "kanban", "gantt",
+        "search", "bulk_create", "need_update", "admin_dashboard",
+    }
+    for name, result in report["results"].items():
+        assert result["status"] < 400, name
+        assert result["min_ms"] <= result["median_ms"] <= result["max_ms"]
+        assert result["queries"] > 0 and result["peak_kb"] > 0
+    assert report["meta"]["dataset"]["tasks"] >= 400
+
+
+def test_compare_reports_median_delta():
+    before = {"results": {"kanban": {"median_ms": 10.0, "queries": 4}}}
+    after = {"results": {"kanban": {"median_ms": 12.5, "queries": 3}, "gantt": {"median_ms": 1.0, "queries": 1}}}
+    assert benchmarks.compare(after, before) == [("kanban", 10.0, 12.5, 25.0, 4, 3)]
+
+
+def test_command_writes_report(db, tmp_path):
+    output = tmp_path / "report.json"
+    call_command("benchmark", scale="tiny", repeat=1, only=["task_list", "kanban"], output=str(output))
+    report = json.loads(output.read_text(encoding="utf-8"))
+    assert set(report["results"]) == {"task_list", "kanban"}
+    assert report["meta"]["scale"] == "tiny"
+
+    # base déjà peuplée : refus sans --reuse
+    with pytest.raises(CommandError):
+        call_command("benchmark", scale="tiny", output=str(output))
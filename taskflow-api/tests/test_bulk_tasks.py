@@ -0,0 +1,115 @@
+import pytest
+from rest_framework.test import APIClient
+from django.contrib.auth.models import User
+from tasks.models import Task, Project
+
+
+# ---------------------------
+# Fixture utilisateur
+# ---------------------------
+@pytest.fixture
+def romain(db):
+    return User.objects.create_user(username="Romain.Ponton", password="pwd123")
+
+
+def _rows(count, **extra):
+    return [{"title": f"Import {i}", "status": "À faire", **extra} for i in range(count)]
+
+
+# ---------------------------
+# Création en masse
+# ---------------------------
+@pytest.mark.django_db
+def test_bulk_create_returns_ids(romain, django_assert_max_num_queries):
+    project = Project.objects.create(name="Import", code="IMP")
+    client = APIClient()
+    client.force_authenticate(user=romain)
+    with django_assert_max_num_queries(12):
+        resp = client.post('/api/tasks/', {"tasks": _rows(200, project=project.id)}, format='json')
+    assert resp.status_code == 201
+    body = resp.json()
+    assert body["count"] == 200
+    assert "data" not in body
+    assert sorted(body["ids"]) == sorted(Task.objects.values_list("id", flat=True))
+    assert Task.objects.filter(owner=romain).count() == 200
+    project.refresh_from_db()
+    assert project.tasks_total == 200
+    assert project.tasks_todo == 200
+
+
+@pytest.mark.django_db
+def test_bulk_create_full_response():
+    client = APIClient()
+    resp = client.post('/api/tasks/?full=1', {"tasks": _rows(3)}, format='json')
+    assert resp.status_code == 201
+    data = resp.json()["data"]
+    assert [t["title"] for t in data] == ["Import 0", "Import 1", "Import 2"]
+    assert data[0]["children"] == []
+
+
+@pytest.mark.django_db
+def test_bulk_create_is_all_or_nothing():
+    client = APIClient()
+    rows = _rows(3)
+    rows[1]["status"] = "Inconnu"
+    resp = client.post('/api/tasks/', {"tasks": rows}, format='json')
+    assert resp.status_code == 400
+    assert Task.objects.count() == 0
+
+
+@pytest.mark.django_db
+def test_bulk_create_unknown_reference():
+    client = APIClient()
+    rows = _rows(2)
+    rows[1]["project"] = 999
+    resp = client.post('/api/tasks/', {"tasks": rows}, format='json')
+    assert resp.status_code == 400
+    assert "project" in resp.json()["errors"]["1"]
+    assert Task.objects.count() == 0
+
+
+# ---------------------------
+# Modification en masse
+# ---------------------------
+@pytest.mark.django_db
+def test_bulk_update_uniform_changes(django_assert_max_num_queries):
+    project = Project.objects.create(name="Sprint", code="SPR")
+    tasks = Task.objects.bulk_create([Task(title=f"T{i}", status="En cours", project=project) for i in range(50)])
+    ids = [t.id for t in tasks]
+    client = APIClient()
+    with django_assert_max_num_queries(8):
+        resp = client.post('/api/tasks/bulk_update/', {"ids": ids + [999999], "changes": {"status": "Fait", "priority": "high"}}, format='json')
+    assert resp.status_code == 200
+    body = resp.json()
+    assert body["updated"] == 50
+    assert {"id": 999999, "result": "not_found"} in body["results"]
+    assert Task.objects.filter(status="Fait", priority="high").count() == 50
+    project.refresh_from_db()
+    assert project.tasks_done == 50
+    assert project.progression == 100
+
+
+@pytest.mark.django_db
+def test_bulk_update_per_task_changes(romain):
+    t1 = Task.objects.create(title="A")
+    t2 = Task.objects.create(title="B")
+    client = APIClient()
+    resp = client.post('/api/tasks/bulk_update/', {"updates": [
+        {"id": t1.id, "status": "En cours"},
+        {"id": t2.id, "owner": romain.id, "target_version": "v2"},
+    ]}, format='json')
+    assert resp.status_code == 200
+    t1.refresh_from_db()
+    t2.refresh_from_db()
+    assert (t1.status, t1.owner) == ("En cours", None)
+    assert (t2.status, t2.owner, t2.target_version) == ("À faire", romain, "v2")
+
+
+@pytest.mark.django_db
+def test_bulk_update_rejects_invalid_status():
+    task = Task.objects.create(title="A")
+    client = APIClient()
+    resp = client.post('/api/tasks/bulk_update/', {"ids": [task.id], "changes": {"status": "Archivé"}}, format='json')
+    assert resp.status_code == 400
+    task.refresh_from_db()
+    assert task.status == "À faire"
@@ -0,0 +1,98 @@
+import pytest
+from django.core.files.base import ContentFile
+from rest_framework.test import APIClient
+from tasks.models import Task, Project, Attachment
+
+
+@pytest.fixture
+def shared_cache(settings, tmp_path):
+    settings.CACHES = {
+        **settings.CACHES,
+        "responses": {"BACKEND": "django.core.cache.backends.filebased.FileBasedCache", "LOCATION": str(tmp_path / "cache")},
+    }
+
+
+# ---------------------------
+# Tests
+# ---------------------------
+@pytest.mark.django_db
+@pytest.mark.parametrize("url", ['/api/tasks/', '/api/tasks/kanban/?project={p}', '/api/tasks/gantt/?project={p}'])
+def test_etag_roundtrip_returns_304(url, django_assert_max_num_queries):
+    project = Project.objects.create(name="P", code="P")
+    task = Task.objects.create(title="T", project=project, start_date="2025-01-01", due_date="2025-01-02")
+    client = APIClient()
+    url = url.format(p=project.id)
+
+    first = client.get(url)
+    assert first.status_code == 200
+    etag = first["ETag"]
+    assert first["Last-Modified"]
+
+    # agrégats seulement, pas de sérialisation
+    with django_assert_max_num_queries(5):
+        cached = client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert cached.status_code == 304
+    assert cached.content == b""
+
+    task.title = "T modifiée"
+    task.save()
+    changed = client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert changed.status_code == 200
+    assert changed["ETag"] != etag
+
+
+@pytest.mark.django_db
+def test_deletion_changes_validators():
+    project = Project.objects.create(name="P", code="P")
+    Task.objects.create(title="A", project=project)
+    doomed = Task.objects.create(title="B", project=project)
+    client = APIClient()
+    url = f'/api/tasks/kanban/?project={project.id}'
+    etag = client.get(url)["ETag"]
+    doomed.delete()
+    assert client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == 200
+
+
+@pytest.mark.django_db
+def test_if_modified_since():
+    Task.objects.create(title="A")
+    client = APIClient()
+    first = client.get('/api/tasks/')
+    resp = client.get('/api/tasks/', HTTP_IF_MODIFIED_SINCE=first["Last-Modified"])
+    assert resp.status_code == 304
+
+
+@pytest.mark.django_db
+def test_attachment_changes_list_validators(settings, tmp_path):
+    settings.MEDIA_ROOT = str(tmp_path)
+    task = Task.objects.create(title="A")
+    client = APIClient()
+    etag = client.get('/api/tasks/')["ETag"]
+    attachment = Attachment.objects.create(task=task, file=ContentFile(b"x", name="a.txt"))
+    etag_after_upload = client.get('/api/tasks/', HTTP_IF_NONE_MATCH=etag)["ETag"]
+    assert etag_after_upload != etag
+    attachment.delete()
+    assert client.get('/api/tasks/', HTTP_IF_NONE_MATCH=etag_after_upload).status_code == 200
+
+
+@pytest.mark.django_db
+def test_write_from_another_process_changes_validators():
+    # bulk_create n'émet aucun signal : comme une écriture d'un autre processus,
+    # elle n'incrémente pas les versions du cache local de celui-ci
+    Task.objects.create(title="A")
+    client = APIClient()
+    etag = client.get('/api/tasks/?fields=id,title')["ETag"]
+    Task.objects.bulk_create([Task(title="B")])
+    assert client.get('/api/tasks/?fields=id,title', HTTP_IF_NONE_MATCH=etag).status_code == 200
+
+
+@pytest.mark.django_db
+def test_shared_cache_versions_answer_without_sql(shared_cache, django_assert_max_num_queries):
+    task = Task.objects.create(title="A")
+    client = APIClient()
+    etag = client.get('/api/tasks/')["ETag"]
+    with django_assert_max_num_queries(0):
+        assert client.get('/api/tasks/', HTTP_IF_NONE_MATCH=etag).status_code == 304
+    task.title = "A modifiée"
+    task.save()
+    assert client.get('/api/tasks/', HTTP_IF_NONE_MATCH=etag).status_code == 200
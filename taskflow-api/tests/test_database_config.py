@@ -0,0 +1,52 @@
+from pathlib import Path
+
+import pytest
+from django.db import connection
+from core.database import database_config
+from tasks.management.commands.db_write_benchmark import run_profile
+
+
+# ---------------------------
+# Configuration par environnement
+# ---------------------------
+def test_sqlite_tuned_profile_by_default():
+    config = database_config(Path("/srv"), environ={})
+    assert config["NAME"] == "/srv/db.sqlite3"
+    assert "PRAGMA journal_mode=WAL" in config["OPTIONS"]["init_command"]
+    assert "PRAGMA synchronous=NORMAL" in config["OPTIONS"]["init_command"]
+    assert config["OPTIONS"]["transaction_mode"] == "IMMEDIATE"
+
+
+def test_sqlite_default_profile_and_overrides():
+    assert "OPTIONS" not in database_config(Path("/srv"), environ={"TASKFLOW_SQLITE_PROFILE": "default"})
+    config = database_config(Path("/srv"), environ={"TASKFLOW_DB_NAME": "/tmp/x.db", "TASKFLOW_SQLITE_BUSY_TIMEOUT": "200"})
+    assert config["NAME"] == "/tmp/x.db"
+    assert "PRAGMA busy_timeout=200" in config["OPTIONS"]["init_command"]
+    assert config["OPTIONS"]["timeout"] == 0.2
+
+
+def test_postgresql_persistent_connections_and_pool():
+    env = {"TASKFLOW_DB_ENGINE": "postgresql", "TASKFLOW_DB_HOST": "db", "TASKFLOW_DB_CONN_MAX_AGE": "300"}
+    config = database_config(Path("/srv"), environ=env)
+    assert config["ENGINE"] == "django.db.backends.postgresql"
+    assert (config["HOST"], config["CONN_MAX_AGE"], config["CONN_HEALTH_CHECKS"]) == ("db", 300, True)
+    assert "pool" not in config["OPTIONS"]
+
+    pooled = database_config(Path("/srv"), environ={**env, "TASKFLOW_DB_POOL": "1", "TASKFLOW_DB_POOL_MAX": "20"})
+    assert pooled["CONN_MAX_AGE"] == 0
+    assert pooled["OPTIONS"]["pool"]["max_size"] == 20
+
+
+# ---------------------------
+# PRAGMA appliqués à la connexion
+# ---------------------------
+@pytest.mark.django_db
+def test_pragmas_applied_on_connection():
+    with connection.cursor() as cursor:
+        assert cursor.execute("PRAGMA synchronous").fetchone()[0] == 1  # NORMAL
+        assert cursor.execute("PRAGMA busy_timeout").fetchone()[0] == 5000
+
+
+def test_tuned_profile_has_no_lock_errors():
+    result = run_profile("tuned", workers=2, transactions=20)
+    assert (result["committed"], result["locked"]) == (40, 0)
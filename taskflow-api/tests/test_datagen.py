@@ -0,0 +1,105 @@
+import pytest
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.utils import timezone
+from tasks import datagen
+from tasks.graph import ordering_edge
+from tasks.models import Task, TaskLink, Attachment, Need, NeedTrace, Project, ProjectMember
+
+OPTIONS = {"users": 20, "projects": 3, "members": 4, "tasks_per_project": 60, "depth": 3, "fan_out": 2,
+           "links_per_task": 2, "attachments_per_task": 0.5, "needs": 30, "traces_per_need": 3}
+
+
+@pytest.fixture
+def generated(db, monkeypatch):
+    # plusieurs plages de dates même sur un petit jeu
+    monkeypatch.setattr(datagen, "STAMP_CHUNK", 25)
+    return datagen.generate(seed=3, **OPTIONS)
+
+
+# ---------------------------
+# Forme des arbres
+# ---------------------------
+def test_tree_levels_preorder_with_fan_out():
+    assert list(datagen.tree_levels(7, 2, 2)) == [0, 1, 2, 2, 1, 2, 2]
+    # arbre complet épuisé : nouvelle racine ; compte tronqué
+    assert list(datagen.tree_levels(9, 2, 2)) == [0, 1, 2, 2, 1, 2, 2, 0, 1]
+    assert list(datagen.tree_levels(3, 0, 5)) == [0, 0, 0]
+    assert list(datagen.tree_levels(4, 9, 1)) == [0, 1, 2, 3]
+
+
+# ---------------------------
+# Jeu de données
+# ---------------------------
+def test_counts_match_database(generated):
+    assert generated["projects"] == Project.objects.count() == 3
+    assert generated["members"] == ProjectMember.objects.count() == 12
+    assert generated["tasks"] == Task.objects.count() == 180
+    assert generated["links"] == TaskLink.objects.count()
+    assert generated["attachments"] == Attachment.objects.count() > 0
+    assert generated["needs"] == Need.objects.count() == 30
+    assert generated["traces"] == NeedTrace.objects.count() == 90
+
+
+def test_hierarchy_paths_and_counters(generated):
+    tasks = {t.id: t for t in Task.objects.all()}
+    for task in tasks.values():
+        if task.parent_id:
+            parent = tasks[task.parent_id]
+            assert task.path == parent.subtree_prefix
+            assert task.project_id == parent.project_id
+        else:
+            assert task.path == ""
+    assert max(len(t.ancestor_ids()) for t in tasks.values()) == 3
+    for project in Project.objects.all():
+        assert project.tasks_total == 60
+        # propriétaire et responsables parmi les membres du projet
+        members = set(ProjectMember.objects.filter(project=project).values_list("user_id", flat=True))
+        assert project.owner_id in members
+        assert set(Task.objects.filter(project=project).values_list("owner_id", flat=True)) <= members
+
+
+def test_links_form_a_dag_within_projects(generated):
+    for link in TaskLink.objects.select_related("src_task", "dst_task"):
+        assert link.src_task.project_id == link.dst_task.project_id
+        edge = ordering_edge(link.link_type, link.src_task_id, link.dst_task_id)
+        # toujours d'une tâche antérieure vers une postérieure : pas de cycle possible
+        assert edge is None or edge[0] < edge[1]
+
+
+def test_history_is_consistent_and_spread(generated):
+    for need in Need.objects.prefetch_related("traces"):
+        traces = sorted(need.traces.all(), key=lambda t: t.id)
+        for previous, trace in zip(traces, traces[1:]):
+            assert trace.old_status == previous.new_status
+            assert trace.timestamp > previous.timestamp
+        assert traces[-1].new_status == need.status
+        assert need.is_validated == (need.status == "Fait")
+    today = timezone.now().date()
+    created = set(Task.objects.values_list("created_at__date", flat=True))
+    assert today in created and len(created) > 1
+
+
+def test_same_seed_same_data(db):
+    def snapshot(prefix):
+        datagen.generate(seed=11, prefix=prefix, **OPTIONS)
+        rows = list(Task.objects.filter(project__code__startswith=prefix.upper()).order_by("id")
+                    .values_list("id", "parent_id", "status", "priority", "due_date"))
+        first = rows[0][0]
+        # ids relatifs : la seconde génération s'insère après la première
+        return [(task_id - first, parent_id and parent_id - first, *rest) for task_id, parent_id, *rest in rows]
+
+    assert snapshot("a") == snapshot("b")
+
+
+# ---------------------------
+# Commande
+# ---------------------------
+def test_command_generates_and_refuses_existing_prefix(db, capsys):
+    call_command("generate_data", projects=2, tasks_per_project=10, needs=5, users=5)
+    assert Task.objects.count() == 20
+    assert "lignes/min" in capsys.readouterr().out
+    with pytest.raises(CommandError):
+        call_command("generate_data", projects=1)
+    with pytest.raises(CommandError):
+        call_command("generate_data", prefix="deep", depth=datagen.MAX_DEPTH + 1)
@@ -0,0 +1,106 @@
+import sqlite3
+
+import pytest
+from django.test import RequestFactory
+from django.http import HttpResponse
+from core import db_router
+from core.database import replica_configs
+from core.middleware import ReplicaPinningMiddleware, PIN_COOKIE
+from tasks.models import Task
+from tasks.management.commands.sync_replicas import copy_sqlite
+
+
+@pytest.fixture
+def router():
+    router = db_router.ReplicaRouter()
+    router.replicas = ["replica_1", "replica_2"]
+    return router
+
+
+def _routed_read(router, request):
+    """ Alias choisi pour une lecture pendant le traitement de `request` """
+    seen = {}
+
+    def view(req):
+        seen["alias"] = router.db_for_read(Task)
+        return HttpResponse("ok", status=201 if req.method == "POST" else 200)
+
+    response = ReplicaPinningMiddleware(view)(request)
+    return seen["alias"], response
+
+
+# ---------------------------
+# Routage
+# ---------------------------
+def test_reads_go_to_replicas_writes_to_primary(router):
+    with db_router.primary(False):
+        assert router.db_for_read(Task) in ("replica_1", "replica_2")
+    assert router.db_for_write(Task) == "default"
+    assert router.allow_migrate("default", "tasks") and not router.allow_migrate("replica_1", "tasks")
+
+
+def test_reads_outside_http_requests_use_primary(router):
+    # commandes (rebuild_project_counters, import_tasks) : relisent leurs écritures hors transaction
+    assert router.db_for_read(Task) == "default"
+
+
+def test_reading_from_replica(monkeypatch):
+    assert not db_router.reading_from_replica()
+    monkeypatch.setattr(db_router, "replica_aliases", lambda: ["replica_1"])
+    assert not db_router.reading_from_replica()
+    with db_router.primary(False):
+        assert db_router.reading_from_replica()
+
+
+def test_without_replicas_everything_uses_default():
+    assert db_router.ReplicaRouter().db_for_read(Task) == "default"
+
+
+@pytest.mark.django_db
+def test_open_transaction_reads_from_primary(router):
+    # les tests tournent dans une transaction : lectures cohérentes avec les écritures
+    assert router.db_for_read(Task) == "default"
+
+
+# ---------------------------
+# Épinglage après écriture
+# ---------------------------
+def test_write_pins_client_to_primary(router):
+    factory = RequestFactory()
+    alias, _ = _routed_read(router, factory.get("/api/tasks/kanban/"))
+    assert alias.startswith("replica_")
+
+    alias, response = _routed_read(router, factory.post("/api/tasks/"))
+    assert alias == "default"
+    cookie = response.cookies[PIN_COOKIE]
+
+    request = factory.get("/api/tasks/kanban/")
+    request.COOKIES[PIN_COOKIE] = cookie.value
+    assert _routed_read(router, request)[0] == "default"
+
+    request.COOKIES[PIN_COOKIE] = "0"
+    assert _routed_read(router, request)[0].startswith("replica_")
+
+
+# ---------------------------
+# Configuration et démo SQLite
+# ---------------------------
+def test_replica_configs_mirror_primary():
+    primary = {"ENGINE": "django.db.backends.sqlite3", "NAME": "/srv/db.sqlite3", "OPTIONS": {"timeout": 5}}
+    replicas = replica_configs(primary, environ={"TASKFLOW_DB_REPLICAS": "/srv/r1.sqlite3, /srv/r2.sqlite3"})
+    assert list(replicas) == ["replica_1", "replica_2"]
+    assert replicas["replica_2"]["NAME"] == "/srv/r2.sqlite3"
+    assert replicas["replica_1"]["OPTIONS"] == {"timeout": 5}
+    assert replicas["replica_1"]["TEST"] == {"MIRROR": "default"}
+    pg = replica_configs({"ENGINE": "django.db.backends.postgresql", "HOST": "db"}, environ={"TASKFLOW_DB_REPLICAS": "db-ro"})
+    assert pg["replica_1"]["HOST"] == "db-ro"
+
+
+def test_copy_sqlite(tmp_path):
+    primary, replica = tmp_path / "p.sqlite3", tmp_path / "r.sqlite3"
+    conn = sqlite3.connect(primary)
+    conn.execute("CREATE TABLE t (x)")
+    conn.execute("INSERT INTO t VALUES (42)")
+    conn.commit()
+    copy_sqlite(str(primary), str(replica))
+    assert sqlite3.connect(replica).execute("SELECT x FROM t").fetchone() == (42,)
@@ -0,0 +1,180 @@
+import datetime
+
+import pytest
+from django.core.cache import caches
+from rest_framework.test import APIClient
+from core import db_router
+from tasks import graph as graph_engine
+from tasks.graph import DependencyGraph, CycleError
+from tasks.models import Task, TaskLink, Project
+
+
+@pytest.fixture(autouse=True)
+def clear_cache(settings, tmp_path):
+    # instantanés seulement dans un cache partagé (fichier) ;
+    # les ids sont réutilisés d'un test à l'autre : pas d'instantané hérité
+    settings.CACHES = {
+        **settings.CACHES,
+        "responses": {"BACKEND": "django.core.cache.backends.filebased.FileBasedCache", "LOCATION": str(tmp_path / "cache")},
+    }
+    caches["responses"].clear()
+    yield
+    caches["responses"].clear()
+
+
+# ---------------------------
+# Moteur (sans base)
+# ---------------------------
+def test_graph_order_blockers_and_critical_path():
+    # 1 -> 2 -> 4, 1 -> 3 -> 4 ; 3 est plus long que 2
+    graph = DependencyGraph([1, 2, 3, 4, 5], [(1, 2), (2, 4), (1, 3), (3, 4)], {1: 2, 2: 1, 3: 5, 4: 1})
+    order = graph.topological_order()
+    assert order.index(1) < order.index(2) < order.index(4)
+    assert order.index(3) < order.index(4)
+    assert graph.blockers(4) == [1, 2, 3]
+    assert graph.successors(1) == [2, 3, 4]
+    assert graph.critical_path() == (8, [1, 3, 4])
+    assert graph.would_create_cycle(4, 1)
+    assert not graph.would_create_cycle(1, 5)
+
+
+def test_closure_matches_traversal():
+    edges = [(1, 2), (2, 3), (1, 4), (4, 3), (3, 5)]
+    plain = DependencyGraph(range(1, 8), edges)
+    closed = DependencyGraph(range(1, 8), edges).precompute()
+    for task_id in range(1, 8):
+        assert closed.blockers(task_id) == plain.blockers(task_id)
+        assert closed.successors(task_id) == plain.successors(task_id)
+    assert closed.would_create_cycle(5, 1) and not closed.would_create_cycle(1, 6)
+
+
+def test_graph_cycle_raises():
+    graph = DependencyGraph([1, 2], [(1, 2), (2, 1)])
+    with pytest.raises(CycleError):
+        graph.topological_order()
+
+
+# ---------------------------
+# API
+# ---------------------------
+@pytest.fixture
+def plan(db):
+    project = Project.objects.create(name="Plan", code="PLN")
+    d = datetime.date
+    design = Task.objects.create(title="Design", project=project, start_date=d(2025, 1, 1), due_date=d(2025, 1, 10))
+    build = Task.objects.create(title="Build", project=project, start_date=d(2025, 1, 11), due_date=d(2025, 1, 30))
+    doc = Task.objects.create(title="Doc", project=project, start_date=d(2025, 1, 11), due_date=d(2025, 1, 12))
+    release = Task.objects.create(title="Release", project=project, start_date=d(2025, 2, 1), due_date=d(2025, 2, 1))
+    TaskLink.objects.create(src_task=design, dst_task=build, link_type="blocks")
+    TaskLink.objects.create(src_task=design, dst_task=doc, link_type="blocks")
+    TaskLink.objects.create(src_task=release, dst_task=build, link_type="depends_on")
+    TaskLink.objects.create(src_task=release, dst_task=doc, link_type="depends_on")
+    return {"project": project, "design": design, "build": build, "doc": doc, "release": release}
+
+
+@pytest.mark.django_db
+def test_dependencies_action(plan, django_assert_max_num_queries):
+    client = APIClient()
+    with django_assert_max_num_queries(2):
+        resp = client.get(f'/api/tasks/dependencies/?project={plan["project"].id}')
+    assert resp.status_code == 200
+    data = resp.json()
+    assert data["order"][0] == plan["design"].id
+    assert data["order"][-1] == plan["release"].id
+    assert data["critical_path"] == {
+        "duration": 31,
+        "tasks": [plan["design"].id, plan["build"].id, plan["release"].id],
+    }
+
+
+@pytest.mark.django_db
+def test_blockers_action(plan):
+    client = APIClient()
+    resp = client.get(f'/api/tasks/{plan["release"].id}/blockers/')
+    assert resp.status_code == 200
+    assert resp.json()["ids"] == sorted([plan["design"].id, plan["build"].id, plan["doc"].id])
+
+
+@pytest.mark.django_db
+def test_link_rejects_cycle(plan):
+    client = APIClient()
+    resp = client.post(f'/api/tasks/{plan["release"].id}/link/', {"target": plan["design"].id, "type": "blocks"}, format='json')
+    assert resp.status_code == 400
+    assert not TaskLink.objects.filter(src_task=plan["release"], dst_task=plan["design"]).exists()
+    resp = client.post(f'/api/tasks/{plan["release"].id}/link/', {"target": plan["design"].id, "type": "relates"}, format='json')
+    assert resp.status_code == 201
+
+
+@pytest.mark.django_db
+def test_graph_snapshot_cached_and_invalidated(plan, django_assert_num_queries):
+    client = APIClient()
+    url = f'/api/tasks/dependencies/?project={plan["project"].id}'
+    assert client.get(url)["X-Graph-Cache"] == "miss"
+    with django_assert_num_queries(0):
+        resp = client.get(url)
+    assert resp["X-Graph-Cache"] == "hit"
+
+    # nouveau lien -> instantané périmé
+    extra = Task.objects.create(title="Hotfix", project=plan["project"])
+    TaskLink.objects.create(src_task=plan["release"], dst_task=extra, link_type="blocks")
+    resp = client.get(url)
+    assert resp["X-Graph-Cache"] == "miss"
+    assert resp.json()["order"][-1] == extra.id
+
+    # suppression d'une tâche -> instantané périmé
+    extra.delete()
+    resp = client.get(url)
+    assert resp["X-Graph-Cache"] == "miss"
+    assert extra.id not in resp.json()["order"]
+
+    stats = client.get('/api/tasks/graph_cache/').json()
+    assert stats == {"hit": 1, "miss": 3}
+
+
+@pytest.mark.django_db
+def test_local_cache_never_serves_snapshots(plan, settings):
+    # mémoire locale : une écriture d'un autre processus ne périmerait pas l'instantané
+    settings.CACHES = {**settings.CACHES, "responses": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+    client = APIClient()
+    url = f'/api/tasks/dependencies/?project={plan["project"].id}'
+    assert client.get(url)["X-Graph-Cache"] == "miss"
+    assert client.get(url)["X-Graph-Cache"] == "miss"
+
+
+@pytest.mark.django_db
+def test_link_cycle_check_ignores_stale_snapshot(plan):
+    client = APIClient()
+    url = f'/api/tasks/dependencies/?project={plan["project"].id}'
+    client.get(url)
+    assert client.get(url)["X-Graph-Cache"] == "hit"
+    # lien écrit par un autre processus : bulk_create, aucun signal, instantané non périmé
+    TaskLink.objects.bulk_create([TaskLink(src_task=plan["doc"], dst_task=plan["build"], link_type="blocks")])
+    resp = client.post(f'/api/tasks/{plan["build"].id}/link/', {"target": plan["doc"].id, "type": "blocks"}, format='json')
+    assert resp.status_code == 400
+
+
+@pytest.mark.django_db
+def test_link_detects_cycle_through_another_project(plan):
+    # design -> x -> y -> review, x et y dans un autre projet : le cycle fermé par
+    # review -> design passe par un lien interne à cet autre projet
+    review = Task.objects.create(title="Review", project=plan["project"])
+    other = Project.objects.create(name="Autre", code="OTH")
+    x = Task.objects.create(title="X", project=other)
+    y = Task.objects.create(title="Y", project=other)
+    TaskLink.objects.create(src_task=plan["design"], dst_task=x, link_type="blocks")
+    TaskLink.objects.create(src_task=y, dst_task=x, link_type="depends_on")
+    TaskLink.objects.create(src_task=y, dst_task=review, link_type="blocks")
+    client = APIClient()
+    resp = client.post(f'/api/tasks/{review.id}/link/', {"target": plan["design"].id, "type": "blocks"}, format='json')
+    assert resp.status_code == 400
+    assert graph_engine.creates_cycle(review.id, plan["design"].id)
+    assert not graph_engine.creates_cycle(plan["design"].id, review.id)
+
+
+@pytest.mark.django_db
+def test_replica_reads_do_not_store_snapshots(plan, monkeypatch):
+    client = APIClient()
+    url = f'/api/tasks/dependencies/?project={plan["project"].id}'
+    monkeypatch.setattr(db_router, "reading_from_replica", lambda: True)
+    assert client.get(url)["X-Graph-Cache"] == "miss"
+    assert client.get(url)["X-Graph-Cache"] == "miss"
@@ -0,0 +1,107 @@
+import csv
+import io
+import json
+
+import pytest
+from django.contrib.auth.models import User
+from rest_framework.test import APIClient
+from core.profiler import capture_queries
+from tasks import export
+from tasks.models import Task, Need, NeedTrace, Project
+
+
+@pytest.fixture
+def client():
+    return APIClient()
+
+
+@pytest.fixture
+def dataset(db):
+    alice = User.objects.create(username="alice")
+    project = Project.objects.create(name="Alpha", code="ALPHA", owner=alice)
+    root = Task.objects.create(title="Racine, \"citée\"", status="En cours", owner=alice, project=project)
+    child = Task.objects.create(title="Enfant", status="Fait", parent=root, project=project, due_date="2025-03-01")
+    other = Task.objects.create(title="Ailleurs", status="Fait")
+    need = Need.objects.create(title="Besoin", owner=alice)
+    NeedTrace.objects.create(need=need, user=alice, old_status="Nouveau", new_status="À faire")
+    NeedTrace.objects.create(need=need, user=None, old_status="À faire", new_status="Fait", new_validated=True)
+    return {"alice": alice, "project": project, "root": root, "child": child, "other": other, "need": need}
+
+
+def read_csv(response):
+    return list(csv.DictReader(io.StringIO(b"".join(response.streaming_content).decode("utf-8"))))
+
+
+def read_jsonl(response):
+    return [json.loads(line) for line in b"".join(response.streaming_content).decode("utf-8").splitlines()]
+
+
+# ---------------------------
+# Export des tâches
+# ---------------------------
+def test_csv_export_flattens_relations(client, dataset):
+    response = client.get("/api/tasks/export/")
+    assert response.status_code == 200
+    assert response.streaming
+    assert response["Content-Type"].startswith("text/csv")
+    assert response["Content-Disposition"] == 'attachment; filename="tasks.csv"'
+
+    rows = {int(r["id"]): r for r in read_csv(response)}
+    assert len(rows) == 3
+    child = rows[dataset["child"].id]
+    assert child["project"] == "ALPHA"
+    assert child["parent"] == 'Racine, "citée"'
+    assert child["parent_id"] == str(dataset["root"].id)
+    assert child["due_date"] == "2025-03-01"
+    assert child["owner"] == ""
+    assert rows[dataset["root"].id]["owner"] == "alice"
+    assert rows[dataset["other"].id]["project"] == ""
+
+
+def test_jsonl_export_with_list_filters_and_fields(client, dataset):
+    project = dataset["project"].id
+    response = client.get(f"/api/tasks/export/?output=jsonl&project={project}&status=Fait&fields=id,title,parent_id")
+    assert response["Content-Type"] == "application/x-ndjson"
+    assert read_jsonl(response) == [{"id": dataset["child"].id, "title": "Enfant", "parent_id": dataset["root"].id}]
+
+    response = client.get("/api/tasks/export/?output=jsonl&search=Ailleurs&fields=title")
+    assert read_jsonl(response) == [{"title": "Ailleurs"}]
+
+    response = client.get("/api/tasks/export/?output=jsonl&ordering=title&fields=title")
+    assert [r["title"] for r in read_jsonl(response)] == ["Ailleurs", "Enfant", 'Racine, "citée"']
+
+
+def test_export_rejects_unknown_format_and_columns(client, dataset):
+    assert client.get("/api/tasks/export/?output=xlsx").status_code == 400
+    response = client.get("/api/tasks/export/?fields=id,secret")
+    assert response.status_code == 400
+    assert "secret" in response.json()["error"]
+
+
+def test_export_reads_in_one_query_per_chunk(dataset):
+    for i in range(25):
+        Task.objects.create(title=f"T{i}")
+    with capture_queries() as profile:
+        lines = list(export.stream_csv(Task.objects.order_by("id"), export.TASK_COLUMNS, chunk_size=10))
+    assert len(lines) == 1 + 28
+    # une seule requête : les blocs sont lus sur le même curseur
+    assert profile.count == 1
+
+
+# ---------------------------
+# Export de l'historique des besoins
+# ---------------------------
+def test_need_trace_export(client, dataset):
+    response = client.get("/api/needs/traces/export/")
+    assert response["Content-Disposition"] == 'attachment; filename="need_traces.csv"'
+    rows = read_csv(response)
+    assert [(r["user"], r["new_status"], r["new_validated"]) for r in rows] == [("alice", "À faire", "false"), ("", "Fait", "true")]
+    assert rows[0]["need"] == "Besoin"
+
+    response = client.get(f"/api/needs/traces/export/?output=jsonl&need={dataset['need'].id}&new_status=Fait")
+    (trace,) = read_jsonl(response)
+    assert trace["user"] is None and trace["new_validated"] is True
+
+    assert read_jsonl(client.get("/api/needs/traces/export/?output=jsonl&from=2000-01-01&to=2000-12-31")) == []
+    assert client.get("/api/needs/traces/export/?need=abc").status_code == 400
+    assert client.get("/api/needs/traces/export/?from=demain").status_code == 400
@@ -0,0 +1,60 @@
+import json
+import datetime
+
+import pytest
+from rest_framework.test import APIClient
+from tasks.models import Task, Project
+
+
+# ---------------------------
+# Fixture : trois tâches datées sur l'année
+# ---------------------------
+@pytest.fixture
+def planned_project(db):
+    project = Project.objects.create(name="Plan", code="PLN")
+    d = datetime.date
+    Task.objects.create(title="Janvier", project=project, start_date=d(2025, 1, 1), due_date=d(2025, 1, 31))
+    Task.objects.create(title="Printemps", project=project, start_date=d(2025, 3, 1), due_date=d(2025, 5, 31))
+    Task.objects.create(title="Décembre", project=project, start_date=d(2025, 12, 1), due_date=d(2025, 12, 31))
+    Task.objects.create(title="Sans dates", project=project)
+    return project
+
+
+# ---------------------------
+# Tests
+# ---------------------------
+@pytest.mark.django_db
+def test_gantt_all_dated_tasks(planned_project):
+    client = APIClient()
+    resp = client.get(f'/api/tasks/gantt/?project={planned_project.id}')
+    assert resp.status_code == 200
+    data = resp.json()
+    assert [t["title"] for t in data] == ["Janvier", "Printemps", "Décembre"]
+    assert set(data[0]) == {"id", "title", "start_date", "due_date", "progress", "parent"}
+
+
+@pytest.mark.django_db
+def test_gantt_window_returns_overlapping_tasks(planned_project):
+    client = APIClient()
+    resp = client.get('/api/tasks/gantt/', {"project": planned_project.id, "from": "2025-01-15", "to": "2025-04-01"})
+    assert resp.status_code == 200
+    assert [t["title"] for t in resp.json()] == ["Janvier", "Printemps"]
+
+
+@pytest.mark.django_db
+def test_gantt_invalid_date(planned_project):
+    client = APIClient()
+    resp = client.get('/api/tasks/gantt/', {"from": "2025-13-45"})
+    assert resp.status_code == 400
+
+
+@pytest.mark.django_db
+def test_gantt_stream_json_lines(planned_project):
+    client = APIClient()
+    resp = client.get('/api/tasks/gantt/', {"project": planned_project.id, "from": "2025-06-01", "stream": "1"})
+    assert resp.status_code == 200
+    assert resp["Content-Type"] == "application/x-ndjson"
+    lines = b"".join(resp.streaming_content).decode().splitlines()
+    rows = [json.loads(line) for line in lines]
+    assert [r["title"] for r in rows] == ["Décembre"]
+    assert rows[0]["start_date"] == "2025-12-01"
@@ -0,0 +1,377 @@
+import csv
+import io
+import json
+
+import pytest
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from rest_framework.test import APIClient
+from tasks import export, graph, importer
+from tasks.models import Task, TaskLink, Project, ImportRun, ImportRow, fits_in_path, path_segment
+
+COLUMNS = ["external_id", "title", "status", "owner", "project", "parent_external_id", "links"]
+
+
+@pytest.fixture
+def client():
+    return APIClient()
+
+
+@pytest.fixture
+def refs(db):
+    alice = User.objects.create(username="alice")
+    project = Project.objects.create(name="Alpha", code="ALPHA", owner=alice)
+    return {"alice": alice, "project": project}
+
+
+@pytest.fixture
+def launched(monkeypatch):
+    # hors requête : l'exécutant détaché est remplacé par une liste d'imports lancés
+    runs = []
+    monkeypatch.setattr(importer, "launch", runs.append)
+    return runs
+
+
+def write_csv(path, rows, columns=COLUMNS):
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=columns)
+        writer.writeheader()
+        writer.writerows([dict(zip(columns, row)) for row in rows])
+    return str(path)
+
+
+def do_import(path, **options):
+    run = importer.start(path)
+    importer.run_import(run, **options)
+    return importer.report(run)
+
+
+def by_key(report_or_run):
+    run_id = report_or_run["id"] if isinstance(report_or_run, dict) else report_or_run.id
+    return {row.key: row.task for row in ImportRow.objects.filter(run_id=run_id, task__isnull=False).select_related("task")}
+
+
+def errors_by_key(report):
+    return {error["key"]: error["errors"] for error in report["errors"]}
+
+
+# ---------------------------
+# Phase tâches : résolution et validation
+# ---------------------------
+def test_csv_import_resolves_owner_and_project(refs, tmp_path):
+    path = write_csv(tmp_path / "tasks.csv", [
+        ("A", "Analyse", "En cours", "alice", "ALPHA", "", ""),
+        ("B", "Build", "", "", "", "", ""),
+    ])
+    report = do_import(path)
+    assert report["status"] == "done"
+    assert (report["rows"], report["created"], report["rejected"], report["error_count"]) == (2, 2, 0, 0)
+
+    tasks = by_key(report)
+    assert tasks["A"].owner_id == refs["alice"].id
+    assert tasks["A"].project_id == refs["project"].id
+    assert tasks["A"].status == "En cours"
+    assert tasks["B"].status == "À faire"
+    refs["project"].refresh_from_db()
+    assert (refs["project"].tasks_total, refs["project"].tasks_in_progress) == (1, 1)
+
+
+def test_rejected_rows_are_reported_per_line(refs, tmp_path):
+    path = write_csv(tmp_path / "tasks.csv", [
+        ("A", "Ok", "", "", "", "", ""),
+        ("B", "Inconnu", "", "bob", "ZETA", "", ""),
+        ("C", "Statut", "Perdu", "", "", "", ""),
+        ("A", "Doublon", "", "", "", "", ""),
+        ("", "Sans clé", "", "", "", "", ""),
+    ])
+    report = do_import(path, batch_size=2)
+    assert (report["created"], report["rejected"]) == (1, 4)
+    assert [error["line"] for error in report["errors"]] == [3, 4, 5, 6]
+
+    errors = errors_by_key(report)
+    assert set(errors["B"]) == {"owner", "project"}
+    assert "bob" in errors["B"]["owner"][0]
+    assert "status" in errors["C"]
+    # doublon détecté d'un lot à l'autre
+    assert "double" in errors["A"]["external_id"][0]
+    assert "manquante" in errors[""]["external_id"][0]
+    assert Task.objects.count() == 1
+
+
+def test_too_long_keys_are_rejected_not_truncated(refs, tmp_path):
+    long_a, long_b = "k" * 100 + "a", "k" * 100 + "b"
+    path = write_csv(tmp_path / "tasks.csv", [
+        (long_a, "A", "", "", "", "", ""),
+        (long_b, "B", "", "", "", "", ""),
+        ("c", "C", "", "", "", long_a, ""),
+    ])
+    report = do_import(path)
+    assert (report["created"], report["rejected"]) == (0, 3)
+    errors = {error["line"]: error["errors"] for error in report["errors"]}
+    assert "trop longue" in errors[2]["external_id"][0] and "trop longue" in errors[3]["external_id"][0]
+    assert not any("double" in message for e in errors.values() for message in e.get("external_id", []))
+    assert "trop longue" in errors[4]["parent"][0]
+
+
+def test_jsonl_import_with_links_list_and_bad_lines(refs, tmp_path):
+    path = tmp_path / "tasks.jsonl"
+    path.write_text("\n".join([
+        json.dumps({"id": 1, "title": "Un", "project": "ALPHA", "progress": 40}),
+        json.dumps({"id": 2, "title": "Deux", "links": [{"type": "blocks", "target": 1}]}),
+        "{pas du json",
+        "",
+        json.dumps(["liste"]),
+    ]), encoding="utf-8")
+    report = do_import(str(path))
+    assert (report["created"], report["rejected"], report["linked"]) == (2, 2, 1)
+    assert [error["line"] for error in report["errors"]] == [3, 5]
+
+    tasks = by_key(report)
+    assert tasks["1"].progress == 40
+    assert TaskLink.objects.filter(src_task=tasks["2"], dst_task=tasks["1"], link_type="blocks").exists()
+
+
+def test_unknown_format_and_missing_key_column(refs, tmp_path):
+    with pytest.raises(importer.ImportFailed):
+        importer.start(str(tmp_path / "tasks.xlsx"))
+
+    path = write_csv(tmp_path / "tasks.csv", [("Titre",)], columns=["title"])
+    run = importer.start(path)
+    with pytest.raises(importer.ImportFailed):
+        importer.run_import(run)
+    run.refresh_from_db()
+    assert run.status == "failed" and "external_id" in run.message
+
+
+# ---------------------------
+# Phase parents
+# ---------------------------
+def test_parents_are_wired_whatever_the_file_order(refs, tmp_path):
+    path = write_csv(tmp_path / "tasks.csv", [
+        ("leaf", "Feuille", "", "", "", "mid", ""),
+        ("mid", "Milieu", "", "", "", "root", ""),
+        ("root", "Racine", "", "", "", "", ""),
+        ("orphan", "Orpheline", "", "", "", "nowhere", ""),
+    ])
+    report = do_import(path, batch_size=2)
+    tasks = by_key(report)
+    for task in tasks.values():
+        task.refresh_from_db()
+
+    root, mid, leaf = tasks["root"], tasks["mid"], tasks["leaf"]
+    assert (mid.parent_id, leaf.parent_id) == (root.id, mid.id)
+    assert leaf.path == path_segment(root.id) + path_segment(mid.id)
+    assert list(root.descendants().order_by("id")) == sorted([mid, leaf], key=lambda t: t.id)
+
+    # tâche créée, parent signalé
+    assert tasks["orphan"].parent_id is None
+    assert "nowhere" in errors_by_key(report)["orphan"]["parent"][0]
+
+
+def test_depth_limit_matches_the_api(refs, tmp_path):
+    # 200 niveaux au plus, comme Task.check_parent (test_task_hierarchy)
+    rows = [(f"n{i}", f"N{i}", "", "", "", f"n{i - 1}" if i else "", "") for i in range(201)]
+    report = do_import(write_csv(tmp_path / "tasks.csv", rows))
+    assert list(errors_by_key(report)) == ["n200"]
+    assert "profonde" in errors_by_key(report)["n200"]["parent"][0]
+    assert Task.objects.filter(parent__isnull=False).count() == 199
+    # toute tâche importée garde la place d'un enfant
+    assert all(fits_in_path(len(path)) for path in Task.objects.values_list("path", flat=True))
+
+
+def test_parent_cycle_is_reported(refs, tmp_path):
+    path = write_csv(tmp_path / "tasks.csv", [
+        ("a", "A", "", "", "", "b", ""),
+        ("b", "B", "", "", "", "a", ""),
+        ("c", "C", "", "", "", "c", ""),
+    ])
+    report = do_import(path)
+    errors = errors_by_key(report)
+    assert report["status"] == "done"
+    assert "Cycle" in errors["a"]["parent"][0] and "Cycle" in errors["b"]["parent"][0]
+    assert "propre parent" in errors["c"]["parent"][0]
+    assert not Task.objects.filter(parent__isnull=False).exists()
+
+
+def test_parents_wired_after_sync_are_resent(client, refs, tmp_path, settings):
+    settings.SYNC_SAFETY_LAG = 0
+    path = write_csv(tmp_path / "tasks.csv", [
+        ("child", "Enfant", "", "", "ALPHA", "root", ""),
+        ("root", "Racine", "", "", "ALPHA", "", ""),
+    ])
+    url = f"/api/tasks/kanban/?project={refs['project'].id}"
+    seen = {}
+
+    def between_phases(run):
+        # client qui synchronise / revalide avant, puis pendant la phase parents
+        if run.phase == "tasks":
+            seen["token"] = client.get("/api/tasks/sync/").json()["sync_token"]
+            seen["etag"] = client.get(url)["ETag"]
+        elif run.phase == "parents" and "revalidated" not in seen:
+            seen["revalidated"] = client.get(url, HTTP_IF_NONE_MATCH=seen["etag"]).status_code
+
+    importer.run_import(importer.start(path), progress=between_phases)
+    assert seen["revalidated"] == 200
+    child = Task.objects.get(title="Enfant")
+    changed = client.get("/api/tasks/sync/", {"since": seen["token"]}).json()["changed"]
+    assert child.id in [task["id"] for task in changed]
+
+
+# ---------------------------
+# Phases liens et cycles
+# ---------------------------
+def test_links_are_created_and_bad_targets_reported(refs, tmp_path):
+    path = write_csv(tmp_path / "tasks.csv", [
+        ("a", "A", "", "", "ALPHA", "", "blocks:b;relates:c;blocks:b"),
+        ("b", "B", "", "", "ALPHA", "", "depends_on:zzz;owns:a"),
+        ("c", "C", "", "", "ALPHA", "", ""),
+    ])
+    report = do_import(path)
+    tasks = by_key(report)
+    assert TaskLink.objects.filter(src_task=tasks["a"]).count() == 2
+    # blocks:b en double dans le fichier : un seul lien créé et compté
+    assert report["linked"] == TaskLink.objects.count() == 2
+    errors = errors_by_key(report)["b"]["links"]
+    assert "zzz" in errors[0] and "owns" in errors[1]
+
+
+def test_imported_dependency_cycle_is_removed(refs, tmp_path):
+    path = write_csv(tmp_path / "tasks.csv", [
+        ("a", "A", "", "", "ALPHA", "", "blocks:b"),
+        ("b", "B", "", "", "ALPHA", "", "blocks:c"),
+        ("c", "C", "", "", "ALPHA", "", "depends_on:b;blocks:a"),
+        ("d", "D", "", "", "ALPHA", "", "relates:a"),
+    ])
+    report = do_import(path)
+    tasks = by_key(report)
+    assert graph.build_graph([refs["project"].id]).cycles() == []
+    # seuls les liens d'ordonnancement du cycle ont disparu
+    assert TaskLink.objects.filter(link_type="relates").count() == 1
+    assert not TaskLink.objects.filter(src_task__in=tasks.values(), link_type__in=graph.ORDERING_LINK_TYPES).exists()
+    assert report["linked"] == 1
+    assert "cycle" in errors_by_key(report)["c"]["links"][0]
+
+
+# ---------------------------
+# Reprise
+# ---------------------------
+def test_interrupted_import_resumes_where_it_stopped(refs, tmp_path, monkeypatch):
+    rows = [(f"t{i}", f"Tâche {i}", "", "", "ALPHA", "t0" if i else "", f"blocks:t{i - 1}" if i else "") for i in range(10)]
+    path = write_csv(tmp_path / "tasks.csv", rows)
+    run = importer.start(path)
+
+    calls = {"n": 0}
+    real = importer._import_batch
+
+    def crash_on_third_batch(*args):
+        calls["n"] += 1
+        if calls["n"] == 3:
+            raise RuntimeError("coupure")
+        real(*args)
+
+    monkeypatch.setattr(importer, "_import_batch", crash_on_third_batch)
+    with pytest.raises(RuntimeError):
+        importer.run_import(run, batch_size=3)
+    run.refresh_from_db()
+    assert (run.status, run.phase, run.position, run.created) == ("failed", "tasks", 6, 6)
+    assert run.message == "coupure"
+
+    monkeypatch.setattr(importer, "_import_batch", real)
+    run = importer.run_import(ImportRun.objects.get(pk=run.pk), batch_size=3)
+    report = importer.report(run)
+    assert (report["status"], report["created"], report["linked"], report["error_count"]) == ("done", 10, 9, 0)
+    assert Task.objects.count() == 10
+    assert Task.objects.filter(parent__isnull=False).count() == 9
+
+
+def test_running_import_cannot_be_resumed_twice(client, refs, tmp_path, settings, launched):
+    path = write_csv(tmp_path / "tasks.csv", [(f"t{i}", f"Tâche {i}", "", "", "", "", "") for i in range(6)])
+    run = importer.start(path)
+    seen = {}
+
+    def second_runner(current):
+        # pendant le premier lot : un second exécutant (reprise API ou --resume) est refusé
+        if "busy" not in seen:
+            with pytest.raises(importer.ImportBusy):
+                importer.run_import(ImportRun.objects.get(pk=run.pk))
+            seen["busy"] = ImportRun.objects.get(pk=run.pk).status
+            seen["api"] = client.post(f"/api/tasks/import/{run.id}/").status_code
+
+    importer.run_import(run, batch_size=2, progress=second_runner)
+    assert seen["busy"] == "running"
+    assert seen["api"] == 409 and launched == []
+    assert (run.status, run.created) == ("done", 6)
+    assert Task.objects.count() == 6
+
+    # exécutant disparu (bail expiré) : reprise possible ; l'ancien s'arrête au lot suivant
+    run = importer.start(path)
+    importer.claim(run)
+    assert not importer.claimable(run)
+    settings.IMPORT_LEASE_SECONDS = 0
+    stale = ImportRun.objects.get(pk=run.pk)
+    assert importer.claimable(stale)
+    importer.claim(stale)
+    with pytest.raises(importer.ImportLost):
+        importer._heartbeat(run)
+    assert ImportRun.objects.get(pk=run.pk).status == "running"
+
+
+def test_export_then_import_round_trip(client, refs, tmp_path):
+    root = Task.objects.create(title="Racine", owner=refs["alice"], project=refs["project"], due_date="2025-03-01")
+    Task.objects.create(title="Enfant", parent=root, project=refs["project"], status="Fait")
+    path = tmp_path / "tasks.csv"
+    path.write_bytes("".join(export.stream_csv(Task.objects.order_by("-id"), export.TASK_COLUMNS)).encode("utf-8"))
+
+    report = do_import(str(path))
+    assert (report["created"], report["error_count"]) == (2, 0)
+    tasks = by_key(report)
+    copy, child = tasks[str(root.id)], tasks[str(root.id + 1)]
+    child.refresh_from_db()
+    assert child.parent_id == copy.id and child.status == "Fait"
+    assert (copy.owner_id, str(copy.due_date)) == (refs["alice"].id, "2025-03-01")
+
+
+# ---------------------------
+# Endpoint et commande
+# ---------------------------
+def test_upload_endpoint_and_report(client, refs, tmp_path, settings, launched):
+    settings.MEDIA_ROOT = str(tmp_path / "media")
+    content = "external_id,title,owner\nA,Une,alice\nB,Deux,bob\nC,,\n"
+    upload = io.BytesIO(content.encode("utf-8"))
+    upload.name = "lot.csv"
+    response = client.post("/api/tasks/import/", {"file": upload}, format="multipart")
+    assert response.status_code == 202
+    body = response.json()
+    assert (body["source"], body["status"], body["rows"]) == ("lot.csv", "queued", 0)
+    assert [run.id for run in launched] == [body["id"]]
+
+    importer.run_import(launched[0])
+    body = client.get(f"/api/tasks/import/{body['id']}/").json()
+    assert (body["status"], body["created"], body["rejected"]) == ("done", 1, 2)
+    assert body["errors"][0]["key"] == "B"
+
+    response = client.get(f"/api/tasks/import/{body['id']}/?errors=1")
+    assert response.json()["error_count"] == 2 and len(response.json()["errors"]) == 1
+    assert client.get("/api/tasks/import/999999/").status_code == 404
+
+    assert client.post(f"/api/tasks/import/{body['id']}/").status_code == 200
+    assert client.post("/api/tasks/import/", {}, format="multipart").status_code == 400
+    bad = io.BytesIO(b"x")
+    bad.name = "lot.xlsx"
+    assert client.post("/api/tasks/import/", {"file": bad}, format="multipart").status_code == 400
+
+
+def test_import_command(refs, tmp_path):
+    path = write_csv(tmp_path / "tasks.csv", [("A", "Une", "", "", "", "", ""), ("B", "", "", "", "", "", "")])
+    out = io.StringIO()
+    call_command("import_tasks", path, "--batch-size", "1", stdout=out)
+    output = out.getvalue()
+    assert "1 tâches créées, 1 lignes rejetées" in output
+    assert "ligne 3 [B] title:" in output
+
+    run = ImportRun.objects.get()
+    with pytest.raises(CommandError):
+        call_command("import_tasks", "--resume", str(run.id))
+    with pytest.raises(CommandError):
+        call_command("import_tasks")
@@ -0,0 +1,61 @@
+import pytest
+from rest_framework.test import APIClient
+from tasks.models import Task, Project
+
+
+# ---------------------------
+# Fixture : projet avec 7 tâches "À faire", 2 "Fait"
+# ---------------------------
+@pytest.fixture
+def board_project(db):
+    project = Project.objects.create(name="Board", code="BRD")
+    other = Project.objects.create(name="Autre", code="OTH")
+    for i in range(7):
+        Task.objects.create(title=f"Todo {i}", status="À faire", project=project)
+    for i in range(2):
+        Task.objects.create(title=f"Done {i}", status="Fait", project=project)
+    Task.objects.create(title="Hors projet", status="Fait", project=other)
+    return project
+
+
+# ---------------------------
+# Tests
+# ---------------------------
+@pytest.mark.django_db
+def test_kanban_counts_and_first_cards(board_project, django_assert_num_queries):
+    client = APIClient()
+    # 2 requêtes d'agrégat pour l'ETag + compteurs + cartes
+    with django_assert_num_queries(4):
+        resp = client.get(f'/api/tasks/kanban/?project={board_project.id}&limit=3')
+    assert resp.status_code == 200
+    board = resp.json()
+    assert list(board) == ["À faire", "En cours", "Fait", "Nouveau"]
+    assert board["À faire"]["count"] == 7
+    assert [c["title"] for c in board["À faire"]["cards"]] == ["Todo 6", "Todo 5", "Todo 4"]
+    assert board["À faire"]["next_cursor"] == board["À faire"]["cards"][-1]["id"]
+    assert board["Fait"]["count"] == 2
+    assert board["Fait"]["next_cursor"] is None
+    assert board["En cours"] == {"count": 0, "cards": [], "next_cursor": None}
+    assert "children" not in board["Fait"]["cards"][0]
+
+
+@pytest.mark.django_db
+def test_kanban_column_cursor_walks_all_cards(board_project):
+    client = APIClient()
+    board = client.get(f'/api/tasks/kanban/?project={board_project.id}&limit=3').json()
+    titles = [c["title"] for c in board["À faire"]["cards"]]
+    cursor = board["À faire"]["next_cursor"]
+    while cursor:
+        page = client.get('/api/tasks/kanban/', {
+            "project": board_project.id, "status": "À faire", "cursor": cursor, "limit": 3,
+        }).json()
+        titles += [c["title"] for c in page["cards"]]
+        cursor = page["next_cursor"]
+    assert titles == [f"Todo {i}" for i in range(6, -1, -1)]
+
+
+@pytest.mark.django_db
+def test_kanban_invalid_cursor(board_project):
+    client = APIClient()
+    resp = client.get('/api/tasks/kanban/', {"status": "Fait", "cursor": "abc"})
+    assert resp.status_code == 400
@@ -0,0 +1,63 @@
+import json
+import logging
+
+import pytest
+from rest_framework.test import APIClient
+from core import monitoring
+
+
+def _record(i):
+    return logging.LogRecord("taskflow.kpi", logging.INFO, __file__, 0, f"r{i}", None, None)
+
+
+def _lines(path):
+    return [json.loads(line) for line in path.read_text().splitlines()]
+
+
+@pytest.fixture
+def kpi_file(tmp_path, settings):
+    """ Pipeline du processus redémarré sur un fichier temporaire """
+    path = tmp_path / "kpi.jsonl"
+    settings.KPI_LOG = {"path": str(path), "flush_interval": 0.05}
+    previous, monitoring._pipeline = monitoring._pipeline, None
+    yield path
+    if monitoring._pipeline is not None:
+        monitoring._pipeline.stop()
+    monitoring._pipeline = previous
+
+
+# ---------------------------
+# File bornée et écriture par lots
+# ---------------------------
+def test_batches_are_written_as_json_lines(tmp_path):
+    pipeline = monitoring.KpiPipeline(path=tmp_path / "k.jsonl", batch_size=64).start()
+    for i in range(1000):
+        pipeline.handler.handle(_record(i))
+    pipeline.stop()
+    lines = _lines(tmp_path / "k.jsonl")
+    assert [line["msg"] for line in lines] == [f"r{i}" for i in range(1000)]
+    assert pipeline.stats() == {"queued": 0, "dropped": 0, "written": 1000}
+
+
+@pytest.mark.parametrize("policy, kept", [("drop", range(0, 10)), ("drop_oldest", range(15, 25)), ("block", range(0, 10))])
+def test_overflow_policies(tmp_path, policy, kept):
+    # thread d'écriture non démarré : la file se remplit
+    pipeline = monitoring.KpiPipeline(path=tmp_path / "k.jsonl", queue_size=10, policy=policy, block_timeout=0.001)
+    for i in range(25):
+        pipeline.handler.handle(_record(i))
+    assert pipeline.handler.dropped == 15
+    assert [pipeline.queue.get_nowait().msg for _ in range(10)] == [f"r{i}" for i in kept]
+
+
+# ---------------------------
+# Middleware
+# ---------------------------
+@pytest.mark.django_db
+def test_middleware_enqueues_structured_record(kpi_file):
+    resp = APIClient().get('/api/tasks/')
+    assert resp.status_code == 200
+    assert resp["X-Process-Time"].endswith("s")
+    monitoring._pipeline.stop()
+    (line,) = _lines(kpi_file)
+    assert (line["method"], line["path"], line["status"]) == ("GET", "/api/tasks/", 200)
+    assert line["duration_ms"] >= 0
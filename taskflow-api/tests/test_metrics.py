@@ -0,0 +1,99 @@
+import json
+import os
+import threading
+import time
+
+import pytest
+from rest_framework.test import APIClient
+from core import metrics
+
+
+@pytest.fixture(autouse=True)
+def fresh_registry(monkeypatch):
+    monkeypatch.setattr(metrics, "registry", metrics.Registry())
+
+
+def _value(body, series):
+    """ Valeur d'une série dans le texte d'exposition """
+    for line in body.splitlines():
+        if line.startswith(series + " "):
+            return float(line.rsplit(" ", 1)[1])
+    raise AssertionError(f"{series} absente")
+
+
+# ---------------------------
+# Agrégation
+# ---------------------------
+def test_histogram_buckets_are_cumulative():
+    for seconds in (0.001, 0.02, 0.02, 3.0, 42.0):
+        metrics.registry.observe("task-list", "GET", 200, seconds, queries=2, query_seconds=0.001)
+    body = metrics.render(metrics.collect())
+    bucket = 'taskflow_http_request_duration_seconds_bucket{route="task-list",method="GET",le="%s"}'
+    assert _value(body, bucket % 0.005) == 1
+    assert _value(body, bucket % 0.025) == 3
+    assert _value(body, bucket % 5.0) == 4
+    assert _value(body, bucket % "+Inf") == 5
+    assert _value(body, 'taskflow_http_request_duration_seconds_sum{route="task-list",method="GET"}') == pytest.approx(45.041)
+    assert _value(body, 'taskflow_db_queries_total{route="task-list",method="GET"}') == 10
+
+
+def test_thread_shards_are_summed():
+    def work():
+        for _ in range(1000):
+            metrics.registry.observe("task-kanban", "GET", 200, 0.01)
+
+    threads = [threading.Thread(target=work) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    body = metrics.render(metrics.collect())
+    assert _value(body, 'taskflow_http_responses_total{route="task-kanban",method="GET",status="200"}') == 4000
+
+
+# ---------------------------
+# Middleware + endpoint
+# ---------------------------
+@pytest.mark.django_db
+def test_metrics_endpoint_reports_routes_statuses_and_queries():
+    client = APIClient()
+    client.get('/api/tasks/')
+    client.get('/api/tasks/')
+    client.get('/api/tasks/999999/')
+    resp = client.get('/metrics')
+    assert resp.status_code == 200
+    assert resp["Content-Type"].startswith("text/plain; version=0.0.4")
+    body = resp.content.decode()
+    assert _value(body, 'taskflow_http_request_duration_seconds_count{route="task-list",method="GET"}') == 2
+    assert _value(body, 'taskflow_http_responses_total{route="task-detail",method="GET",status="404"}') == 1
+    assert _value(body, 'taskflow_db_queries_total{route="task-list",method="GET"}') >= 2
+    assert "taskflow_graph_cache_hits_total" in body
+
+
+@pytest.mark.django_db
+def test_shared_directory_mode_sums_workers(settings, tmp_path):
+    settings.METRICS_DIR = str(tmp_path)
+    other = metrics.Registry()
+    other.observe("task-list", "GET", 200, 0.01, queries=3)
+    (tmp_path / "metrics-99999.json").write_text(json.dumps(other.snapshot()))
+
+    APIClient().get('/api/tasks/')
+    body = APIClient().get('/metrics').content.decode()
+    assert _value(body, 'taskflow_http_request_duration_seconds_count{route="task-list",method="GET"}') == 2
+    assert any(p.name.startswith("metrics-") and p.name != "metrics-99999.json" for p in tmp_path.iterdir())
+
+
+@pytest.mark.django_db
+def test_stale_worker_files_are_dropped(settings, tmp_path):
+    settings.METRICS_DIR = str(tmp_path)
+    settings.METRICS_SHARD_TTL = 60
+    dead = metrics.Registry()
+    dead.observe("task-list", "GET", 200, 0.01)
+    stale = tmp_path / "metrics-99998.json"
+    stale.write_text(json.dumps(dead.snapshot()))
+    old = time.time() - 120
+    os.utime(stale, (old, old))
+
+    merged = metrics.collect()
+    assert ("task-list", "GET") not in merged["latency"]
+    assert not stale.exists()
@@ -0,0 +1,88 @@
+import pytest
+from rest_framework.test import APIClient
+from tasks.models import Task, Need, Project
+
+
+def _walk(client, url):
+    """ Suit les liens `next` et renvoie toutes les pages """
+    pages = []
+    while url:
+        resp = client.get(url)
+        assert resp.status_code == 200
+        pages.append(resp.json())
+        url = pages[-1]["next"]
+    return pages
+
+
+# ---------------------------
+# Tests
+# ---------------------------
+@pytest.mark.django_db
+def test_tasks_keyset_pages_cover_everything():
+    Task.objects.bulk_create([Task(title=f"T{i}") for i in range(25)])
+    client = APIClient()
+    pages = _walk(client, '/api/tasks/?page_size=10&fields=id,title')
+    assert [len(p["results"]) for p in pages] == [10, 10, 5]
+    ids = [t["id"] for p in pages for t in p["results"]]
+    assert ids == sorted(ids, reverse=True)
+    assert len(set(ids)) == 25
+    assert "count" not in pages[0]
+
+
+@pytest.mark.django_db
+def test_page_size_is_capped_and_count_optional():
+    Need.objects.bulk_create([Need(title=f"N{i}") for i in range(3)])
+    client = APIClient()
+    resp = client.get('/api/needs/?page_size=100000&count=1')
+    body = resp.json()
+    assert body["count"] == 3
+    assert len(body["results"]) == 3
+
+
+@pytest.mark.django_db
+def test_created_at_ordering_and_unpaginated_default():
+    for i in range(4):
+        Project.objects.create(name=f"P{i}", code=f"P{i}")
+    client = APIClient()
+    pages = _walk(client, '/api/projects/?page_size=3&ordering=created_at')
+    assert [p["name"] for page in pages for p in page["results"]] == ["P0", "P1", "P2", "P3"]
+    # sans paramètre de pagination : liste brute, comme avant
+    assert isinstance(client.get('/api/projects/').json(), list)
+
+
+@pytest.mark.django_db
+def test_deep_page_query_count_constant(django_assert_max_num_queries):
+    Task.objects.bulk_create([Task(title=f"T{i}") for i in range(60)])
+    client = APIClient()
+    pages = _walk(client, '/api/tasks/?page_size=5&fields=id')
+    last_cursor = pages[-2]["next"]
+    # page + 2 requêtes d'agrégat pour l'ETag
+    with django_assert_max_num_queries(3):
+        client.get(last_cursor)
+
+
+@pytest.mark.django_db
+def test_unsupported_ordering_is_rejected_when_paginated():
+    for title in ("c", "a", "b"):
+        Task.objects.create(title=title)
+    client = APIClient()
+    resp = client.get('/api/tasks/?page_size=2&ordering=title')
+    assert resp.status_code == 400
+    assert "title" in resp.json()["ordering"]
+    # sans pagination : OrderingFilter s'applique comme avant
+    assert [t["title"] for t in client.get('/api/tasks/?ordering=title&fields=title').json()] == ["a", "b", "c"]
+
+
+@pytest.mark.django_db
+def test_paginated_descendants_keep_tree_order():
+    root = Task.objects.create(title="Racine")
+    first = Task.objects.create(title="A", parent=root)
+    second = Task.objects.create(title="B", parent=root)
+    Task.objects.create(title="A1", parent=first)
+    Task.objects.create(title="B1", parent=second)
+    Task.objects.create(title="A2", parent=first)
+    client = APIClient()
+    pages = _walk(client, f'/api/tasks/{root.id}/descendants/?page_size=2')
+    titles = [t["title"] for page in pages for t in page["results"]]
+    assert titles == [t["title"] for t in client.get(f'/api/tasks/{root.id}/descendants/').json()]
+    assert titles == ["A", "B", "A1", "A2", "B1"]
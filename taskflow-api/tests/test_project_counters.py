@@ -0,0 +1,121 @@
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from tasks.models import Task, Project
+
+
+def _counters(project):
+    project.refresh_from_db()
+    return project.tasks_total, project.tasks_todo, project.tasks_in_progress, project.tasks_done, project.tasks_new
+
+
+# ---------------------------
+# Tests
+# ---------------------------
+@pytest.mark.django_db
+def test_counters_follow_create_update_delete():
+    p1 = Project.objects.create(name="P1", code="P1")
+    p2 = Project.objects.create(name="P2", code="P2")
+
+    task = Task.objects.create(title="T", status="À faire", project=p1)
+    Task.objects.create(title="Fini", status="Fait", project=p1)
+    assert _counters(p1) == (2, 1, 0, 1, 0)
+    assert p1.progression == 50
+
+    task.status = "En cours"
+    task.save()
+    assert _counters(p1) == (2, 0, 1, 1, 0)
+
+    task.project = p2
+    task.save()
+    assert _counters(p1) == (1, 0, 0, 1, 0)
+    assert _counters(p2) == (1, 0, 1, 0, 0)
+
+    task.delete()
+    assert _counters(p2) == (0, 0, 0, 0, 0)
+    assert p2.progression == 0
+
+
+@pytest.mark.django_db
+def test_counters_follow_cascade_delete():
+    project = Project.objects.create(name="P", code="P")
+    parent = Task.objects.create(title="Parent", status="Fait", project=project)
+    Task.objects.create(title="Enfant", status="Nouveau", project=project, parent=parent)
+    assert _counters(project) == (2, 0, 0, 1, 1)
+    parent.delete()
+    assert _counters(project) == (0, 0, 0, 0, 0)
+
+
+@pytest.mark.django_db
+def test_rebuild_command_after_bulk_update():
+    project = Project.objects.create(name="P", code="P")
+    Task.objects.bulk_create([Task(title=f"T{i}", status="Fait", project=project) for i in range(4)])
+    assert _counters(project)[0] == 0  # bulk_create ne déclenche pas les signaux
+    call_command("rebuild_project_counters")
+    assert _counters(project) == (4, 0, 0, 4, 0)
+    assert project.progression == 100
+
+
+@pytest.mark.django_db
+def test_project_list_does_not_query_per_project(django_assert_max_num_queries):
+    for i in range(10):
+        project = Project.objects.create(name=f"P{i}", code=f"P{i}")
+        Task.objects.create(title="T", status="Fait", project=project)
+    client = APIClient()
+    with django_assert_max_num_queries(2):
+        resp = client.get('/api/projects/')
+    assert resp.status_code == 200
+    assert all(p["progression"] == 100 for p in resp.json())
+
+
+@pytest.mark.django_db
+def test_cascade_delete_updates_counters_once():
+    keep = Project.objects.create(name="K", code="K")
+    project = Project.objects.create(name="P", code="P")
+    root = Task.objects.create(title="Racine", status="Fait", project=keep)
+    for i in range(10):
+        Task.objects.create(title=f"E{i}", status="À faire", project=keep, parent=root)
+    Task.objects.create(title="Autre", status="Fait", project=project)
+
+    with CaptureQueriesContext(connection) as ctx:
+        root.delete()
+    updates = [q["sql"] for q in ctx.captured_queries if q["sql"].startswith('UPDATE "tasks_project"')]
+    assert len(updates) == 1
+    assert _counters(keep) == (0, 0, 0, 0, 0)
+
+    # projet supprimé : ses tâches ne sont pas décomptées une à une
+    with CaptureQueriesContext(connection) as ctx:
+        project.delete()
+    assert not [q for q in ctx.captured_queries if q["sql"].startswith('UPDATE "tasks_project"')]
+
+
+@pytest.mark.django_db
+def test_counters_with_deferred_fields():
+    project = Project.objects.create(name="P", code="P")
+    other = Project.objects.create(name="O", code="O")
+    task = Task.objects.create(title="T", status="Fait", project=project)
+    Task.objects.create(title="Autre", status="À faire", project=project)
+
+    # statut différé puis assigné : l'ancien statut est relu en base
+    partial = Task.objects.defer("status").get(pk=task.pk)
+    partial.status = "En cours"
+    partial.save()
+    assert _counters(project) == (2, 1, 1, 0, 0)
+
+    # seul le titre est chargé : projet et statut inchangés
+    partial = Task.objects.only("id", "title").get(pk=task.pk)
+    partial.title = "Renommée"
+    partial.save()
+    assert _counters(project) == (2, 1, 1, 0, 0)
+
+    partial = Task.objects.only("id").get(pk=task.pk)
+    partial.project = other
+    partial.save()
+    assert _counters(project) == (1, 1, 0, 0, 0)
+    assert _counters(other) == (1, 0, 1, 0, 0)
+
+    Task.objects.defer("status").get(pk=task.pk).delete()
+    assert _counters(other) == (0, 0, 0, 0, 0)
+    assert _counters(project) == (1, 1, 0, 0, 0)
@@ -0,0 +1,73 @@
+import io
+import json
+
+import pytest
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from tasks.models import Task, Project
+from tasks import query_plan
+
+
+# ---------------------------
+# Fixture : quelques tâches dans un projet
+# ---------------------------
+@pytest.fixture
+def seeded(db):
+    user = User.objects.create_user(username="romain", password="pwd123")
+    project = Project.objects.create(name="P", code="P")
+    for i in range(5):
+        Task.objects.create(title=f"T{i}", project=project, owner=user, status="Fait")
+    return project, user
+
+
+def _plan(queryset):
+    sql, params = queryset.query.sql_with_params()
+    return query_plan.issues(sql, query_plan.explain(sql, params))
+
+
+# ---------------------------
+# Tests
+# ---------------------------
+def test_fingerprint_strips_literals():
+    a = query_plan.fingerprint("SELECT * FROM t WHERE id IN (1, 2, 3) AND s = 'x' LIMIT 5")
+    b = query_plan.fingerprint("SELECT * FROM t WHERE id IN (4) AND s = 'y' LIMIT 50")
+    assert a == b == "SELECT * FROM t WHERE id IN (...) AND s = ? LIMIT ?"
+    c = query_plan.fingerprint("SELECT * FROM t WHERE id IN (%s, %s) AND s = %s")
+    d = query_plan.fingerprint("SELECT * FROM t WHERE id IN (%s) AND s = %s")
+    assert c == d == "SELECT * FROM t WHERE id IN (...) AND s = %s"
+
+
+@pytest.mark.django_db
+def test_composite_indexes_avoid_full_scans(seeded):
+    project, user = seeded
+    assert _plan(Task.objects.filter(project=project, status="Fait").values("id")) == []
+    assert _plan(Task.objects.filter(owner=user, status="Fait").values("id")) == []
+    assert _plan(Task.objects.filter(title="T1").values("id")) == [("full_scan", "tasks_task")]
+
+
+@pytest.mark.django_db
+def test_subquery_alias_resolved_to_table(seeded):
+    plan = _plan(Task.objects.filter(parent__in=Task.objects.filter(title="x")).values("id"))
+    assert ("full_scan", "tasks_task") in plan
+
+
+@pytest.mark.django_db
+def test_explain_queries_command_reports_scans(seeded, tmp_path):
+    project, user = seeded
+    out = io.StringIO()
+    filtered = f"/api/tasks/?project={project.id}&status=Fait&page_size=10"
+    call_command("explain_queries", "--json", "--url", filtered, "--url", "/api/tasks/?page_size=10", stdout=out)
+    scans = {source for entry in json.loads(out.getvalue()) for source in entry["sources"]
+             for kind, _ in entry["issues"] if kind == "full_scan"}
+    # liste complète : l'agrégat ETag lit toute la table ; filtrée : index (project, status)
+    assert scans == {"/api/tasks/?page_size=10"}
+
+    sql_file = tmp_path / "queries.sql"
+    sql_file.write_text('SELECT "id" FROM "tasks_task" WHERE "title" = \'a\'\nSELECT "id" FROM "tasks_task" WHERE "title" = \'b\'\n')
+    out = io.StringIO()
+    call_command("explain_queries", "--json", "--file", str(sql_file), stdout=out)
+    report = json.loads(out.getvalue())
+    assert report[0]["count"] == 2
+    assert report[0]["issues"] == [["full_scan", "tasks_task"]]
+    with pytest.raises(SystemExit):
+        call_command("explain_queries", "--file", str(sql_file), "--fail-on-scan", stdout=io.StringIO())
@@ -0,0 +1,95 @@
+import json
+
+import pytest
+from django.contrib.auth.models import User
+from django.test import Client
+from rest_framework.test import APIClient
+from core import monitoring
+from core.profiler import QueryProfile, capture_queries
+from core.testing import assert_endpoint_queries
+from tasks.models import Task
+
+
+@pytest.fixture
+def owned_tasks(db):
+    for i in range(6):
+        user = User.objects.create(username=f"u{i}")
+        Task.objects.create(title=f"T{i}", owner=user)
+
+
+@pytest.fixture
+def kpi_file(tmp_path, settings):
+    path = tmp_path / "kpi.jsonl"
+    settings.KPI_LOG = {"path": str(path), "flush_interval": 0.05}
+    previous, monitoring._pipeline = monitoring._pipeline, None
+    yield path
+    if monitoring._pipeline is not None:
+        monitoring._pipeline.stop()
+    monitoring._pipeline = previous
+
+
+# ---------------------------
+# Empreintes et N+1
+# ---------------------------
+def test_repeated_select_shape_is_flagged():
+    queries = [(f'SELECT * FROM "auth_user" WHERE "id" = {i}', 0.001) for i in range(5)]
+    queries += [('SELECT * FROM "tasks_task"', 0.002), ('UPDATE "tasks_task" SET x = 1', 0.001)] * 1
+    profile = QueryProfile(queries, threshold=5)
+    (suspect,) = profile.n_plus_one()
+    assert suspect["count"] == 5
+    assert suspect["shape"] == 'SELECT * FROM "auth_user" WHERE "id" = ?'
+    assert profile.summary() == "queries=7; time_ms=8.0; n_plus_one=1"
+
+
+@pytest.mark.django_db
+def test_capture_queries_sees_lazy_relation_loop(owned_tasks):
+    with capture_queries() as profile:
+        [t.owner.username for t in Task.objects.all()]
+    assert profile.count == 7
+    assert profile.n_plus_one()[0]["count"] == 6
+    with capture_queries() as profile:
+        [t.owner.username for t in Task.objects.select_related("owner")]
+    assert (profile.count, profile.n_plus_one()) == (1, [])
+
+
+# ---------------------------
+# Middleware (opt-in)
+# ---------------------------
+@pytest.mark.django_db
+def test_middleware_disabled_by_default():
+    assert "X-Query-Profile" not in APIClient().get('/api/tasks/')
+
+
+@pytest.mark.django_db
+def test_middleware_flags_dashboard_n_plus_one(owned_tasks, settings, kpi_file):
+    settings.QUERY_PROFILER = {"enabled": True, "sample_rate": 1.0, "n_plus_one_threshold": 5}
+    admin = User.objects.create_superuser(username="admin", password="pwd123")
+    client = Client()
+    client.force_login(admin)
+    resp = client.get('/admin/')
+    assert resp.status_code == 200
+    assert "n_plus_one=1" in resp["X-Query-Profile"]
+
+    monitoring._pipeline.stop()
+    records = [json.loads(line) for line in kpi_file.read_text().splitlines()]
+    (profile,) = [r for r in records if r["msg"] == "sql_profile"]
+    assert profile["path"] == "/admin/"
+    assert 'FROM "auth_user"' in profile["n_plus_one"][0]["shape"]
+
+
+@pytest.mark.django_db
+def test_middleware_sampling(settings):
+    settings.QUERY_PROFILER = {"enabled": True, "sample_rate": 0.0}
+    assert "X-Query-Profile" not in APIClient().get('/api/tasks/')
+
+
+# ---------------------------
+# Aide de test : budget par endpoint
+# ---------------------------
+@pytest.mark.django_db
+def test_endpoint_query_budget(owned_tasks):
+    client = APIClient()
+    assert_endpoint_queries(client, '/api/tasks/kanban/', max_queries=4)
+    assert_endpoint_queries(client, '/api/projects/', max_queries=3)
+    with pytest.raises(AssertionError, match="requêtes SQL"):
+        assert_endpoint_queries(client, '/api/tasks/', max_queries=1)
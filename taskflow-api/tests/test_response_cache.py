@@ -0,0 +1,169 @@
+import pytest
+from django.core.cache import caches
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from core import db_router
+from tasks.models import Task, TaskLink, Project
+
+
+@pytest.fixture(autouse=True)
+def clear_response_cache(settings, tmp_path):
+    # cache partagé (fichier) : en mémoire locale, le cache des réponses est désactivé ;
+    # les ids sont réutilisés d'un test à l'autre
+    settings.CACHES = {
+        **settings.CACHES,
+        "responses": {"BACKEND": "django.core.cache.backends.filebased.FileBasedCache", "LOCATION": str(tmp_path / "cache")},
+    }
+    caches["responses"].clear()
+    yield
+    caches["responses"].clear()
+
+
+@pytest.fixture
+def two_projects(db):
+    first = Project.objects.create(name="Un", code="P1")
+    second = Project.objects.create(name="Deux", code="P2")
+    for project in (first, second):
+        Task.objects.create(title=f"{project.code} tâche", project=project, start_date="2025-01-01", due_date="2025-01-05")
+    return first, second
+
+
+# ---------------------------
+# Tests
+# ---------------------------
+@pytest.mark.django_db
+@pytest.mark.parametrize("view", ["kanban", "gantt"])
+def test_second_call_is_served_from_cache(two_projects, view, django_assert_num_queries):
+    first, _ = two_projects
+    client = APIClient()
+    url = f'/api/tasks/{view}/?project={first.id}'
+    miss = client.get(url)
+    assert miss["X-Response-Cache"] == "miss"
+    with django_assert_num_queries(0):
+        hit = client.get(url)
+    assert hit["X-Response-Cache"] == "hit"
+    assert hit.json() == miss.json()
+    assert hit["ETag"] == miss["ETag"]
+    assert client.get(url, HTTP_IF_NONE_MATCH=hit["ETag"]).status_code == 304
+
+
+@pytest.mark.django_db
+def test_query_params_are_part_of_the_key(two_projects):
+    first, _ = two_projects
+    client = APIClient()
+    client.get(f'/api/tasks/kanban/?project={first.id}&limit=1')
+    assert client.get(f'/api/tasks/kanban/?project={first.id}&limit=2')["X-Response-Cache"] == "miss"
+    assert client.get(f'/api/tasks/kanban/?limit=1&project={first.id}')["X-Response-Cache"] == "hit"
+
+
+@pytest.mark.django_db
+def test_write_invalidates_only_its_project(two_projects):
+    first, second = two_projects
+    client = APIClient()
+    for project in (first, second):
+        client.get(f'/api/tasks/gantt/?project={project.id}')
+    client.get('/api/tasks/gantt/')
+
+    Task.objects.create(title="Nouvelle", project=first, start_date="2025-02-01", due_date="2025-02-02")
+
+    fresh = client.get(f'/api/tasks/gantt/?project={first.id}')
+    assert fresh["X-Response-Cache"] == "miss"
+    assert len(fresh.json()) == 2
+    assert client.get(f'/api/tasks/gantt/?project={second.id}')["X-Response-Cache"] == "hit"
+    assert client.get('/api/tasks/gantt/')["X-Response-Cache"] == "miss"
+
+
+@pytest.mark.django_db
+def test_task_moved_invalidates_both_projects(two_projects):
+    first, second = two_projects
+    client = APIClient()
+    for project in (first, second):
+        client.get(f'/api/tasks/kanban/?project={project.id}')
+    task = Task.objects.get(project=first)
+    task.project = second
+    task.save()
+    for project in (first, second):
+        assert client.get(f'/api/tasks/kanban/?project={project.id}')["X-Response-Cache"] == "miss"
+
+
+@pytest.mark.django_db
+def test_link_and_bulk_writes_invalidate(two_projects):
+    first, _ = two_projects
+    client = APIClient()
+    url = f'/api/tasks/kanban/?project={first.id}'
+    client.get(url)
+    other = Task.objects.create(title="Autre", project=first)
+    client.get(url)
+    TaskLink.objects.create(src_task=Task.objects.filter(project=first).first(), dst_task=other, link_type="blocks")
+    assert client.get(url)["X-Response-Cache"] == "miss"
+
+    client.post('/api/tasks/bulk_update/', {"ids": [other.id], "changes": {"status": "Fait"}}, format='json')
+    resp = client.get(url)
+    assert resp["X-Response-Cache"] == "miss"
+    assert resp.json()["Fait"]["count"] == 1
+
+
+@pytest.mark.django_db
+def test_cascade_delete_does_not_look_up_link_ends(two_projects):
+    first, second = two_projects
+    client = APIClient()
+    url = f'/api/tasks/kanban/?project={second.id}'
+    chain = [Task.objects.create(title=f"T{i}", project=first) for i in range(10)]
+    for src, dst in zip(chain, chain[1:]):
+        TaskLink.objects.create(src_task=src, dst_task=dst, link_type="blocks")
+    # lien vers une tâche d'un autre projet : seul cas qui demande une requête
+    TaskLink.objects.create(src_task=chain[0], dst_task=Task.objects.get(project=second), link_type="relates")
+    client.get(url)
+
+    with CaptureQueriesContext(connection) as ctx:
+        first.delete()
+    lookups = [q for q in ctx.captured_queries if q["sql"].startswith('SELECT "tasks_task"."project_id"')]
+    assert len(lookups) == 1
+    assert client.get(url)["X-Response-Cache"] == "miss"
+
+
+@pytest.mark.django_db
+def test_project_scope_is_normalised(two_projects):
+    first, _ = two_projects
+    client = APIClient()
+    url = f'/api/tasks/kanban/?project=0{first.id}'
+    client.get(url)
+    Task.objects.create(title="Nouvelle", project=first)
+    resp = client.get(url)
+    assert resp["X-Response-Cache"] == "miss"
+    assert resp.json()["À faire"]["count"] == 2
+    assert client.get('/api/tasks/kanban/?project=abc').status_code == 400
+    assert client.get('/api/tasks/gantt/?project=abc').status_code == 400
+
+
+@pytest.mark.django_db
+def test_stream_is_not_cached(two_projects):
+    client = APIClient()
+    client.get('/api/tasks/gantt/?stream=1')
+    assert client.get('/api/tasks/gantt/?stream=1')["X-Response-Cache"] == "miss"
+
+
+@pytest.mark.django_db
+def test_local_cache_is_not_used(two_projects, settings):
+    # mémoire locale : une écriture d'un autre worker ne périmerait pas la copie de celui-ci
+    settings.CACHES = {**settings.CACHES, "responses": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+    first, _ = two_projects
+    client = APIClient()
+    url = f'/api/tasks/kanban/?project={first.id}'
+    assert client.get(url)["X-Response-Cache"] == "off"
+    assert client.get(url)["X-Response-Cache"] == "off"
+
+
+@pytest.mark.django_db
+def test_replica_reads_do_not_populate_cache(two_projects, monkeypatch):
+    # réplica en retard : l'entrée porterait la nouvelle version avec des données périmées
+    first, _ = two_projects
+    client = APIClient()
+    url = f'/api/tasks/kanban/?project={first.id}'
+    monkeypatch.setattr(db_router, "reading_from_replica", lambda: True)
+    assert client.get(url)["X-Response-Cache"] == "miss"
+    assert client.get(url)["X-Response-Cache"] == "miss"
+    monkeypatch.undo()
+    assert client.get(url)["X-Response-Cache"] == "miss"
+    assert client.get(url)["X-Response-Cache"] == "hit"
@@ -0,0 +1,92 @@
+import pytest
+from django.core.management import call_command
+from rest_framework.test import APIClient
+from tasks.models import Task, Need
+from tasks import bulk
+
+
+# ---------------------------
+# Fixture : quelques tâches et besoins
+# ---------------------------
+@pytest.fixture
+def corpus(db):
+    Task.objects.create(title="Rapport mensuel", module="Finance")
+    Task.objects.create(title="Corriger l'export", module="Rapports", target_version="v2.1")
+    Task.objects.create(title="Réunion d'équipe")
+    Need.objects.create(title="Tableau de bord", description="Afficher les rapports de ventes")
+    Need.objects.create(title="Rapport annuel")
+
+
+# ---------------------------
+# Tests
+# ---------------------------
+@pytest.mark.django_db
+def test_task_search_ranks_title_first(corpus, django_assert_max_num_queries):
+    client = APIClient()
+    with django_assert_max_num_queries(2):
+        resp = client.get('/api/tasks/search/', {"q": "rapport"})
+    assert resp.status_code == 200
+    assert [t["title"] for t in resp.json()] == ["Rapport mensuel", "Corriger l'export"]
+
+
+@pytest.mark.django_db
+def test_prefix_accents_and_all_terms(corpus):
+    client = APIClient()
+    assert [t["title"] for t in client.get('/api/tasks/search/', {"q": "reun"}).json()] == ["Réunion d'équipe"]
+    assert [t["title"] for t in client.get('/api/tasks/search/', {"q": "rapp fin"}).json()] == ["Rapport mensuel"]
+    assert client.get('/api/tasks/search/', {"q": 'v2.1 "'}).json()[0]["title"] == "Corriger l'export"
+
+
+@pytest.mark.django_db
+def test_need_search_covers_description(corpus):
+    client = APIClient()
+    resp = client.get('/api/needs/search/', {"q": "rapport"})
+    assert [n["title"] for n in resp.json()] == ["Rapport annuel", "Tableau de bord"]
+
+
+@pytest.mark.django_db
+def test_index_follows_updates_deletes_and_bulk_writes(corpus):
+    client = APIClient()
+    task = Task.objects.get(title="Réunion d'équipe")
+    task.title = "Atelier planning"
+    task.save()
+    Task.objects.filter(title="Rapport mensuel").delete()
+    bulk.bulk_create_tasks([{"title": "Planning importé"}])
+
+    titles = [t["title"] for t in client.get('/api/tasks/search/', {"q": "planning"}).json()]
+    assert sorted(titles) == ["Atelier planning", "Planning importé"]
+    assert client.get('/api/tasks/search/', {"q": "reunion"}).json() == []
+    assert [t["title"] for t in client.get('/api/tasks/search/', {"q": "rapport"}).json()] == ["Corriger l'export"]
+
+
+@pytest.mark.django_db
+def test_missing_query_and_fallback_backend(corpus, settings):
+    client = APIClient()
+    assert client.get('/api/tasks/search/', {"q": "  "}).status_code == 400
+    settings.SEARCH_BACKEND = "tasks.search.ContainsBackend"
+    resp = client.get('/api/tasks/search/', {"q": "rapport"})
+    assert {t["title"] for t in resp.json()} == {"Rapport mensuel", "Corriger l'export"}
+    call_command("rebuild_search_index")
+
+
+@pytest.mark.django_db
+def test_rebuild_command(corpus):
+    call_command("rebuild_search_index")
+    assert len(APIClient().get('/api/tasks/search/', {"q": "rapport"}).json()) == 2
+
+
+@pytest.mark.django_db
+def test_triggers_restored_after_table_rebuild(corpus):
+    # reconstruction SQLite de tasks_task (AlterField…) : les triggers disparaissent
+    from django.db import connection
+    from tasks.apps import restore_search_triggers
+
+    with connection.cursor() as cursor:
+        for suffix in ("_ai", "_ad", "_au"):
+            cursor.execute(f"DROP TRIGGER tasks_task_fts{suffix}")
+    Task.objects.create(title="Rapport perdu")
+    restore_search_triggers(using="default")
+
+    Task.objects.create(title="Rapport suivi")
+    titles = {t["title"] for t in APIClient().get('/api/tasks/search/', {"q": "rapport"}).json()}
+    assert {"Rapport perdu", "Rapport suivi"} <= titles
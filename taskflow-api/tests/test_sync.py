@@ -0,0 +1,108 @@
+import datetime
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+from tasks.models import Task, TaskTombstone, Project
+
+
+@pytest.fixture
+def no_lag(settings):
+    # jetons exacts : chaque appel ne renvoie que ce qui a changé depuis le précédent
+    settings.SYNC_SAFETY_LAG = 0
+
+
+def _sync(client, token=None, limit=None):
+    params = {}
+    if token:
+        params["since"] = token
+    if limit:
+        params["limit"] = limit
+    resp = client.get('/api/tasks/sync/', params)
+    assert resp.status_code == 200
+    return resp.json()
+
+
+# ---------------------------
+# Tests
+# ---------------------------
+@pytest.mark.django_db
+def test_initial_sync_then_deltas(no_lag):
+    client = APIClient()
+    a = Task.objects.create(title="A")
+    b = Task.objects.create(title="B")
+    first = _sync(client)
+    assert [t["title"] for t in first["changed"]] == ["A", "B"]
+    assert first["deleted"] == [] and first["has_more"] is False
+
+    # rien de neuf : réponse vide, jeton inchangé
+    idle = _sync(client, first["sync_token"])
+    assert idle["changed"] == [] and idle["deleted"] == []
+    assert idle["sync_token"] == first["sync_token"]
+
+    a.status = "En cours"
+    a.save()
+    b_id = b.id
+    b.delete()
+    Task.objects.create(title="C")
+    delta = _sync(client, idle["sync_token"])
+    assert [t["title"] for t in delta["changed"]] == ["A", "C"]
+    assert delta["changed"][0]["status"] == "En cours"
+    assert delta["deleted"] == [b_id]
+
+    assert _sync(client, delta["sync_token"])["changed"] == []
+
+
+@pytest.mark.django_db
+def test_sync_pages_with_has_more(no_lag):
+    Task.objects.bulk_create([Task(title=f"T{i}") for i in range(7)])
+    client = APIClient()
+    seen, token, has_more = [], None, True
+    while has_more:
+        page = _sync(client, token, limit=3)
+        seen += [t["title"] for t in page["changed"]]
+        token, has_more = page["sync_token"], page["has_more"]
+    assert sorted(seen) == sorted(f"T{i}" for i in range(7))
+    assert len(seen) == 7
+
+
+@pytest.mark.django_db
+def test_sync_invalid_token():
+    client = APIClient()
+    assert client.get('/api/tasks/sync/', {"since": "pas-un-jeton"}).status_code == 400
+
+
+@pytest.mark.django_db
+def test_late_commit_is_reread_within_safety_lag(settings):
+    settings.SYNC_SAFETY_LAG = 60
+    client = APIClient()
+    Task.objects.create(title="A")
+    first = _sync(client)
+    # transaction commencée avant l'appel, validée après : updated_at antérieur au jeton
+    late = Task.objects.create(title="Tardive")
+    Task.objects.filter(pk=late.pk).update(updated_at=timezone.now() - datetime.timedelta(seconds=30))
+    delta = _sync(client, first["sync_token"])
+    # la fenêtre de sécurité est relue : A revient aussi (appliqué par id côté client)
+    assert sorted(t["title"] for t in delta["changed"]) == ["A", "Tardive"]
+
+    settings.SYNC_SAFETY_LAG = 0
+    exact = _sync(client)["sync_token"]
+    missed = Task.objects.create(title="Perdue")
+    Task.objects.filter(pk=missed.pk).update(updated_at=timezone.now() - datetime.timedelta(seconds=30))
+    assert _sync(client, exact)["changed"] == []
+
+
+@pytest.mark.django_db
+def test_cascade_delete_writes_tombstones_in_bulk():
+    project = Project.objects.create(name="P", code="P")
+    root = Task.objects.create(title="Racine", project=project)
+    for i in range(20):
+        Task.objects.create(title=f"T{i}", project=project, parent=root)
+    project_id = project.id
+    with CaptureQueriesContext(connection) as ctx:
+        project.delete()
+    inserts = [q for q in ctx.captured_queries if q["sql"].startswith('INSERT INTO "tasks_tasktombstone"')]
+    assert len(inserts) == 1
+    assert TaskTombstone.objects.filter(project_id=project_id).count() == 21
@@ -0,0 +1,97 @@
+import pytest
+from django.core.exceptions import ValidationError
+from rest_framework.test import APIClient
+from tasks.models import Task
+
+
+# ---------------------------
+# Fixture : epic -> story -> task -> subtask, + une feature voisine
+# ---------------------------
+@pytest.fixture
+def chain(db):
+    epic = Task.objects.create(title="Epic", type="epic")
+    story = Task.objects.create(title="Story", type="story", parent=epic)
+    task = Task.objects.create(title="Task", parent=story)
+    subtask = Task.objects.create(title="Subtask", type="subtask", parent=task)
+    feature = Task.objects.create(title="Feature", type="feature", parent=epic)
+    return {"epic": epic, "story": story, "task": task, "subtask": subtask, "feature": feature}
+
+
+# ---------------------------
+# Tests
+# ---------------------------
+@pytest.mark.django_db
+def test_paths_follow_parents(chain):
+    subtask = Task.objects.get(pk=chain["subtask"].pk)
+    assert subtask.ancestor_ids() == [chain["epic"].id, chain["story"].id, chain["task"].id]
+    assert set(chain["epic"].descendants()) == {chain["story"], chain["task"], chain["subtask"], chain["feature"]}
+    assert list(chain["feature"].descendants()) == []
+
+
+@pytest.mark.django_db
+def test_move_rewrites_subtree_paths(chain):
+    story = chain["story"]
+    story.parent = chain["feature"]
+    story.save()
+    subtask = Task.objects.get(pk=chain["subtask"].pk)
+    assert subtask.ancestor_ids() == [chain["epic"].id, chain["feature"].id, story.id, chain["task"].id]
+    assert set(chain["feature"].descendants()) == {story, chain["task"], chain["subtask"]}
+
+
+@pytest.mark.django_db
+def test_cycle_detected_without_walking_ancestors(chain, django_assert_num_queries):
+    epic = chain["epic"]
+    subtask = Task.objects.get(pk=chain["subtask"].pk)
+    with django_assert_num_queries(0):
+        with pytest.raises(ValidationError):
+            epic.check_parent(subtask)
+    with pytest.raises(ValidationError):
+        epic.parent = subtask
+        epic.save()
+
+
+@pytest.mark.django_db
+def test_api_rejects_cycle(chain):
+    client = APIClient()
+    resp = client.patch(f'/api/tasks/{chain["epic"].id}/', {"parent": chain["task"].id}, format='json')
+    assert resp.status_code == 400
+    chain["epic"].refresh_from_db()
+    assert chain["epic"].parent is None
+
+
+@pytest.mark.django_db
+def test_ancestors_and_descendants_actions(chain, django_assert_max_num_queries):
+    client = APIClient()
+    with django_assert_max_num_queries(2):
+        resp = client.get(f'/api/tasks/{chain["subtask"].id}/ancestors/')
+    assert [t["title"] for t in resp.json()] == ["Epic", "Story", "Task"]
+
+    with django_assert_max_num_queries(2):
+        resp = client.get(f'/api/tasks/{chain["epic"].id}/descendants/')
+    assert [t["title"] for t in resp.json()] == ["Story", "Feature", "Task", "Subtask"]
+
+
+@pytest.mark.django_db
+def test_depth_limited_by_path_length():
+    # 200 niveaux : le path du plus profond (199 ancêtres) ne laisse plus de place
+    task = None
+    for level in range(200):
+        task = Task.objects.create(title=f"N{level}", parent=task)
+    deepest, before_last = task, task.parent
+    with pytest.raises(ValidationError):
+        Task.objects.create(title="Trop profond", parent=deepest)
+
+    client = APIClient()
+    resp = client.post('/api/tasks/', {"title": "Trop profond", "parent": deepest.id}, format='json')
+    assert resp.status_code == 400
+    resp = client.post('/api/tasks/', {"tasks": [{"title": "Ok", "parent": before_last.id},
+                                                 {"title": "Trop profond", "parent": deepest.id}]}, format='json')
+    assert resp.status_code == 400
+    assert list(resp.json()["errors"]) == ["1"]
+
+    # déplacement : le sous-arbre entier doit tenir
+    root = Task.objects.create(title="Racine")
+    Task.objects.create(title="Enfant", parent=root)
+    resp = client.patch(f'/api/tasks/{root.id}/', {"parent": before_last.id}, format='json')
+    assert resp.status_code == 400
+    assert client.patch(f'/api/tasks/{root.id}/', {"parent": before_last.parent_id}, format='json').status_code == 200
@@ -0,0 +1,73 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from django.contrib.auth.models import User
+from tasks.models import Task, TaskLink, Project
+
+
+# ---------------------------
+# Helpers
+# ---------------------------
+def _seed(count, project):
+    user = User.objects.create_user(username=f"user{count}", password="pwd123")
+    previous = None
+    for i in range(count):
+        task = Task.objects.create(title=f"T{i}", owner=user, reporter=user, project=project)
+        if previous:
+            TaskLink.objects.create(src_task=previous, dst_task=task, link_type="blocks")
+        previous = task
+
+
+def _count_list_queries(url):
+    client = APIClient()
+    with CaptureQueriesContext(connection) as ctx:
+        resp = client.get(url)
+    assert resp.status_code == 200
+    return len(ctx.captured_queries), resp.json()
+
+
+# ---------------------------
+# Tests
+# ---------------------------
+@pytest.mark.django_db
+def test_list_query_count_constant():
+    project = Project.objects.create(name="P", code="P")
+    _seed(3, project)
+    small, _ = _count_list_queries('/api/tasks/')
+    _seed(20, project)
+    large, data = _count_list_queries('/api/tasks/')
+    assert len(data) == 23
+    assert large == small
+
+
+@pytest.mark.django_db
+def test_sparse_fieldset_skips_relations():
+    project = Project.objects.create(name="P", code="P")
+    _seed(5, project)
+    queries, data = _count_list_queries('/api/tasks/?fields=id,title,status')
+    # liste + 2 requêtes d'agrégat pour l'ETag
+    assert queries == 3
+    assert set(data[0]) == {"id", "title", "status"}
+
+
+@pytest.mark.django_db
+def test_sparse_fieldset_on_retrieve_and_children():
+    parent = Task.objects.create(title="Parent")
+    Task.objects.create(title="Enfant", parent=parent)
+    client = APIClient()
+    resp = client.get(f'/api/tasks/{parent.id}/?fields=id,children')
+    assert resp.status_code == 200
+    data = resp.json()
+    assert set(data) == {"id", "children"}
+    assert set(data["children"][0]) == {"id", "children"}
+
+
+@pytest.mark.django_db
+def test_sparse_fieldset_rejects_unknown_fields():
+    task = Task.objects.create(title="T")
+    client = APIClient()
+    resp = client.get('/api/tasks/?fields=id,nope')
+    assert resp.status_code == 400
+    assert "nope" in resp.json()["fields"]
+    assert client.get(f'/api/tasks/{task.id}/?fields=path').status_code == 400
@@ -0,0 +1,64 @@
+import pytest
+from rest_framework.test import APIClient
+from tasks.models import Task, TaskLink
+
+
+# ---------------------------
+# Fixture : une chaîne profonde epic -> ... -> sous-tâche
+# ---------------------------
+@pytest.fixture
+def deep_tree(db):
+    root = Task.objects.create(title="Epic", type="epic")
+    parent = root
+    for depth in range(1, 6):
+        node = Task.objects.create(title=f"Niveau {depth}", parent=parent)
+        Task.objects.create(title=f"Feuille {depth}", parent=parent)
+        parent = node
+    TaskLink.objects.create(src_task=root, dst_task=parent, link_type="blocks")
+    return root
+
+
+def _depth(node):
+    return 1 + max((_depth(c) for c in node["children"]), default=0)
+
+
+# ---------------------------
+# Tests
+# ---------------------------
+@pytest.mark.django_db
+def test_retrieve_nested_children(deep_tree):
+    client = APIClient()
+    resp = client.get(f'/api/tasks/{deep_tree.id}/')
+    assert resp.status_code == 200
+    data = resp.json()
+    assert _depth(data) == 6
+    assert len(data["children"]) == 2
+    assert data["links"][0]["type"] == "blocks"
+
+
+@pytest.mark.django_db
+def test_retrieve_query_count_independent_of_depth(deep_tree, django_assert_max_num_queries):
+    client = APIClient()
+    with django_assert_max_num_queries(6):
+        resp = client.get(f'/api/tasks/{deep_tree.id}/')
+    assert resp.status_code == 200
+
+
+@pytest.mark.django_db
+def test_list_query_count_bounded(deep_tree, django_assert_max_num_queries):
+    client = APIClient()
+    # + 4 requêtes d'agrégat pour l'ETag (tâches, suppressions, liens, pièces jointes)
+    with django_assert_max_num_queries(10):
+        resp = client.get('/api/tasks/')
+    assert resp.status_code == 200
+    assert len(resp.json()) == Task.objects.count()
+
+
+@pytest.mark.django_db
+def test_children_action_uses_tree(deep_tree, django_assert_max_num_queries):
+    client = APIClient()
+    with django_assert_max_num_queries(6):
+        resp = client.get(f'/api/tasks/{deep_tree.id}/children/')
+    assert resp.status_code == 200
+    titles = {c["title"] for c in resp.json()}
+    assert titles == {"Niveau 1", "Feuille 1"}